@@ -0,0 +1,30 @@
+"""Add webhook_idempotency_keys table for bot command retries
+
+Revision ID: 004
+Revises: 003
+Create Date: 2025-01-04 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+from alembic import op
+import sqlalchemy as sa
+
+revision: str = "004"
+down_revision: Union[str, None] = "003"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "webhook_idempotency_keys",
+        sa.Column("key", sa.String(255), primary_key=True),
+        sa.Column("command", sa.String(50), nullable=False),
+        sa.Column("deal_id", sa.String(36), nullable=True),
+        sa.Column("response_json", sa.JSON, nullable=False),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("webhook_idempotency_keys")
@@ -0,0 +1,43 @@
+"""Add webhook_inbox table for queued bot commands
+
+Revision ID: 005
+Revises: 004
+Create Date: 2025-01-05 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+from alembic import op
+import sqlalchemy as sa
+
+revision: str = "005"
+down_revision: Union[str, None] = "004"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "webhook_inbox",
+        sa.Column("id", sa.String(36), primary_key=True),
+        sa.Column("idempotency_key", sa.String(255), unique=True, nullable=True),
+        sa.Column("command", sa.String(50), nullable=False),
+        sa.Column("deal_id", sa.String(36), nullable=True),
+        sa.Column("payload", sa.JSON, nullable=False),
+        sa.Column("status", sa.String(20), nullable=False, server_default="PENDING"),
+        sa.Column("attempts", sa.Integer, server_default="0"),
+        sa.Column("result_json", sa.JSON, nullable=True),
+        sa.Column("error", sa.Text, nullable=True),
+        sa.Column("delivery_attempts", sa.Integer, server_default="0"),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+        sa.Column("started_at", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("finished_at", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("delivered_at", sa.DateTime(timezone=True), nullable=True),
+    )
+    op.create_index("ix_webhook_inbox_deal_id", "webhook_inbox", ["deal_id"])
+    op.create_index("ix_webhook_inbox_status", "webhook_inbox", ["status"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_webhook_inbox_status", table_name="webhook_inbox")
+    op.drop_index("ix_webhook_inbox_deal_id", table_name="webhook_inbox")
+    op.drop_table("webhook_inbox")
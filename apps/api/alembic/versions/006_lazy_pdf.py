@@ -0,0 +1,26 @@
+"""Add pdf_status to document_versions for lazy PDF rendering
+
+Revision ID: 006
+Revises: 005
+Create Date: 2025-01-06 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+from alembic import op
+import sqlalchemy as sa
+
+revision: str = "006"
+down_revision: Union[str, None] = "005"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "document_versions",
+        sa.Column("pdf_status", sa.String(20), nullable=False, server_default="READY"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_column("document_versions", "pdf_status")
@@ -0,0 +1,41 @@
+"""Add document_regeneration_jobs table for bulk document regeneration
+
+Revision ID: 007
+Revises: 006
+Create Date: 2025-01-07 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+from alembic import op
+import sqlalchemy as sa
+
+revision: str = "007"
+down_revision: Union[str, None] = "006"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "document_regeneration_jobs",
+        sa.Column("id", sa.String(36), primary_key=True),
+        sa.Column("status", sa.String(20), nullable=False, server_default="PENDING"),
+        sa.Column("filters", sa.JSON, nullable=False),
+        sa.Column("total_deals", sa.Integer, server_default="0"),
+        sa.Column("processed_deals", sa.Integer, server_default="0"),
+        sa.Column("failed_deals", sa.Integer, server_default="0"),
+        sa.Column("regenerated_documents", sa.Integer, server_default="0"),
+        sa.Column("cursor", sa.String(36), nullable=True),
+        sa.Column("errors", sa.JSON, nullable=True),
+        sa.Column("error", sa.Text, nullable=True),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+        sa.Column("started_at", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("heartbeat_at", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("finished_at", sa.DateTime(timezone=True), nullable=True),
+    )
+    op.create_index("ix_document_regeneration_jobs_status", "document_regeneration_jobs", ["status"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_document_regeneration_jobs_status", table_name="document_regeneration_jobs")
+    op.drop_table("document_regeneration_jobs")
@@ -0,0 +1,25 @@
+"""Add render-ready logo and signature variants to app_settings
+
+Revision ID: 008
+Revises: 007
+Create Date: 2025-01-08 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+from alembic import op
+import sqlalchemy as sa
+
+revision: str = "008"
+down_revision: Union[str, None] = "007"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column("app_settings", sa.Column("logo_render_path", sa.String(500), nullable=True))
+    op.add_column("app_settings", sa.Column("signature_render_path", sa.String(500), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column("app_settings", "signature_render_path")
+    op.drop_column("app_settings", "logo_render_path")
@@ -0,0 +1,37 @@
+"""Add archived_files index for per-deal document archives
+
+Revision ID: 009
+Revises: 008
+Create Date: 2025-01-09 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+from alembic import op
+import sqlalchemy as sa
+
+revision: str = "009"
+down_revision: Union[str, None] = "008"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "archived_files",
+        sa.Column("key", sa.String(500), primary_key=True),
+        sa.Column("deal_id", sa.String(36), sa.ForeignKey("deals.id"), nullable=False),
+        sa.Column("archive_path", sa.String(500), nullable=False),
+        sa.Column("data_offset", sa.BigInteger, nullable=False),
+        sa.Column("stored_size", sa.BigInteger, nullable=False),
+        sa.Column("size", sa.BigInteger, nullable=False),
+        sa.Column("compression", sa.String(10), nullable=False),
+        sa.Column("crc32", sa.BigInteger, nullable=False),
+        sa.Column("modified_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("archived_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+    )
+    op.create_index("ix_archived_files_deal_id", "archived_files", ["deal_id"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_archived_files_deal_id", table_name="archived_files")
+    op.drop_table("archived_files")
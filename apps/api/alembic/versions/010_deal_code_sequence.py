@@ -0,0 +1,32 @@
+"""Add deal_code_seq so concurrent deal creation gets distinct codes
+
+Revision ID: 010
+Revises: 009
+Create Date: 2025-01-10 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+from alembic import op
+import sqlalchemy as sa
+
+revision: str = "010"
+down_revision: Union[str, None] = "009"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    if op.get_bind().dialect.name != "postgresql":
+        return
+    op.execute(sa.schema.CreateSequence(sa.Sequence("deal_code_seq")))
+    # Continue after the highest NEST-<n> code handed out so far
+    op.execute(
+        "SELECT setval('deal_code_seq', COALESCE(MAX(substr(deal_code, 6)::bigint), 0) + 1, false) "
+        "FROM deals WHERE deal_code ~ '^NEST-[0-9]+$'"
+    )
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name != "postgresql":
+        return
+    op.execute(sa.schema.DropSequence(sa.Sequence("deal_code_seq")))
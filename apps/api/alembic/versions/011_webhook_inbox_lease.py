@@ -0,0 +1,25 @@
+"""Add lease owner and heartbeat to webhook_inbox
+
+Revision ID: 011
+Revises: 010
+Create Date: 2025-01-11 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+from alembic import op
+import sqlalchemy as sa
+
+revision: str = "011"
+down_revision: Union[str, None] = "010"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column("webhook_inbox", sa.Column("lease_owner", sa.String(100), nullable=True))
+    op.add_column("webhook_inbox", sa.Column("heartbeat_at", sa.DateTime(timezone=True), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column("webhook_inbox", "heartbeat_at")
+    op.drop_column("webhook_inbox", "lease_owner")
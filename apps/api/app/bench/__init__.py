@@ -0,0 +1 @@
+"""Benchmark and scale-testing tools (not imported by the API)."""
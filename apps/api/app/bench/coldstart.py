@@ -0,0 +1,95 @@
+"""
+Cold-start benchmark for document templates.
+
+Usage:
+    python -m app.bench.coldstart [--runs 5] [--output results.json]
+
+Every run starts a fresh interpreter (like a new worker after a deploy) and
+times the first render of each DOC_TYPE_TEMPLATE in three scenarios:
+
+- ``lazy``          no bytecode cache, templates compiled on first use (the old behaviour)
+- ``bytecode``      lazy loading, but from a bytecode cache filled by an earlier process
+- ``warmed``        bytecode cache plus warm_templates() at startup, as lifespan does
+
+``startup_ms`` is the time spent in warm_templates() (zero when nothing is
+warmed). ``first_ms`` is the first get_template + render per template, and
+``steady_ms`` is the second render. Only the Jinja phase is timed.
+WeasyPrint's cold cost (font discovery) is covered by app.bench.render.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+from datetime import datetime, timezone
+
+SCENARIOS = ("lazy", "bytecode", "warmed")
+
+
+def child(scenario: str) -> None:
+    """Runs inside the fresh interpreter; prints one JSON line."""
+    import time
+
+    from app.bench.render import build_variant
+    from app.services.document_generator import DOC_TYPE_TEMPLATE, build_context, jinja_env, warm_templates
+
+    startup_ms = sum(warm_templates().values()) if scenario == "warmed" else 0.0
+    v = build_variant("base")
+    first, steady = {}, {}
+    for doc_type, template_file in DOC_TYPE_TEMPLATE.items():
+        context = build_context(v["deal"], v["tenant"], v["unit"], doc_type, 1, v["app_settings"], v["logo"], v["signature"])
+        for timings in (first, steady):
+            start = time.perf_counter()
+            jinja_env.get_template(template_file).render(**context)
+            timings[template_file] = (time.perf_counter() - start) * 1000
+    print(json.dumps({"startup_ms": startup_ms, "first_ms": first, "steady_ms": steady}))
+
+
+def _run(scenario: str, cache_dir: str) -> dict:
+    env = {**os.environ, "JINJA_BYTECODE_CACHE_DIR": "" if scenario == "lazy" else cache_dir}
+    out = subprocess.run([sys.executable, "-m", "app.bench.coldstart", "--child", scenario], env=env,
+                         capture_output=True, text=True, check=True).stdout
+    return json.loads(out.strip().splitlines()[-1])
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Measure first-render latency of document templates in a fresh worker.")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--output", help="Write JSON results here")
+    parser.add_argument("--child", choices=SCENARIOS, help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.child:
+        child(args.child)
+        return
+
+    results = {}
+    with tempfile.TemporaryDirectory(prefix="jinja-bench-") as cache_dir:
+        _run("bytecode", cache_dir)  # fill the bytecode cache once
+        for scenario in SCENARIOS:
+            runs = [_run(scenario, cache_dir) for _ in range(args.runs)]
+            templates = runs[0]["first_ms"].keys()
+            results[scenario] = {
+                "startup_ms": round(statistics.median(r["startup_ms"] for r in runs), 2),
+                "first_ms": {t: round(statistics.median(r["first_ms"][t] for r in runs), 2) for t in templates},
+                "steady_ms": {t: round(statistics.median(r["steady_ms"][t] for r in runs), 2) for t in templates},
+            }
+
+    templates = list(results["lazy"]["first_ms"])
+    print(f"Median of {args.runs} fresh processes, first render in ms (startup cost in the last row)")
+    print(f"{'template':<28}" + "".join(f"{s:>10}" for s in SCENARIOS) + f"{'steady':>10}")
+    for t in templates:
+        print(f"{t:<28}" + "".join(f"{results[s]['first_ms'][t]:>10.2f}" for s in SCENARIOS)
+              + f"{results['lazy']['steady_ms'][t]:>10.2f}")
+    print(f"{'startup (warm_templates)':<28}" + "".join(f"{results[s]['startup_ms']:>10.2f}" for s in SCENARIOS))
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"meta": {"at": datetime.now(timezone.utc).isoformat(), "runs": args.runs}, "results": results}, f, indent=2)
+        print(f"Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
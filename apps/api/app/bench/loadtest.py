@@ -0,0 +1,366 @@
+"""
+End-to-end load test replaying full deal journeys against a running API.
+
+Usage:
+    python -m app.bench.loadtest --base-url http://localhost:8000 --agents 20 --journeys 5
+    python -m app.bench.loadtest ... --save-baseline app/bench/baselines/loadtest.json
+    python -m app.bench.loadtest ... --baseline app/bench/baselines/loadtest.json --fail-on-regression
+
+Each virtual agent creates a unit and a tenant, then drives a deal from
+create through set price, every generate-document step, request-invoice,
+upload-invoice, move-in details and close, polling the dashboard, deal list
+and journey between actions like the web UI does. The report gives
+p50/p95/p99 per endpoint (by route template) and end-to-end journey time,
+and is written as JSON so runs can be compared against a saved baseline.
+
+--resend-port starts a local Resend stand-in so request-invoice exercises
+the real email path without sending mail. Start the API with
+``RESEND_API_KEY=loadtest RESEND_API_URL=http://<this-host>:<port>/emails``.
+"""
+import argparse
+import http.client
+import json
+import random
+import threading
+import time
+import uuid
+from collections import defaultdict
+from datetime import date, datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit
+
+from app.config import settings
+
+PERCENTILES = (50, 95, 99)
+
+
+# ── Local Resend stand-in ──
+
+class _ResendHandler(BaseHTTPRequestHandler):
+    latency = 0.0
+    received = 0
+    _lock = threading.Lock()
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        time.sleep(self.latency)
+        with self._lock:
+            type(self).received += 1
+        body = json.dumps({"id": str(uuid.uuid4())}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_resend_stub(port: int, latency_ms: float) -> ThreadingHTTPServer:
+    _ResendHandler.latency = latency_ms / 1000
+    server = ThreadingHTTPServer(("0.0.0.0", port), _ResendHandler)
+    threading.Thread(target=server.serve_forever, name="resend-stub", daemon=True).start()
+    return server
+
+
+# ── Measurements ──
+
+class Recorder:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.latencies: dict[str, list[float]] = defaultdict(list)
+        self.errors: dict[str, int] = defaultdict(int)
+        self.journeys: list[float] = []
+        self.failed_journeys = 0
+
+    def request(self, label: str, elapsed_ms: float, ok: bool) -> None:
+        with self._lock:
+            self.latencies[label].append(elapsed_ms)
+            if not ok:
+                self.errors[label] += 1
+
+    def journey(self, elapsed_ms: float | None) -> None:
+        with self._lock:
+            if elapsed_ms is None:
+                self.failed_journeys += 1
+            else:
+                self.journeys.append(elapsed_ms)
+
+
+def _summary(samples: list[float]) -> dict:
+    if not samples:
+        return {"count": 0}
+    ordered = sorted(samples)
+    result = {"count": len(ordered), "mean_ms": round(sum(ordered) / len(ordered), 2)}
+    for p in PERCENTILES:
+        # Nearest-rank percentile
+        result[f"p{p}_ms"] = round(ordered[max(0, -(-p * len(ordered) // 100) - 1)], 2)
+    result["max_ms"] = round(ordered[-1], 2)
+    return result
+
+
+# ── HTTP client ──
+
+class ApiError(Exception):
+    pass
+
+
+class Client:
+    """Keep-alive HTTP client for one agent; requests are timed under their route template label."""
+
+    def __init__(self, base_url: str, recorder: Recorder, timeout: float):
+        parts = urlsplit(base_url)
+        self.conn_cls = http.client.HTTPSConnection if parts.scheme == "https" else http.client.HTTPConnection
+        self.netloc = parts.netloc
+        self.prefix = parts.path.rstrip("/")
+        self.timeout = timeout
+        self.recorder = recorder
+        self.token: str | None = None
+        self.conn = None
+
+    def call(self, method: str, label: str, path: str, body: dict | None = None, files: dict | None = None):
+        headers = {"User-Agent": "NestApp-loadtest/1.0"}
+        if self.token:
+            headers["Authorization"] = f"Bearer {self.token}"
+        payload = None
+        if files:
+            boundary = uuid.uuid4().hex
+            headers["Content-Type"] = f"multipart/form-data; boundary={boundary}"
+            payload = b""
+            for field, (filename, content, content_type) in files.items():
+                payload += (
+                    f"--{boundary}\r\nContent-Disposition: form-data; name=\"{field}\"; filename=\"{filename}\"\r\n"
+                    f"Content-Type: {content_type}\r\n\r\n"
+                ).encode() + content + b"\r\n"
+            payload += f"--{boundary}--\r\n".encode()
+        elif body is not None:
+            headers["Content-Type"] = "application/json"
+            payload = json.dumps(body, default=str).encode()
+
+        start = time.perf_counter()
+        status, data = 0, b""
+        for attempt in range(2):
+            try:
+                if self.conn is None:
+                    self.conn = self.conn_cls(self.netloc, timeout=self.timeout)
+                self.conn.request(method, self.prefix + path, body=payload, headers=headers)
+                resp = self.conn.getresponse()
+                status, data = resp.status, resp.read()
+                break
+            except (http.client.HTTPException, OSError):
+                # Server closed the keep-alive connection; reconnect once
+                if self.conn:
+                    self.conn.close()
+                self.conn = None
+                if attempt:
+                    raise
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        ok = 200 <= status < 300
+        self.recorder.request(f"{method} {label}", elapsed_ms, ok)
+        if not ok:
+            raise ApiError(f"{method} {path} -> {status}: {data[:200]!r}")
+        return json.loads(data) if data else None
+
+
+# ── Virtual agent ──
+
+class Agent(threading.Thread):
+    def __init__(self, n: int, args, recorder: Recorder, run_id: str):
+        super().__init__(name=f"agent-{n}", daemon=True)
+        self.n = n
+        self.args = args
+        self.recorder = recorder
+        self.run_id = run_id
+        self.rng = random.Random(args.seed * 1000 + n)
+        self.client = Client(args.base_url, recorder, args.timeout)
+
+    def poll(self, deal_id: str) -> None:
+        """UI-like background reads between actions."""
+        for _ in range(self.args.polls_per_step):
+            choice = self.rng.random()
+            if choice < 0.4:
+                self.client.call("GET", "/deals/{deal_id}/journey", f"/deals/{deal_id}/journey")
+            elif choice < 0.7:
+                self.client.call("GET", "/dashboard", "/dashboard")
+            else:
+                self.client.call("GET", "/deals", "/deals?status=IN_PROGRESS")
+        if self.args.think_ms:
+            time.sleep(self.rng.uniform(0, self.args.think_ms) / 1000)
+
+    def journey(self, i: int) -> None:
+        c = self.client
+        unit = c.call("POST", "/units", "/units", {
+            "unit_code": f"LT{self.run_id}{self.n:03d}{i:04d}",
+            "daily_price": 500000, "monthly_price": 8000000, "six_month_price": 42000000, "twelve_month_price": 78000000,
+        })
+        tenant = c.call("POST", "/tenants", "/tenants", {
+            "full_name": f"Load Test {self.n}-{i}", "phone": "+6280000000", "email": f"lt{self.n}.{i}@example.com",
+        })
+        term_type = self.rng.choice(self.args.terms)
+        start_date = date.today() + timedelta(days=7)
+
+        started = time.perf_counter()
+        deal = c.call("POST", "/deals", "/deals", {
+            "tenant_id": tenant["id"], "unit_id": unit["id"], "term_type": term_type, "start_date": start_date,
+        })
+        deal_id = deal["id"]
+        price_set = move_in_set = False
+        for _ in range(30):
+            step = deal["current_step"]
+            self.poll(deal_id)
+            if step == "DEAL_CLOSED":
+                c.call("POST", "/deals/{deal_id}/actions/close", f"/deals/{deal_id}/actions/close")
+                self.recorder.journey((time.perf_counter() - started) * 1000)
+                return
+            if step in ("FINALIZE_LOO", "GENERATE_BOOKING_CONFIRMATION") and not price_set:
+                c.call("POST", "/deals/{deal_id}/actions/set-deal-price", f"/deals/{deal_id}/actions/set-deal-price",
+                       {"deal_price": float(deal["initial_price"]) * 0.95})
+                price_set = True
+            if step == "GENERATE_MOVE_IN" and not move_in_set:
+                c.call("POST", "/deals/{deal_id}/actions/set-move-in-details", f"/deals/{deal_id}/actions/set-move-in-details",
+                       {"move_in_date": start_date, "move_in_notes": "Load test move-in"})
+                move_in_set = True
+
+            if step == "REQUEST_INVOICE":
+                result = c.call("POST", "/deals/{deal_id}/actions/request-invoice", f"/deals/{deal_id}/actions/request-invoice")
+            elif step == "UPLOAD_INVOICE":
+                result = c.call("POST", "/deals/{deal_id}/actions/upload-invoice", f"/deals/{deal_id}/actions/upload-invoice",
+                                files={"file": ("invoice.pdf", b"%PDF-1.4\n%loadtest\n" + b"0" * self.args.upload_bytes, "application/pdf")})
+            else:
+                # Every other step is a document step (no DB-backed imports here, the harness runs outside the API)
+                result = c.call("POST", "/deals/{deal_id}/actions/generate-document", f"/deals/{deal_id}/actions/generate-document")
+            deal = result["deal"]
+        raise ApiError(f"Deal {deal_id} did not close")
+
+    def run(self):
+        try:
+            login = self.client.call("POST", "/auth/login", "/auth/login", {"username": self.args.username, "password": self.args.password})
+            self.client.token = login["access_token"]
+        except Exception as e:
+            print(f"  agent {self.n}: login failed: {e}")
+            return
+        for i in range(self.args.journeys):
+            try:
+                self.journey(i)
+            except Exception as e:
+                self.recorder.journey(None)
+                print(f"  agent {self.n} journey {i}: {e}")
+
+
+# ── Report ──
+
+def build_report(args, recorder: Recorder, wall_s: float) -> dict:
+    total = sum(len(v) for v in recorder.latencies.values())
+    return {
+        "meta": {
+            "at": datetime.now(timezone.utc).isoformat(),
+            "note": args.note,
+            "base_url": args.base_url,
+            "agents": args.agents,
+            "journeys_per_agent": args.journeys,
+            "terms": args.terms,
+            "polls_per_step": args.polls_per_step,
+            "seed": args.seed,
+            "wall_s": round(wall_s, 2),
+            "requests": total,
+            "requests_per_s": round(total / wall_s, 2) if wall_s else None,
+            "emails_received": _ResendHandler.received,
+        },
+        "journey": {**_summary(recorder.journeys), "failed": recorder.failed_journeys},
+        "endpoints": {
+            label: {**_summary(samples), "errors": recorder.errors.get(label, 0)}
+            for label, samples in sorted(recorder.latencies.items())
+        },
+    }
+
+
+def print_report(report: dict) -> None:
+    meta = report["meta"]
+    print(f"\n{meta['requests']} requests in {meta['wall_s']}s ({meta['requests_per_s']} req/s), "
+          f"{meta['agents']} agents")
+    header = f"{'endpoint':<58}{'count':>7}{'err':>5}" + "".join(f"{'p' + str(p):>10}" for p in PERCENTILES)
+    print(header)
+    print("-" * len(header))
+    rows = list(report["endpoints"].items()) + [("JOURNEY (end to end)", {**report["journey"], "errors": report["journey"]["failed"]})]
+    for label, s in rows:
+        if not s["count"]:
+            continue
+        print(f"{label:<58}{s['count']:>7}{s['errors']:>5}" + "".join(f"{s[f'p{p}_ms']:>10.1f}" for p in PERCENTILES))
+
+
+def compare(report: dict, baseline: dict, tolerance: float) -> list[str]:
+    """p95 regressions beyond ``tolerance`` (0.2 = 20% slower) per endpoint and for whole journeys."""
+    regressions = []
+    pairs = [("JOURNEY", report["journey"], baseline.get("journey", {}))]
+    pairs += [(label, s, baseline.get("endpoints", {}).get(label, {})) for label, s in report["endpoints"].items()]
+    meta = baseline.get("meta", {})
+    print(f"\nCompared with baseline from {meta.get('at', '?')} (p95):")
+    if meta.get("note"):
+        print(f"  baseline environment: {meta['note']}")
+    for label, current, base in pairs:
+        if not current.get("count") or not base.get("count"):
+            continue
+        delta = (current["p95_ms"] - base["p95_ms"]) / base["p95_ms"] if base["p95_ms"] else 0.0
+        flag = "  REGRESSION" if delta > tolerance else ""
+        print(f"  {label:<58}{base['p95_ms']:>10.1f} -> {current['p95_ms']:>10.1f}  ({delta:+.0%}){flag}")
+        if flag:
+            regressions.append(label)
+    return regressions
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Replay full deal journeys against a running API.")
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--agents", type=int, default=10, help="Concurrent virtual agents")
+    parser.add_argument("--journeys", type=int, default=3, help="Deal journeys per agent")
+    parser.add_argument("--terms", nargs="+", default=["MONTHLY", "DAILY", "SIX_MONTHS", "TWELVE_MONTHS"])
+    parser.add_argument("--polls-per-step", type=int, default=2, help="Dashboard/list/journey reads between actions")
+    parser.add_argument("--think-ms", type=float, default=0, help="Max random pause between actions")
+    parser.add_argument("--upload-bytes", type=int, default=200_000, help="Size of the uploaded invoice")
+    parser.add_argument("--username", default=settings.admin_user)
+    parser.add_argument("--password", default=settings.admin_password)
+    parser.add_argument("--timeout", type=float, default=60)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--resend-port", type=int, default=0, help="Start a local Resend stand-in on this port")
+    parser.add_argument("--resend-latency-ms", type=float, default=150)
+    parser.add_argument("--output", help="Write the JSON report here")
+    parser.add_argument("--baseline", help="Compare against this saved report")
+    parser.add_argument("--save-baseline", help="Save this run's report as the baseline")
+    parser.add_argument("--note", help="Where and how this ran (hardware, API settings); kept in the report")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed p95 slowdown vs baseline")
+    parser.add_argument("--fail-on-regression", action="store_true")
+    args = parser.parse_args(argv)
+
+    if args.resend_port:
+        start_resend_stub(args.resend_port, args.resend_latency_ms)
+        print(f"Resend stand-in on :{args.resend_port} "
+              f"(start the API with RESEND_API_KEY=loadtest RESEND_API_URL=http://<host>:{args.resend_port}/emails)")
+
+    recorder = Recorder()
+    run_id = uuid.uuid4().hex[:4].upper()
+    agents = [Agent(n, args, recorder, run_id) for n in range(args.agents)]
+    print(f"Running {args.agents} agents x {args.journeys} journeys against {args.base_url} (run {run_id})")
+    started = time.perf_counter()
+    for agent in agents:
+        agent.start()
+    for agent in agents:
+        agent.join()
+
+    report = build_report(args, recorder, time.perf_counter() - started)
+    print_report(report)
+
+    for path in filter(None, (args.output, args.save_baseline)):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"Report written to {path}")
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            regressions = compare(report, json.load(f), args.tolerance)
+        if regressions and args.fail_on_regression:
+            raise SystemExit(f"{len(regressions)} p95 regression(s) beyond {args.tolerance:.0%}")
+
+
+if __name__ == "__main__":
+    main()
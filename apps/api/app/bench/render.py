@@ -0,0 +1,268 @@
+"""
+Document rendering benchmark across every template.
+
+Usage:
+    python -m app.bench.render [--iterations 5] [--variants base image_heavy long_notes]
+                               [--inline-css] [--output results.json] [--compare previous.json]
+
+Renders each DOC_TYPE_TEMPLATE (plus document_base.html) with the same
+context builder the generator uses and times the phases separately:
+
+- ``jinja``   template.render
+- ``layout``  WeasyPrint HTML parse + layout, with the pre-parsed shared
+              print stylesheet exactly as pdf_renderer uses it
+- ``write``   PDF serialisation (document.write_pdf())
+
+Timings are the median/min/max of --iterations runs after one warm-up run.
+Peak Python memory per phase comes from a separate tracemalloc run, so
+tracing overhead never skews the timings; WeasyPrint's native allocations
+(Pango, Cairo, image decoding) are only visible in the process max RSS.
+
+Variants:
+- ``base``        realistic deal, the company logo from initial_asset (or a small PNG)
+- ``image_heavy`` multi-megabyte incompressible logo and signature images
+- ``normalized``  the image_heavy images after upload normalization (services/image_assets.py)
+- ``long_notes``  long company address, company name and 400 lines of move-in notes
+
+Comparing ``image_heavy`` with ``normalized`` shows what normalization saves
+in HTML size, PDF size and render time.
+
+--inline-css measures the previous behaviour instead: the shared print
+styles stay inline and are parsed, with a new font configuration, on every
+render. Run once with it and once without, then --compare, to see what the
+shared stylesheet saves.
+
+Results are JSON (with the git commit) so runs can be compared across commits.
+"""
+import argparse
+import base64
+import json
+import os
+import platform
+import random
+import resource
+import statistics
+import struct
+import subprocess
+import time
+import tracemalloc
+import zlib
+from datetime import date, datetime, timezone
+from decimal import Decimal
+from functools import lru_cache
+from types import SimpleNamespace
+
+from app.config import settings
+from app.services import image_assets, pdf_renderer
+from app.services.document_generator import DOC_TYPE_TEMPLATE, build_context, jinja_env
+from app.services.pdf_renderer import WEASYPRINT_AVAILABLE
+
+if WEASYPRINT_AVAILABLE:
+    import weasyprint
+    from weasyprint import HTML as WeasyHTML
+
+VARIANTS = ("base", "image_heavy", "normalized", "long_notes")
+
+
+@lru_cache(maxsize=None)
+def _png(width: int, height: int, seed: int) -> bytes:
+    """An RGB PNG of random pixels (incompressible, so its size is close to the raw bitmap)."""
+    rng = random.Random(seed)
+    raw = b"".join(b"\x00" + rng.randbytes(width * 3) for _ in range(height))
+
+    def chunk(kind: bytes, data: bytes) -> bytes:
+        return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data) & 0xFFFFFFFF)
+
+    return (b"\x89PNG\r\n\x1a\n" + chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0))
+            + chunk(b"IDAT", zlib.compress(raw, 1)) + chunk(b"IEND", b""))
+
+
+def _data_uri(data: bytes, mime: str) -> str:
+    return f"data:{mime};base64,{base64.b64encode(data).decode()}"
+
+
+def _company_logo() -> str:
+    path = os.path.join(settings.initial_asset_path, "NEST LOGO.webp")
+    if os.path.exists(path):
+        with open(path, "rb") as f:
+            return _data_uri(f.read(), "image/webp")
+    return _data_uri(_png(240, 80, 1), "image/png")
+
+
+def build_variant(variant: str) -> dict:
+    """Plain-object stand-ins for the deal, tenant, unit and settings, plus image data URIs."""
+    tenant = SimpleNamespace(full_name="Budi Santoso", phone="+6281234567890", email="budi.santoso@example.com",
+                             company_name="PT Maju Jaya")
+    unit = SimpleNamespace(unit_code="1203", unit_type="Deluxe")
+    deal = SimpleNamespace(
+        deal_code="NEST-01234", term_type="TWELVE_MONTHS", start_date=date(2025, 3, 1), end_date=date(2026, 2, 28),
+        initial_price=Decimal("78000000"), deal_price=Decimal("74000000"), currency="IDR",
+        move_in_date=date(2025, 3, 1), move_in_notes="2 key cards\nParking sticker B-12\nWi-Fi credentials handed over",
+    )
+    app_settings = SimpleNamespace(
+        company_legal_name="NEST Serviced Apartment", company_address="Jl. Jend. Sudirman Kav. 52-53, Jakarta 12190",
+        signatory_name="Management", signatory_title="General Manager",
+    )
+    logo, signature = _company_logo(), _data_uri(_png(300, 120, 2), "image/png")
+
+    if variant in ("image_heavy", "normalized"):
+        logo_png, signature_png = _png(1600, 1200, 3), _png(1200, 600, 4)
+        logo, signature = _data_uri(logo_png, "image/png"), _data_uri(signature_png, "image/png")
+        if variant == "normalized":
+            normalized = [image_assets.normalize_image(data) for data in (logo_png, signature_png)]
+            if all(normalized):
+                (logo_data, logo_ext), (sig_data, sig_ext) = normalized
+                logo = _data_uri(logo_data, "image/png" if logo_ext == "png" else "image/jpeg")
+                signature = _data_uri(sig_data, "image/png" if sig_ext == "png" else "image/jpeg")
+    elif variant == "long_notes":
+        tenant.company_name = "PT " + " ".join(["Nusantara Digital Infrastruktur Global"] * 4)
+        app_settings.company_address = ", ".join(f"Tower {c}, Floor {n}" for n, c in enumerate("ABCDEFGHIJ", 10))
+        deal.move_in_notes = "\n".join(
+            f"Item {i}: inventory checked, condition noted as good with minor wear on the surface finish" for i in range(400)
+        )
+    return {"deal": deal, "tenant": tenant, "unit": unit, "app_settings": app_settings, "logo": logo, "signature": signature}
+
+
+def _timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return result, (time.perf_counter() - start) * 1000
+
+
+def _peak_kib(fn) -> tuple[object, float]:
+    tracemalloc.start()
+    try:
+        result = fn()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return result, round(peak / 1024, 1)
+
+
+def _stats(samples: list[float]) -> dict:
+    return {"median_ms": round(statistics.median(samples), 2), "min_ms": round(min(samples), 2), "max_ms": round(max(samples), 2)}
+
+
+def bench_one(doc_type: str, template_file: str, variant: str, iterations: int, inline_css: bool = False) -> dict:
+    v = build_variant(variant)
+    context = build_context(v["deal"], v["tenant"], v["unit"], doc_type, 1, v["app_settings"], v["logo"], v["signature"])
+    template = jinja_env.get_template(template_file)
+
+    def jinja():
+        return template.render(**context)
+
+    def layout(html):
+        if inline_css:
+            return WeasyHTML(string=html).render()
+        document, options = pdf_renderer.weasy_document(html)
+        return document.render(**options)
+
+    timings = {"jinja": [], "layout": [], "write": []}
+    html = pdf = document = None
+    for i in range(iterations + 1):
+        html, jinja_ms = _timed(jinja)
+        if WEASYPRINT_AVAILABLE:
+            document, layout_ms = _timed(lambda: layout(html))
+            pdf, write_ms = _timed(document.write_pdf)
+        if i == 0:
+            continue  # warm-up: template compile, font discovery
+        timings["jinja"].append(jinja_ms)
+        if WEASYPRINT_AVAILABLE:
+            timings["layout"].append(layout_ms)
+            timings["write"].append(write_ms)
+
+    _, jinja_peak = _peak_kib(jinja)
+    result = {
+        "doc_type": doc_type,
+        "template": template_file,
+        "variant": variant,
+        "css": "inline" if inline_css else "shared",
+        "html_bytes": len(html.encode("utf-8")),
+        "jinja": {**_stats(timings["jinja"]), "peak_kib": jinja_peak},
+    }
+    if WEASYPRINT_AVAILABLE:
+        document, layout_peak = _peak_kib(lambda: layout(html))
+        _, write_peak = _peak_kib(document.write_pdf)
+        result.update({
+            "layout": {**_stats(timings["layout"]), "peak_kib": layout_peak},
+            "write": {**_stats(timings["write"]), "peak_kib": write_peak},
+            "pages": len(document.pages),
+            "pdf_bytes": len(pdf),
+            "total_median_ms": round(sum(statistics.median(timings[k]) for k in timings), 2),
+        })
+    else:
+        result["total_median_ms"] = result["jinja"]["median_ms"]
+    return result
+
+
+def _git_commit() -> str | None:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True,
+                              cwd=os.path.dirname(__file__)).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results: list[dict], baseline: dict) -> None:
+    previous = {(r["template"], r["variant"]): r for r in baseline.get("results", [])}
+    print(f"\nCompared with {baseline.get('meta', {}).get('git_commit') or '?'} (total median):")
+    for r in results:
+        old = previous.get((r["template"], r["variant"]))
+        if not old:
+            continue
+        delta = (r["total_median_ms"] - old["total_median_ms"]) / old["total_median_ms"] if old["total_median_ms"] else 0.0
+        print(f"  {r['template']:<28}{r['variant']:<13}{old['total_median_ms']:>10.1f} -> {r['total_median_ms']:>10.1f}  ({delta:+.0%})")
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Benchmark Jinja and WeasyPrint rendering of every document template.")
+    parser.add_argument("--iterations", type=int, default=5)
+    parser.add_argument("--variants", nargs="+", choices=VARIANTS, default=list(VARIANTS))
+    parser.add_argument("--templates", nargs="+", help="Only these template files")
+    parser.add_argument("--inline-css", action="store_true", help="Parse the shared print styles on every render (old behaviour)")
+    parser.add_argument("--output", help="Write JSON results here")
+    parser.add_argument("--compare", help="Previous JSON results to compare against")
+    args = parser.parse_args(argv)
+
+    targets = list(DOC_TYPE_TEMPLATE.items()) + [("GENERIC", "document_base.html")]
+    if args.templates:
+        targets = [(d, t) for d, t in targets if t in args.templates]
+    if not WEASYPRINT_AVAILABLE:
+        print("WeasyPrint is not installed: measuring the Jinja phase only.")
+    if "normalized" in args.variants and not image_assets.PILLOW_AVAILABLE:
+        print("Pillow is not installed: the normalized variant uses the original images.")
+
+    results = []
+    print(f"{'template':<28}{'variant':<13}{'jinja':>9}{'layout':>9}{'write':>9}{'pages':>6}{'pdf KiB':>9}{'peak KiB':>10}")
+    for doc_type, template_file in targets:
+        for variant in args.variants:
+            r = bench_one(doc_type, template_file, variant, args.iterations, args.inline_css)
+            results.append(r)
+            peak = max(r[phase]["peak_kib"] for phase in ("jinja", "layout", "write") if phase in r)
+            print(f"{template_file:<28}{variant:<13}{r['jinja']['median_ms']:>9.1f}"
+                  f"{r.get('layout', {}).get('median_ms', 0):>9.1f}{r.get('write', {}).get('median_ms', 0):>9.1f}"
+                  f"{r.get('pages', 0):>6}{r.get('pdf_bytes', 0) / 1024:>9.1f}{peak:>10.1f}")
+
+    report = {
+        "meta": {
+            "at": datetime.now(timezone.utc).isoformat(),
+            "git_commit": _git_commit(),
+            "python": platform.python_version(),
+            "weasyprint": weasyprint.__version__ if WEASYPRINT_AVAILABLE else None,
+            "iterations": args.iterations,
+            # ru_maxrss is KiB on Linux
+            "max_rss_kib": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+        },
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"Results written to {args.output}")
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            compare(results, json.load(f))
+
+
+if __name__ == "__main__":
+    main()
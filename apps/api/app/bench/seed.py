@@ -0,0 +1,394 @@
+"""
+Synthetic large-dataset generator for load and scale testing.
+
+Usage: python -m app.bench.seed [--scale 0.01] [--seed 42] [--units 2000] ...
+
+Generates units, tenants, deals spread across every journey step (plus
+cancelled ones), their documents with versions, invoice attachments and
+audit logs. Output is deterministic for a given --seed and --prefix: ids,
+codes, names and timestamps all come from one seeded RNG and a fixed base
+date. Rows go in with COPY on PostgreSQL and with executemany inserts in
+large batches elsewhere; ORM objects are never built.
+
+Row file paths point at storage locations that do not exist unless
+--with-files is given, which stores a small placeholder for each one through
+the storage backend (the local volume or the S3 bucket).
+"""
+import argparse
+import io
+import json
+import random
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timedelta, timezone
+from decimal import Decimal
+
+from sqlalchemy import Table, select
+
+from app.database import Base, engine
+from app.models import AuditLog, Deal, Document, DocumentVersion, FinanceAttachment, Tenant, Unit
+from app.services.deal_actions import TERM_PRICE_MAP
+from app.services.journey import DAILY_JOURNEY_STEPS, MONTHLY_JOURNEY_STEPS, STEP_DOCUMENT_MAP
+from app.services.document_generator import DOC_TYPE_DISPLAY_NAME
+from app.services.storage import get_storage
+
+BASE_DATE = datetime(2024, 1, 1, tzinfo=timezone.utc)
+SPAN_DAYS = 730
+
+DEFAULTS = {"units": 2_000, "tenants": 200_000, "deals": 500_000, "audit_logs": 3_000_000}
+
+FIRST_NAMES = ["Adi", "Budi", "Citra", "Dewi", "Eko", "Fitri", "Gita", "Hadi", "Indah", "Joko", "Kartika", "Lina",
+               "Made", "Nina", "Oka", "Putri", "Rizky", "Sari", "Tono", "Wati", "James", "Mei", "Arjun", "Yuki"]
+LAST_NAMES = ["Santoso", "Wijaya", "Pratama", "Halim", "Kusuma", "Hartono", "Gunawan", "Siregar", "Nasution",
+              "Lubis", "Tan", "Lim", "Smith", "Sharma", "Tanaka", "Nguyen"]
+COMPANIES = [None, None, "Acme Corp", "PT Maju Jaya", "PT Sinar Abadi", "Globex", "Initech", "PT Nusantara Digital"]
+UNIT_TYPES = ["Studio", "Standard", "Deluxe", "Suite", "Penthouse"]
+TERM_TYPES = list(TERM_PRICE_MAP)
+CHANNELS = ["WEB", "WEB", "WEB", "WHATSAPP"]
+AUDIT_ACTIONS = ["PROGRESS_DEAL", "GENERATE_DOCUMENT", "UPDATE_DEAL", "SET_DEAL_PRICE", "REQUEST_INVOICE",
+                 "UPLOAD_INVOICE", "SET_MOVE_IN_DETAILS", "EMERGENCY_OVERRIDE"]
+CANCEL_RATE = 0.08
+
+
+class Generator:
+    def __init__(self, seed: int, prefix: str):
+        # The prefix is part of the seed, so another --prefix gives new ids, not the same ones
+        self.rng = random.Random(f"{prefix}:{seed}")
+        self.prefix = prefix
+
+    def uuid(self) -> str:
+        return str(uuid.UUID(int=self.rng.getrandbits(128), version=4))
+
+    def moment(self, after: datetime = BASE_DATE, within_days: int = SPAN_DAYS) -> datetime:
+        return after + timedelta(seconds=self.rng.randrange(within_days * 86_400))
+
+    def name(self) -> str:
+        return f"{self.rng.choice(FIRST_NAMES)} {self.rng.choice(LAST_NAMES)}"
+
+
+# ── Bulk writers ──
+
+def _copy_value(value) -> str:
+    if value is None:
+        return "\\N"
+    if isinstance(value, bool):
+        return "t" if value else "f"
+    if isinstance(value, dict):
+        value = json.dumps(value)
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return str(value).replace("\\", "\\\\").replace("\t", "\\t").replace("\n", "\\n").replace("\r", "\\r")
+
+
+class BulkWriter:
+    """Buffers rows for one table and flushes them with COPY (PostgreSQL) or executemany."""
+
+    def __init__(self, conn, table: Table, batch_size: int, parents: tuple["BulkWriter", ...] = ()):
+        self.conn = conn
+        # Flushed first so foreign keys hold at every flush
+        self.parents = parents
+        self.table = table
+        self.columns = [c.name for c in table.columns]
+        self.batch_size = batch_size
+        self.rows: list[dict] = []
+        self.written = 0
+        self.use_copy = conn.dialect.name == "postgresql"
+
+    def add(self, row: dict) -> None:
+        self.rows.append(row)
+        if len(self.rows) >= self.batch_size:
+            self.flush()
+
+    def flush(self) -> None:
+        if not self.rows:
+            return
+        for parent in self.parents:
+            parent.flush()
+        if self.use_copy:
+            buf = io.StringIO()
+            for row in self.rows:
+                buf.write("\t".join(_copy_value(row.get(c)) for c in self.columns))
+                buf.write("\n")
+            buf.seek(0)
+            cursor = self.conn.connection.cursor()
+            try:
+                cursor.copy_expert(f"COPY {self.table.name} ({', '.join(self.columns)}) FROM STDIN", buf)
+            finally:
+                cursor.close()
+        else:
+            self.conn.execute(self.table.insert(), [{c: row.get(c) for c in self.columns} for row in self.rows])
+        self.written += len(self.rows)
+        self.rows = []
+
+
+class PlaceholderWriter:
+    """Stores placeholder files through the storage backend, several at a time (S3 puts are round trips)."""
+
+    def __init__(self, workers: int = 16, max_pending: int = 1000):
+        self.pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="bench-files")
+        self.max_pending = max_pending
+        self.pending = []
+
+    def put(self, rel_path: str, content: bytes) -> None:
+        self.pending.append(self.pool.submit(get_storage().put, rel_path, content))
+        if len(self.pending) >= self.max_pending:
+            self.flush()
+
+    def flush(self) -> None:
+        for future in self.pending:
+            future.result()
+        self.pending = []
+
+    def close(self) -> None:
+        self.flush()
+        self.pool.shutdown()
+
+
+# ── Generators ──
+
+def gen_units(g: Generator, count: int) -> list[dict]:
+    units = []
+    for n in range(1, count + 1):
+        monthly = Decimal(g.rng.randrange(60, 400) * 100_000)
+        units.append({
+            "id": g.uuid(),
+            "unit_code": f"{g.prefix}-{n:05d}",
+            "unit_type": g.rng.choice(UNIT_TYPES),
+            "status": "AVAILABLE",
+            "notes": None,
+            "daily_price": (monthly / 20).quantize(Decimal("1")),
+            "monthly_price": monthly,
+            "six_month_price": monthly * Decimal("5.5"),
+            "twelve_month_price": monthly * Decimal("10"),
+            "currency": "IDR",
+            "created_at": BASE_DATE,
+            "updated_at": BASE_DATE,
+        })
+    return units
+
+
+def gen_tenants(g: Generator, count: int, out: BulkWriter) -> list[str]:
+    ids = []
+    for n in range(1, count + 1):
+        name = g.name()
+        created = g.moment()
+        row = {
+            "id": g.uuid(),
+            "full_name": name,
+            "phone": f"+628{g.rng.randrange(10**9, 10**10)}",
+            "email": f"{name.lower().replace(' ', '.')}.{n}@example.com",
+            "company_name": g.rng.choice(COMPANIES),
+            "notes": None,
+            "is_archived": g.rng.random() < 0.02,
+            "created_at": created,
+            "updated_at": created,
+        }
+        out.add(row)
+        ids.append(row["id"])
+    return ids
+
+
+def gen_deals(g: Generator, args, units: list[dict], tenant_ids: list[str], writers: dict, files: PlaceholderWriter | None) -> list[tuple[str, datetime]]:
+    """Deals at every journey step, with the documents, attachments and audit trail that step implies."""
+    deals = []
+    for n in range(1, args.deals + 1):
+        unit = g.rng.choice(units)
+        term_type = g.rng.choice(TERM_TYPES)
+        steps = DAILY_JOURNEY_STEPS if term_type == "DAILY" else MONTHLY_JOURNEY_STEPS
+        step_idx = g.rng.randrange(1, len(steps))
+        current_step = steps[step_idx]
+        cancelled = current_step != "DEAL_CLOSED" and g.rng.random() < CANCEL_RATE
+        created = g.moment()
+        channel = g.rng.choice(CHANNELS)
+        executor = "CLAWDBOT" if channel == "WHATSAPP" else "WEB"
+        price = unit[TERM_PRICE_MAP[term_type]]
+        start = (created + timedelta(days=g.rng.randrange(3, 45))).date()
+
+        if cancelled:
+            status = "CANCELLED"
+        elif current_step == "DEAL_CLOSED":
+            status = "COMPLETED"
+        elif current_step == "UPLOAD_INVOICE":
+            status = "INVOICE_REQUESTED"
+        else:
+            status = "IN_PROGRESS"
+
+        if status in ("IN_PROGRESS", "INVOICE_REQUESTED"):
+            unit["status"] = "RESERVED"
+        elif status == "COMPLETED":
+            unit["status"] = "OCCUPIED"
+
+        deal_id = g.uuid()
+        past_invoice_request = step_idx > steps.index("REQUEST_INVOICE")
+        past_move_in = "GENERATE_MOVE_IN" in steps and step_idx > steps.index("GENERATE_MOVE_IN")
+        writers["deals"].add({
+            "id": deal_id,
+            "deal_code": f"{g.prefix}-{n:07d}",
+            "tenant_id": g.rng.choice(tenant_ids),
+            "unit_id": unit["id"],
+            "term_type": term_type,
+            "start_date": start,
+            "end_date": start + timedelta(days={"DAILY": 7, "MONTHLY": 30, "SIX_MONTHS": 182, "TWELVE_MONTHS": 365}[term_type]),
+            "initial_price": price,
+            "deal_price": price * Decimal("0.95") if g.rng.random() < 0.3 else None,
+            "currency": "IDR",
+            "status": status,
+            "current_step": current_step,
+            "blocked_reason": None,
+            "invoice_requested_at": created + timedelta(days=2) if past_invoice_request else None,
+            "cancelled_at": created + timedelta(days=3) if cancelled else None,
+            "cancellation_reason": "Tenant withdrew" if cancelled else None,
+            "move_in_date": start if past_move_in else None,
+            "move_in_notes": "Keys handed over at lobby." if past_move_in else None,
+            "created_at": created,
+            "updated_at": created,
+        })
+        writers["audit_logs"].add(_audit_row(g, deal_id, "CREATE_DEAL", f"Created deal {g.prefix}-{n:07d}", channel, executor, created))
+
+        # Documents for every document step already passed (or the current one, when generated)
+        for idx, step in enumerate(steps[: step_idx + 1]):
+            doc_type = STEP_DOCUMENT_MAP.get(step)
+            if not doc_type or (idx == step_idx and g.rng.random() < 0.5):
+                continue
+            versions = 1 + (g.rng.random() < 0.25) + (g.rng.random() < 0.05)
+            doc_id = g.uuid()
+            writers["documents"].add({"id": doc_id, "deal_id": deal_id, "doc_type": doc_type, "latest_version": versions, "created_at": created})
+            for v in range(1, versions + 1):
+                base = f"documents/{deal_id}/{DOC_TYPE_DISPLAY_NAME[doc_type]}_Bench_{unit['unit_code']}_{created:%Y-%m-%d}_v{v}"
+                generated = created + timedelta(hours=idx * 6 + v)
+                writers["document_versions"].add({
+                    "id": g.uuid(),
+                    "document_id": doc_id,
+                    "version_no": v,
+                    "html_path": f"{base}.html",
+                    "pdf_path": f"{base}.pdf",
+                    "pdf_status": "READY",
+                    "signatory_name": "Management",
+                    "signatory_title": "General Manager",
+                    "channel": channel,
+                    "is_latest": v == versions,
+                    "generated_at": generated,
+                })
+                writers["audit_logs"].add(_audit_row(g, deal_id, "GENERATE_DOCUMENT", f"Generated {doc_type} v{v}", channel, executor, generated))
+                if files:
+                    files.put(f"{base}.html", b"<html><body>bench</body></html>")
+                    files.put(f"{base}.pdf", b"%PDF-1.4\n%bench\n")
+
+        if step_idx > steps.index("UPLOAD_INVOICE"):
+            file_path = f"finance/{deal_id}/invoice_{g.rng.getrandbits(32):08x}.pdf"
+            writers["finance_attachments"].add({
+                "id": g.uuid(),
+                "deal_id": deal_id,
+                "attachment_type": "INVOICE",
+                "file_name": f"INV-{n:07d}.pdf",
+                "file_path": file_path,
+                "channel": channel,
+                "uploaded_at": created + timedelta(days=4),
+            })
+            if files:
+                files.put(file_path, b"%PDF-1.4\n%bench invoice\n")
+
+        deals.append((deal_id, created))
+        if n % 50_000 == 0:
+            print(f"  {n:,} deals")
+    return deals
+
+
+def _audit_row(g: Generator, deal_id: str | None, action: str, summary: str, channel: str, executor: str, at: datetime) -> dict:
+    return {
+        "id": g.uuid(),
+        "deal_id": deal_id,
+        "actor": "ADMIN",
+        "channel": channel,
+        "executor": executor,
+        "action": action,
+        "summary": summary,
+        "metadata": None,
+        "created_at": at,
+    }
+
+
+def gen_audit_logs(g: Generator, count: int, deals: list[tuple[str, datetime]], out: BulkWriter) -> None:
+    """Top up the audit trail with background activity until it reaches ``count`` rows."""
+    remaining = count - out.written - len(out.rows)
+    for n in range(max(0, remaining)):
+        deal_id, created = g.rng.choice(deals) if deals else (None, BASE_DATE)
+        channel = g.rng.choice(CHANNELS)
+        action = g.rng.choice(AUDIT_ACTIONS)
+        out.add(_audit_row(
+            g, deal_id, action, f"{action.replace('_', ' ').capitalize()} (bench)",
+            channel, "CLAWDBOT" if channel == "WHATSAPP" else "WEB",
+            g.moment(created, 60),
+        ))
+        if (n + 1) % 500_000 == 0:
+            print(f"  {n + 1:,} extra audit logs")
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Generate a large synthetic dataset for load testing.")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--prefix", default="BENCH", help="Prefix for unit and deal codes (must be unused)")
+    parser.add_argument("--scale", type=float, default=1.0, help="Multiply every default volume, e.g. 0.01 for a quick run")
+    for name, default in DEFAULTS.items():
+        parser.add_argument(f"--{name.replace('_', '-')}", type=int, default=None, help=f"default {default:,} x scale")
+    parser.add_argument("--batch-size", type=int, default=20_000)
+    parser.add_argument("--with-files", action="store_true", help="Write placeholder files for every stored path")
+    args = parser.parse_args(argv)
+    for name, default in DEFAULTS.items():
+        if getattr(args, name) is None:
+            setattr(args, name, max(1, int(default * args.scale)))
+
+    Base.metadata.create_all(bind=engine)
+    g = Generator(args.seed, args.prefix)
+    started = time.perf_counter()
+    print(f"Seeding {args.units:,} units, {args.tenants:,} tenants, {args.deals:,} deals, "
+          f"{args.audit_logs:,} audit logs (seed={args.seed}, prefix={args.prefix})")
+
+    with engine.begin() as conn:
+        taken = conn.execute(select(Unit.unit_code).where(Unit.unit_code.like(f"{args.prefix}-%")).limit(1)).first()
+        if taken:
+            raise SystemExit(f"Prefix {args.prefix} already used (unit {taken[0]}); pick another --prefix.")
+
+        tables = {
+            "units": Unit.__table__, "tenants": Tenant.__table__, "deals": Deal.__table__,
+            "documents": Document.__table__, "document_versions": DocumentVersion.__table__,
+            "finance_attachments": FinanceAttachment.__table__, "audit_logs": AuditLog.__table__,
+        }
+        writers = {}
+        for name, parents in [
+            ("units", ()), ("tenants", ()), ("deals", ("units", "tenants")), ("documents", ("deals",)),
+            ("document_versions", ("documents",)), ("finance_attachments", ("deals",)), ("audit_logs", ()),
+        ]:
+            writers[name] = BulkWriter(conn, tables[name], args.batch_size, tuple(writers[p] for p in parents))
+
+        units = gen_units(g, args.units)
+        for row in units:
+            writers["units"].add(row)
+        tenant_ids = gen_tenants(g, args.tenants, writers["tenants"])
+        print(f"  {len(tenant_ids):,} tenants")
+
+        files = PlaceholderWriter() if args.with_files else None
+        try:
+            deals = gen_deals(g, args, units, tenant_ids, writers, files)
+        finally:
+            if files:
+                files.close()
+        gen_audit_logs(g, args.audit_logs, deals, writers["audit_logs"])
+        for writer in writers.values():
+            writer.flush()
+
+        # Unit rows were written before their deals; mark the ones deals reserved or occupied
+
+        for status in ("RESERVED", "OCCUPIED"):
+            ids = [u["id"] for u in units if u["status"] == status]
+            for i in range(0, len(ids), 1000):
+                conn.execute(Unit.__table__.update().where(Unit.id.in_(ids[i:i + 1000])).values(status=status))
+
+    elapsed = time.perf_counter() - started
+    print("\n".join(f"  {name}: {w.written:,} rows" for name, w in writers.items()))
+    print(f"Bench seed completed in {elapsed:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -2,16 +2,98 @@ from pydantic_settings import BaseSettings
 
 
 class Settings(BaseSettings):
+    # development silences the startup warnings about settings left open for production
+    environment: str = "production"
     database_url: str = "postgresql://nestapp:nestapp_dev_password@db:5432/nestapp"
+    # Serve the read-heavy async routers through asyncpg instead of the threadpool
+    database_async: bool = False
+    # Optional read replica for read-only routes; clients read from the primary
+    # for this many seconds after their own writes
+    database_replica_url: str = ""
+    database_replica_sticky_seconds: float = 5.0
+    # Connection pool (per engine, per worker process)
+    db_pool_size: int = 5
+    db_max_overflow: int = 10
+    db_pool_timeout: int = 30
+    db_pool_recycle: int = 1800
+    db_pool_pre_ping: str = "always"  # always | idle | never
+    db_pool_pre_ping_idle_seconds: int = 60
+    db_slow_checkout_ms: float = 100.0
+    # Flag a request when one statement repeats this often (likely N+1)
+    db_duplicate_query_threshold: int = 3
+    # Slow-query log: ring buffer + rotating NDJSON file, EXPLAIN ANALYZE on Postgres
+    db_slow_query_ms: float = 200.0
+    db_slow_query_buffer_size: int = 200
+    db_slow_query_log: str = "logs/slow_queries.ndjson"
+    db_slow_query_log_max_bytes: int = 10_485_760
+    db_slow_query_log_backups: int = 5
+    db_slow_query_explain: bool = True
+    db_slow_query_explain_interval: int = 300
+    # Record bound values (tenant names, phones, emails) instead of just their types
+    db_slow_query_log_parameters: bool = False
+    # Bearer token Prometheus must send to scrape /metrics (empty = open, warned at startup);
+    # also accepted in place of a user JWT by the /metrics/* JSON diagnostics
+    metrics_token: str = ""
+    # Sampling interval of the ?profile=1 request profiler
+    profile_interval_ms: float = 5.0
+    # AppSettings snapshot cache: max age, and how often workers check the shared stamp file
+    app_settings_cache_ttl: float = 300.0
+    app_settings_cache_check_seconds: float = 1.0
+    # Compiled document templates persist here across restarts (empty = off)
+    jinja_bytecode_cache_dir: str = ".cache/jinja"
+    # Re-check template files on every render (dev); otherwise edits need a restart
+    templates_auto_reload: bool = False
+    # eager: render the PDF when a document is generated; lazy: on first download
+    pdf_render_mode: str = "eager"
+    # Lazy mode still renders these doc types (comma-separated) in the background
+    pdf_prerender_doc_types: str = ""
+    pdf_prerender_workers: int = 1
+    # Bulk document regeneration: deals rendered in parallel, deals per checkpoint,
+    # pause between deals, and when a silent RUNNING job counts as interrupted
+    regen_workers: int = 2
+    regen_batch_size: int = 20
+    regen_throttle_ms: float = 200.0
+    regen_lease_seconds: int = 300
+    # Resolution of the render-ready logo/signature variants made at upload
+    image_render_dpi: int = 300
+    # Generated HTML on disk: gzip (stored as .html.gz) or none
+    html_storage_compression: str = "gzip"
+    html_gzip_level: int = 6
+    # Documents of deals completed or cancelled this many days ago get packed into one archive per deal
+    document_archive_after_days: int = 90
     api_secret_key: str = "change-me-in-production"
     storage_root: str = "/app/storage"
+    # local: files under storage_root; s3: an S3-compatible bucket (needs boto3)
+    storage_backend: str = "local"
+    storage_s3_bucket: str = ""
+    storage_s3_prefix: str = ""
+    # e.g. http://minio:9000; empty = AWS
+    storage_s3_endpoint_url: str = ""
+    storage_s3_region: str = "us-east-1"
+    # Empty = the default AWS credential chain (env, profile, instance role)
+    storage_s3_access_key: str = ""
+    storage_s3_secret_key: str = ""
+    storage_s3_multipart_threshold_mb: int = 8
+    storage_s3_multipart_chunk_mb: int = 8
+    # Redirect downloads to presigned URLs instead of streaming them through the API
+    storage_s3_presigned_reads: bool = False
+    storage_presign_seconds: int = 300
     openclaw_service_token: str = "dev-bot-token-change-in-prod"
     resend_api_key: str = "stub"
+    # Point at a local stand-in for load tests (see app.bench.loadtest)
+    resend_api_url: str = "https://api.resend.com/emails"
     email_from: str = "onboarding@resend.dev"
     finance_email: str = "finance@example.com"
     initial_asset_path: str = "/app/initial_asset"
     admin_user: str = "adminnest"
     admin_password: str = "@adm1nNest!!"
+    # Bot webhook accept-and-queue mode
+    webhook_worker_count: int = 2
+    webhook_poll_interval: float = 1.0
+    webhook_max_attempts: int = 3
+    webhook_lease_seconds: int = 300
+    webhook_callback_url: str = "stub"
+    webhook_batch_concurrency: int = 4
 
     model_config = {"env_file": ".env", "extra": "ignore"}
 
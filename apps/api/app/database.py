@@ -1,15 +1,96 @@
+from typing import Any, Callable, TypeVar
+
+from fastapi import Request
 from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker, DeclarativeBase
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import Session, sessionmaker, DeclarativeBase
+from starlette.concurrency import run_in_threadpool
 
 from app.config import settings
+from app.services.db_pool import engine_kwargs, instrument_engine
+from app.services.query_stats import track_queries
+from app.services.read_routing import pinned_to_primary
+from app.services.slow_queries import watch_slow_queries
+
+T = TypeVar("T")
+
+
+def _normalize_url(url: str) -> str:
+    # Railway gives postgres:// but SQLAlchemy requires postgresql://
+    if url.startswith("postgres://"):
+        return url.replace("postgres://", "postgresql://", 1)
+    return url
+
+
+def _async_url(url: str) -> str:
+    """Swap the sync driver for its asyncio counterpart (asyncpg / aiosqlite)."""
+    scheme, rest = url.split("://", 1)
+    dialect = scheme.split("+", 1)[0]
+    driver = {"postgresql": "asyncpg", "sqlite": "aiosqlite"}.get(dialect)
+    if not driver:
+        raise ValueError(f"No async driver configured for database dialect '{dialect}'.")
+    return f"{dialect}+{driver}://{rest}"
+
+
+def _instrument(name: str, sync_engine) -> None:
+    instrument_engine(name, sync_engine)
+    track_queries(sync_engine)
+    watch_slow_queries(name, sync_engine)
+
+
+_db_url = _normalize_url(settings.database_url)
+_replica_url = _normalize_url(settings.database_replica_url) if settings.database_replica_url else None
+
+engine = create_engine(_db_url, **engine_kwargs(_db_url))
+_instrument("primary", engine)
+
+# Optional read replica (DATABASE_REPLICA_URL) for read-only routes
+replica_engine = create_engine(_replica_url, **engine_kwargs(_replica_url)) if _replica_url else None
+if replica_engine:
+    _instrument("replica", replica_engine)
+
+# Opt-in async engines (DATABASE_ASYNC=true) for the read-heavy async routers
+async_engine = None
+async_replica_engine = None
+if settings.database_async:
+    async_engine = create_async_engine(_async_url(_db_url), **engine_kwargs(_db_url, is_async=True))
+    _instrument("primary_async", async_engine.sync_engine)
+    if _replica_url:
+        async_replica_engine = create_async_engine(_async_url(_replica_url), **engine_kwargs(_replica_url, is_async=True))
+        _instrument("replica_async", async_replica_engine.sync_engine)
+
+
+class RoutingSession(Session):
+    """Session that can send plain reads to the replica.
+
+    Sessions are pinned to the primary unless created with
+    ``info={"primary": False}`` (the read-only dependencies do that). An
+    unpinned session pins itself as soon as it flushes, runs DML or selects
+    FOR UPDATE, so reads later in the same unit of work see its own writes.
+    """
+
+    primary_bind = engine
+    replica_bind = replica_engine
+
+    def get_bind(self, mapper=None, clause=None, **kw):
+        if self.replica_bind is None or self.info.get("primary", True):
+            return self.primary_bind
+        if self._flushing or getattr(clause, "is_dml", False) or getattr(clause, "_for_update_arg", None) is not None:
+            self.info["primary"] = True
+            return self.primary_bind
+        return self.replica_bind
 
-# Railway gives postgres:// but SQLAlchemy requires postgresql://
-_db_url = settings.database_url
-if _db_url.startswith("postgres://"):
-    _db_url = _db_url.replace("postgres://", "postgresql://", 1)
 
-engine = create_engine(_db_url, pool_pre_ping=True)
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+class AsyncRoutingSession(RoutingSession):
+    primary_bind = async_engine.sync_engine if async_engine else None
+    replica_bind = async_replica_engine.sync_engine if async_replica_engine else None
+
+
+SessionLocal = sessionmaker(class_=RoutingSession, autocommit=False, autoflush=False)
+AsyncSessionLocal = (
+    async_sessionmaker(expire_on_commit=False, sync_session_class=AsyncRoutingSession)
+    if async_engine else None
+)
 
 
 class Base(DeclarativeBase):
@@ -22,3 +103,47 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+def get_read_db(request: Request):
+    """Session for read-only routes: served by the replica unless the client just wrote."""
+    db = SessionLocal(info={"primary": pinned_to_primary(request)})
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+class ThreadedSession:
+    """AsyncSession stand-in over a sync Session, used while the async engine is off.
+
+    Async routes only talk to the database through ``await db.run_sync(fn, ...)``,
+    so the same query code runs on asyncpg when DATABASE_ASYNC is on and in the
+    threadpool (the previous behaviour) when it is off.
+    """
+
+    def __init__(self, session: Session):
+        self.sync_session = session
+
+    async def run_sync(self, fn: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        return await run_in_threadpool(fn, self.sync_session, *args, **kwargs)
+
+    async def close(self) -> None:
+        await run_in_threadpool(self.sync_session.close)
+
+
+AsyncDB = AsyncSession | ThreadedSession
+
+
+async def get_async_db(request: Request):
+    """Read-only async session; routed like get_read_db."""
+    info = {"primary": pinned_to_primary(request)}
+    if AsyncSessionLocal:
+        async with AsyncSessionLocal(info=info) as db:
+            yield db
+    else:
+        db = ThreadedSession(SessionLocal(info=info))
+        try:
+            yield db
+        finally:
+            await db.close()
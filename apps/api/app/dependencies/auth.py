@@ -46,3 +46,22 @@ def get_current_user_or_token(
         return username
     except JWTError:
         raise HTTPException(401, "Invalid or expired token.")
+
+
+# Role claim on tokens issued to the configured admin account
+ADMIN_ROLE = "admin"
+
+
+def is_admin_token(token: str) -> bool:
+    try:
+        payload = jwt.decode(token, settings.api_secret_key, algorithms=[JWT_ALGORITHM])
+    except JWTError:
+        return False
+    return payload.get("sub") is not None and payload.get("role") == ADMIN_ROLE
+
+
+def get_admin_user(credentials: HTTPAuthorizationCredentials = Depends(security)) -> str:
+    username = get_current_user(credentials)
+    if not is_admin_token(credentials.credentials):
+        raise HTTPException(403, "Admin role required.")
+    return username
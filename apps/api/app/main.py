@@ -1,14 +1,14 @@
 from contextlib import asynccontextmanager
 from fastapi import FastAPI, Depends
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.staticfiles import StaticFiles
 import logging
 import os
 
 from app.config import settings
-from app.database import engine, Base
+from app.database import engine, async_engine, Base
 from app.dependencies.auth import get_current_user
-from app.routers import health, tenants, units, deals, documents, static_documents, app_settings, audit_logs, dashboard, webhook, auth
+from app.services import document_generator, image_assets, metrics as app_metrics, pdf_renderer, profiler, query_stats, read_routing, regeneration, settings_cache, webhook_inbox
+from app.routers import health, tenants, units, deals, documents, document_jobs, files, static_documents, app_settings, audit_logs, dashboard, webhook, auth, metrics, profiles
 
 # Import all models so Base.metadata knows about them
 from app.models import *  # noqa: F401,F403
@@ -30,16 +30,49 @@ async def lifespan(app: FastAPI):
         from app.database import SessionLocal
         from app.models.settings import AppSettings
         db = SessionLocal()
-        if not db.query(AppSettings).first():
-            db.add(AppSettings())
+        # Also primes this worker's settings cache
+        snapshot = settings_cache.get_app_settings(db)
+        if not snapshot:
+            row = AppSettings()
+            db.add(row)
             db.commit()
+            settings_cache.refresh(row)
             logger.info("AppSettings initialized with defaults")
+        elif image_assets.needs_backfill(snapshot):
+            # Logo/signature uploaded before render variants existed
+            row = image_assets.backfill(db)
+            if row:
+                settings_cache.refresh(row)
         db.close()
     except Exception as e:
         logger.error(f"Failed to initialize AppSettings: {e}")
 
+    # Compile document templates before the first request needs them
+    try:
+        timings = document_generator.warm_templates()
+        logger.info(f"Compiled {len(timings)} document templates in {sum(timings.values()):.0f} ms")
+    except Exception as e:
+        logger.error(f"Failed to compile document templates: {e}")
+
+    if not settings.metrics_token and settings.environment != "development":
+        logger.warning("METRICS_TOKEN is not set: GET /metrics is open to anyone who can reach the API")
+
+    # Drain bot commands accepted in async webhook mode
+    webhook_inbox.start_workers()
+
+    # Pick up bulk regeneration jobs whose worker stopped mid-run
+    try:
+        regeneration.resume_interrupted_jobs()
+    except Exception as e:
+        logger.error(f"Failed to resume regeneration jobs: {e}")
+
     yield
 
+    webhook_inbox.stop_workers()
+    pdf_renderer.shutdown()
+    if async_engine:
+        await async_engine.dispose()
+
 
 app = FastAPI(
     title="NestApp API",
@@ -56,21 +89,41 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Mount storage for serving files
+# Per-request query count / DB time headers and N+1 warnings
+app.middleware("http")(query_stats.query_stats_middleware)
+
+# Keep clients on the primary right after their own writes
+if settings.database_replica_url:
+    app.middleware("http")(read_routing.sticky_primary_middleware)
+
+# Admin-only ?profile=1 sampling profiler
+app.middleware("http")(profiler.profiler_middleware)
+
+# Request latency per route template and in-flight requests (outermost, times the whole stack)
+app.middleware("http")(app_metrics.metrics_middleware)
+
+# Mount storage for serving files (through the storage backend when it is S3)
 storage_path = settings.storage_root
-if os.path.isdir(storage_path):
-    app.mount("/files", StaticFiles(directory=storage_path), name="files")
+if settings.storage_backend == "s3":
+    app.include_router(files.router)
+elif os.path.isdir(storage_path):
+    app.mount("/files", files.PublicFiles(directory=storage_path), name="files")
 
 # Public routers (no auth required)
 app.include_router(health.router)
 app.include_router(auth.router)
 app.include_router(webhook.router)
+app.include_router(metrics.exposition_router)
+# /metrics/* diagnostics: a user JWT or METRICS_TOKEN (see verify_diagnostics_access)
+app.include_router(metrics.router)
+# Stored request profiles: admin role only
+app.include_router(profiles.router)
 
 # Document routers — use per-endpoint auth (supports token query param for preview/download)
 app.include_router(documents.router)
 app.include_router(static_documents.router)
 
 # Protected routers (auth required)
-protected = [dashboard, tenants, units, deals, app_settings, audit_logs]
+protected = [dashboard, tenants, units, deals, document_jobs, app_settings, audit_logs]
 for mod in protected:
     app.include_router(mod.router, dependencies=[Depends(get_current_user)])
@@ -0,0 +1,12 @@
+"""Operational commands run against the live database and storage (python -m app.maintenance.<name>)."""
+
+
+def format_size(n: float, signed: bool = False) -> str:
+    """Human-readable byte count; ``signed`` prefixes + or - for a delta."""
+    sign = ("-" if n < 0 else "+") if signed else ""
+    n = abs(n) if signed else n
+    for unit in ("B", "KiB", "MiB"):
+        if n < 1024:
+            return f"{sign}{n:,.1f} {unit}"
+        n /= 1024
+    return f"{sign}{n:,.1f} GiB"
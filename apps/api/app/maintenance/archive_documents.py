@@ -0,0 +1,69 @@
+"""
+Pack the documents of long-closed deals into one archive per deal.
+
+Usage:
+    python -m app.maintenance.archive_documents [--days 90] [--limit 0] [--dry-run]
+
+Deals that were completed or cancelled more than --days ago (default
+DOCUMENT_ARCHIVE_AFTER_DAYS) get their HTML and PDF files packed into
+``archives/documents/<deal_id>.zip``. The loose files are deleted after the
+archive is stored, verified and indexed. Documents stay readable through the
+documents API. Each deal is committed on its own, so the command can be
+stopped and rerun at any time. ``python -m app.maintenance.restore_documents``
+reverses it.
+"""
+import argparse
+
+from app.config import settings
+from app.database import SessionLocal
+from app.maintenance import format_size
+from app.models.deal import Deal
+from app.services import document_archive
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Archive the document files of long-closed deals.")
+    parser.add_argument("--days", type=int, default=settings.document_archive_after_days,
+                        help="Archive deals closed at least this many days ago")
+    parser.add_argument("--limit", type=int, default=0, help="Stop after this many deals (0 for all)")
+    parser.add_argument("--dry-run", action="store_true", help="List the deals that would be archived")
+    args = parser.parse_args(argv)
+
+    deals = files = failed = loose_bytes = archive_bytes = 0
+    db = SessionLocal()
+    try:
+        query = document_archive.archivable_deals(db, args.days)
+        if args.limit:
+            query = query.limit(args.limit)
+        deal_ids = [deal.id for deal in query]
+        for deal_id in deal_ids:
+            deal = db.get(Deal, deal_id)
+            if args.dry_run:
+                print(f"  {deal.deal_code} ({deal.status})")
+                continue
+            try:
+                result = document_archive.archive_deal(db, deal)
+            except Exception as e:
+                db.rollback()
+                failed += 1
+                print(f"  {deal.deal_code}: failed: {e}")
+                continue
+            if result:
+                deals += 1
+                files += result.files
+                loose_bytes += result.loose_bytes
+                archive_bytes += result.archive_bytes
+            db.expunge_all()
+    finally:
+        db.close()
+
+    if args.dry_run:
+        print(f"Would archive {len(deal_ids):,} deals closed more than {args.days} days ago.")
+        return
+    print(f"Archived {files:,} files of {deals:,} deals ({failed:,} failed).")
+    if files:
+        print(f"  {format_size(loose_bytes)} in {files:,} files -> {format_size(archive_bytes)} in {deals:,} archives")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+"""
+Compress document HTML stored before HTML_STORAGE_COMPRESSION existed.
+
+Usage:
+    python -m app.maintenance.compress_html [--batch-size 200] [--dry-run] [--link-mbps 10]
+
+Each uncompressed ``.html`` file of a document version is written as
+``.html.gz`` next to it. The version's html_path is updated, and the
+original is deleted once the batch commits. An interrupted run leaves either
+the original or both files, and the next run picks up where it stopped.
+Missing files, and files that gzip would not make smaller, are counted and
+left alone.
+
+The report gives disk usage before and after, and the average preview
+payload with its transfer time at --link-mbps. It also gives the average
+time to decompress a preview for clients that do not accept gzip.
+"""
+import argparse
+import gzip
+import time
+
+from app.database import SessionLocal
+from app.maintenance import format_size
+from app.models.document import DocumentVersion
+from app.services import html_store
+from app.services.storage import get_storage
+
+
+def _compress_file(rel_path: str, dry_run: bool) -> tuple[int, int, float]:
+    """Write the .gz copy of one file; returns (original bytes, compressed bytes, decompress ms).
+
+    Nothing is written when the compressed copy is not smaller.
+    """
+    data = get_storage().read(rel_path)
+    compressed = html_store.compress(data)
+    if len(compressed) >= len(data):
+        return len(data), len(compressed), 0.0
+    if not dry_run:
+        get_storage().put(rel_path + html_store.GZIP_SUFFIX, compressed, content_type="text/html")
+    start = time.perf_counter()
+    gzip.decompress(compressed).decode("utf-8")
+    return len(data), len(compressed), (time.perf_counter() - start) * 1000
+
+
+def _transfer_ms(size: float, link_mbps: float) -> float:
+    return size * 8 / (link_mbps * 1_000_000) * 1000
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Gzip the stored HTML of existing document versions.")
+    parser.add_argument("--batch-size", type=int, default=200, help="Versions per commit")
+    parser.add_argument("--dry-run", action="store_true", help="Measure only; write and change nothing")
+    parser.add_argument("--link-mbps", type=float, default=10.0, help="Link speed for the transfer time estimate")
+    args = parser.parse_args(argv)
+
+    files = missing = incompressible = before = after = 0
+    decompress_ms = 0.0
+    cursor = ""
+    storage = get_storage()
+    db = SessionLocal()
+    try:
+        while True:
+            versions = (
+                db.query(DocumentVersion)
+                .filter(DocumentVersion.id > cursor, ~DocumentVersion.html_path.like(f"%{html_store.GZIP_SUFFIX}"))
+                .order_by(DocumentVersion.id)
+                .limit(args.batch_size)
+                .all()
+            )
+            if not versions:
+                break
+            cursor = versions[-1].id
+            originals = []
+            for version in versions:
+                try:
+                    size, compressed_size, ms = _compress_file(version.html_path, args.dry_run)
+                except FileNotFoundError:
+                    missing += 1
+                    continue
+                if compressed_size >= size:
+                    incompressible += 1
+                    continue
+                files += 1
+                before += size
+                after += compressed_size
+                decompress_ms += ms
+                originals.append(version.html_path)
+                version.html_path += html_store.GZIP_SUFFIX
+            if args.dry_run:
+                db.rollback()
+                continue
+            db.commit()
+            for path in originals:
+                storage.delete(path)
+            print(f"  {files:,} files compressed")
+    finally:
+        db.close()
+
+    action = "Would compress" if args.dry_run else "Compressed"
+    print(f"{action} {files:,} HTML files ({missing:,} missing on disk, "
+          f"{incompressible:,} left as is because gzip would not make them smaller).")
+    if not files:
+        return
+    change = after - before
+    print(f"  disk:    {format_size(before)} -> {format_size(after)} "
+          f"({format_size(change, signed=True)}, {change / before:+.0%})")
+    mean_before, mean_after = before / files, after / files
+    print(f"  preview: {format_size(mean_before)} -> {format_size(mean_after)} per response, "
+          f"{_transfer_ms(mean_before, args.link_mbps):,.0f} ms -> {_transfer_ms(mean_after, args.link_mbps):,.0f} ms "
+          f"at {args.link_mbps:g} Mbit/s")
+    print(f"  clients without gzip support: {decompress_ms / files:.2f} ms to decompress a preview")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,221 @@
+"""
+Reconcile stored files with the database: find orphans and dangling rows.
+
+Usage:
+    python -m app.maintenance.reconcile_storage [--delete] [--min-age-hours 24] [--workers 16] [--show 20]
+
+Orphans are stored files that no row points to. They come from failed
+requests: a document generated and then rolled back, or an invoice upload
+whose commit failed. Dangling rows point to a file that does not exist,
+for example after files were removed by hand or a restore was incomplete.
+
+The tool lists every key in storage. With the local backend it walks
+STORAGE_ROOT with os.scandir, one directory per task across --workers
+threads, and only stats the files that turn out to be unreferenced. With S3
+it lists the bucket. It then loads the path columns of DocumentVersion,
+FinanceAttachment, StaticDocumentVersion and AppSettings in bulk. Both sides
+are compared as plain sets.
+
+Files packed into a deal archive count as stored, and the archive counts as
+referenced. A loose copy of an archived file, left by an interrupted archive
+or restore run, is an orphan.
+
+Some files are not rows and are never orphans:
+- the cached deal packets, unless their deal no longer exists
+- request profiles
+- the settings-cache stamp
+
+Lock and ``.tmp`` scratch files left by a crashed process count as orphans.
+Files younger than --min-age-hours are skipped, so a request that has
+written its files but not yet committed is never affected.
+
+Without --delete nothing changes. Dangling rows are only reported: which row
+should go depends on why the file is missing.
+"""
+import argparse
+import os
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+
+from app.database import SessionLocal
+from app.maintenance import format_size
+from app.models.archived_file import ArchivedFile
+from app.models.deal import Deal
+from app.models.document import DocumentVersion
+from app.models.finance_attachment import FinanceAttachment
+from app.models.settings import AppSettings
+from app.models.static_document import StaticDocumentVersion
+from app.services.deal_packet import PACKET_DIR
+from app.services.pdf_renderer import PDF_PENDING
+from app.services.profiler import PROFILES_DIR
+from app.services.settings_cache import STAMP_FILE
+from app.services.storage import LocalStorage, StoredObject, get_storage
+
+SCRATCH_SUFFIXES = (".lock", ".tmp")
+STAT_BATCH = 1000
+
+
+def _key(path: str) -> str:
+    return path.replace(os.sep, "/").lstrip("/")
+
+
+def _scan_dir(root: str, rel_dir: str) -> tuple[list[str], list[str]]:
+    """Keys of the files directly in one directory, and its subdirectories."""
+    files, dirs = [], []
+    try:
+        with os.scandir(os.path.join(root, rel_dir)) as entries:
+            for entry in entries:
+                rel = f"{rel_dir}/{entry.name}" if rel_dir else entry.name
+                if entry.is_dir(follow_symlinks=False):
+                    dirs.append(rel)
+                elif entry.is_file(follow_symlinks=False):
+                    files.append(rel)
+    except FileNotFoundError:
+        pass
+    return files, dirs
+
+
+def _scan_local(root: str, workers: int) -> set[str]:
+    keys: set[str] = set()
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        pending = [pool.submit(_scan_dir, root, "")]
+        while pending:
+            files, dirs = pending.pop().result()
+            keys.update(files)
+            pending.extend(pool.submit(_scan_dir, root, d) for d in dirs)
+    return keys
+
+
+def list_keys(workers: int) -> set[str]:
+    storage = get_storage()
+    if isinstance(storage, LocalStorage):
+        return _scan_local(os.path.abspath(storage.root), workers)
+    return {obj.key for obj in storage.iter_objects()}
+
+
+def _stat_batch(keys: list[str]) -> list[StoredObject]:
+    storage = get_storage()
+    return [s for s in map(storage.stat, keys) if s is not None]
+
+
+def stat_all(keys: list[str], workers: int) -> list[StoredObject]:
+    """Stat keys in batches; one task per key costs more than the stat itself."""
+    batches = [keys[i:i + STAT_BATCH] for i in range(0, len(keys), STAT_BATCH)]
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        return [s for batch in pool.map(_stat_batch, batches) for s in batch]
+
+
+def referenced_paths(db) -> dict[str, list[tuple[str, str, str]]]:
+    """Every stored path the database points to, with the (table, row id, column) that holds it."""
+    refs: dict[str, list[tuple[str, str, str]]] = {}
+
+    def add(path, table, row_id, column):
+        if path:
+            refs.setdefault(_key(path), []).append((table, row_id, column))
+
+    for row_id, html_path, pdf_path in db.query(
+        DocumentVersion.id, DocumentVersion.html_path, DocumentVersion.pdf_path
+    ).yield_per(10_000):
+        add(html_path, "document_versions", row_id, "html_path")
+        add(pdf_path, "document_versions", row_id, "pdf_path")
+    for row_id, file_path in db.query(FinanceAttachment.id, FinanceAttachment.file_path).yield_per(10_000):
+        add(file_path, "finance_attachments", row_id, "file_path")
+    for row_id, file_path in db.query(StaticDocumentVersion.id, StaticDocumentVersion.file_path).yield_per(10_000):
+        add(file_path, "static_document_versions", row_id, "file_path")
+    for row in db.query(AppSettings).all():
+        for column in ("logo_path", "logo_render_path", "signature_image_path", "signature_render_path"):
+            add(getattr(row, column), "app_settings", str(row.id), column)
+    for deal_id, path in db.query(ArchivedFile.deal_id, ArchivedFile.archive_path).distinct():
+        add(path, "archived_files", deal_id, "archive_path")
+    return refs
+
+
+def _pending_pdfs(db) -> set[str]:
+    """PDFs of lazy versions that have not been rendered yet; their absence is expected."""
+    return {_key(p) for (p,) in db.query(DocumentVersion.pdf_path).filter(DocumentVersion.pdf_status == PDF_PENDING)}
+
+
+def _is_managed(key: str, deal_ids: set[str]) -> bool:
+    """Files that belong to the app without a row pointing at them."""
+    if key == STAMP_FILE or key.startswith(f"{PROFILES_DIR}/"):
+        return True
+    if key.startswith(f"{PACKET_DIR}/") and not key.endswith(SCRATCH_SUFFIXES):
+        return key.split("/")[1] in deal_ids
+    return False
+
+
+def _category(key: str) -> str:
+    if key.endswith(SCRATCH_SUFFIXES):
+        return "lock/tmp"
+    return key.split("/", 1)[0] if "/" in key else "(root)"
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Find stored files without rows and rows without files.")
+    parser.add_argument("--delete", action="store_true", help="Delete the orphaned files (default: report only)")
+    parser.add_argument("--min-age-hours", type=float, default=24.0, help="Never treat younger files as orphans")
+    parser.add_argument("--workers", type=int, default=16, help="Threads for scanning and deleting")
+    parser.add_argument("--show", type=int, default=20, help="Orphans and dangling rows to list (0 for none)")
+    args = parser.parse_args(argv)
+
+    storage = get_storage()
+    started = time.perf_counter()
+    stored = list_keys(args.workers)
+    scanned = time.perf_counter()
+
+    db = SessionLocal()
+    try:
+        refs = referenced_paths(db)
+        pending = _pending_pdfs(db)
+        deal_ids = {deal_id for (deal_id,) in db.query(Deal.id)}
+        archived = {key for (key,) in db.query(ArchivedFile.key).yield_per(10_000)}
+    finally:
+        db.close()
+    loaded = time.perf_counter()
+
+    referenced = refs.keys()
+    candidates = [k for k in (stored - referenced) | (stored & archived) if not _is_managed(k, deal_ids)]
+    dangling = sorted(referenced - stored - archived - pending)
+
+    # Stat only the unreferenced files, for their age and size
+    cutoff = datetime.now(timezone.utc) - timedelta(hours=args.min_age_hours)
+    stats = stat_all(candidates, args.workers)
+    orphans: list[StoredObject] = sorted((s for s in stats if s.modified_at < cutoff), key=lambda s: s.key)
+    too_young = len(stats) - len(orphans)
+
+    print(f"Scanned {len(stored):,} stored files in {scanned - started:.1f} s; "
+          f"{len(refs):,} referenced paths loaded in {loaded - scanned:.1f} s.")
+
+    by_category = Counter()
+    bytes_by_category = Counter()
+    for obj in orphans:
+        by_category[_category(obj.key)] += 1
+        bytes_by_category[_category(obj.key)] += obj.size
+    total = sum(bytes_by_category.values())
+    print(f"Orphaned files: {len(orphans):,} ({format_size(total)}); {too_young:,} more younger than {args.min_age_hours:g} h skipped.")
+    for category, count in by_category.most_common():
+        print(f"  {category:<20} {count:>10,}  {format_size(bytes_by_category[category])}")
+    for obj in orphans[:args.show]:
+        print(f"  {obj.key}  {format_size(obj.size)}  {obj.modified_at:%Y-%m-%d %H:%M}")
+
+    print(f"Dangling rows: {sum(len(refs[k]) for k in dangling):,} referencing {len(dangling):,} missing files.")
+    shown = 0
+    for key in dangling:
+        for table, row_id, column in refs[key]:
+            if shown >= args.show:
+                break
+            print(f"  {table}.{column} id={row_id}: {key}")
+            shown += 1
+
+    if args.delete and orphans:
+        with ThreadPoolExecutor(max_workers=args.workers) as pool:
+            list(pool.map(storage.delete, (obj.key for obj in orphans)))
+        print(f"Deleted {len(orphans):,} orphaned files, freed {format_size(total)}.")
+    elif orphans:
+        print("Nothing deleted; run with --delete to remove the orphans.")
+
+
+if __name__ == "__main__":
+    main()
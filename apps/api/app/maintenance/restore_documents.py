@@ -0,0 +1,50 @@
+"""
+Unpack archived deal documents back into loose files.
+
+Usage:
+    python -m app.maintenance.restore_documents DEAL [DEAL ...]
+    python -m app.maintenance.restore_documents --all
+
+DEAL is a deal code or id. The archived files of each deal are written back
+to their original keys, then the index rows and the archive are removed.
+"""
+import argparse
+
+from app.database import SessionLocal
+from app.models.archived_file import ArchivedFile
+from app.models.deal import Deal
+from app.services import document_archive
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Restore archived deal documents to loose files.")
+    parser.add_argument("deals", nargs="*", help="Deal codes or ids")
+    parser.add_argument("--all", action="store_true", help="Restore every archived deal")
+    args = parser.parse_args(argv)
+    if not args.deals and not args.all:
+        parser.error("give one or more deals, or --all")
+
+    restored = files = 0
+    db = SessionLocal()
+    try:
+        if args.all:
+            deal_ids = [deal_id for (deal_id,) in db.query(ArchivedFile.deal_id).distinct()]
+        else:
+            deal_ids = []
+            for ref in args.deals:
+                deal = db.query(Deal).filter((Deal.deal_code == ref) | (Deal.id == ref)).first()
+                if not deal:
+                    parser.error(f"deal not found: {ref}")
+                deal_ids.append(deal.id)
+        for deal_id in deal_ids:
+            count = document_archive.restore_deal(db, deal_id)
+            if count:
+                restored += 1
+                files += count
+    finally:
+        db.close()
+    print(f"Restored {files:,} files of {restored:,} deals.")
+
+
+if __name__ == "__main__":
+    main()
@@ -6,6 +6,10 @@ from app.models.static_document import StaticDocument, StaticDocumentVersion
 from app.models.finance_attachment import FinanceAttachment
 from app.models.settings import AppSettings
 from app.models.audit_log import AuditLog
+from app.models.webhook_idempotency import WebhookIdempotencyKey
+from app.models.webhook_inbox import WebhookInboxItem
+from app.models.regeneration_job import DocumentRegenerationJob
+from app.models.archived_file import ArchivedFile
 
 __all__ = [
     "Tenant",
@@ -18,4 +22,8 @@ __all__ = [
     "FinanceAttachment",
     "AppSettings",
     "AuditLog",
+    "WebhookIdempotencyKey",
+    "WebhookInboxItem",
+    "DocumentRegenerationJob",
+    "ArchivedFile",
 ]
@@ -0,0 +1,24 @@
+from datetime import datetime, timezone
+
+from sqlalchemy import String, BigInteger, DateTime, ForeignKey
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.database import Base
+
+
+class ArchivedFile(Base):
+    """Index entry of a file packed into a deal's document archive."""
+    __tablename__ = "archived_files"
+
+    # The storage key the file had while loose; rows keep pointing to it
+    key: Mapped[str] = mapped_column(String(500), primary_key=True)
+    deal_id: Mapped[str] = mapped_column(String(36), ForeignKey("deals.id"), nullable=False, index=True)
+    archive_path: Mapped[str] = mapped_column(String(500), nullable=False)
+    # Where the member's data starts in the archive, and its stored (possibly compressed) length
+    data_offset: Mapped[int] = mapped_column(BigInteger, nullable=False)
+    stored_size: Mapped[int] = mapped_column(BigInteger, nullable=False)
+    size: Mapped[int] = mapped_column(BigInteger, nullable=False)
+    compression: Mapped[str] = mapped_column(String(10), nullable=False)  # stored, deflate
+    crc32: Mapped[int] = mapped_column(BigInteger, nullable=False)
+    modified_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
+    archived_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc))
@@ -2,12 +2,16 @@ import uuid
 from datetime import datetime, timezone, date
 from decimal import Decimal
 
-from sqlalchemy import String, Text, DateTime, Date, Numeric, ForeignKey
+from sqlalchemy import String, Text, DateTime, Date, Numeric, ForeignKey, Sequence
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from app.database import Base
 
 
+# Numbers of NEST-<n> deal codes (PostgreSQL; other dialects use the highest code + 1)
+DEAL_CODE_SEQUENCE = Sequence("deal_code_seq", metadata=Base.metadata)
+
+
 class Deal(Base):
     __tablename__ = "deals"
 
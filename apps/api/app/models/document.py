@@ -28,6 +28,7 @@ class DocumentVersion(Base):
     version_no: Mapped[int] = mapped_column(Integer, nullable=False)
     html_path: Mapped[str] = mapped_column(String(500), nullable=False)
     pdf_path: Mapped[str] = mapped_column(String(500), nullable=False)
+    pdf_status: Mapped[str] = mapped_column(String(20), default="READY")  # READY, PENDING (lazy mode)
     signatory_name: Mapped[str | None] = mapped_column(String(255), nullable=True)
     signatory_title: Mapped[str | None] = mapped_column(String(255), nullable=True)
     channel: Mapped[str] = mapped_column(String(20), default="WEB")
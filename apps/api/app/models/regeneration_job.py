@@ -0,0 +1,27 @@
+import uuid
+from datetime import datetime, timezone
+
+from sqlalchemy import String, Text, Integer, DateTime, JSON
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.database import Base
+
+
+class DocumentRegenerationJob(Base):
+    __tablename__ = "document_regeneration_jobs"
+
+    id: Mapped[str] = mapped_column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
+    status: Mapped[str] = mapped_column(String(20), nullable=False, default="PENDING", index=True)  # PENDING, RUNNING, DONE, FAILED, CANCELLED
+    filters: Mapped[dict] = mapped_column(JSON, nullable=False)
+    total_deals: Mapped[int] = mapped_column(Integer, default=0)
+    processed_deals: Mapped[int] = mapped_column(Integer, default=0)
+    failed_deals: Mapped[int] = mapped_column(Integer, default=0)
+    regenerated_documents: Mapped[int] = mapped_column(Integer, default=0)
+    # Checkpoint: every deal with an id up to and including this one is done
+    cursor: Mapped[str | None] = mapped_column(String(36), nullable=True)
+    errors: Mapped[list] = mapped_column(JSON, default=list)
+    error: Mapped[str | None] = mapped_column(Text, nullable=True)
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc))
+    started_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+    heartbeat_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+    finished_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
@@ -0,0 +1,16 @@
+from datetime import datetime, timezone
+
+from sqlalchemy import String, DateTime, JSON
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.database import Base
+
+
+class WebhookIdempotencyKey(Base):
+    __tablename__ = "webhook_idempotency_keys"
+
+    key: Mapped[str] = mapped_column(String(255), primary_key=True)
+    command: Mapped[str] = mapped_column(String(50), nullable=False)
+    deal_id: Mapped[str | None] = mapped_column(String(36), nullable=True)
+    response_json: Mapped[dict] = mapped_column(JSON, nullable=False)
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc))
@@ -7,15 +7,16 @@ from sqlalchemy.orm import Session
 from app.database import get_db
 from app.models.settings import AppSettings
 from app.schemas.settings import SettingsUpdate, SettingsResponse
+from app.services import image_assets, metrics, settings_cache
 from app.services.audit import log_action
-from app.config import settings as app_config
+from app.services.storage import get_storage
 
 router = APIRouter(prefix="/settings", tags=["Settings"])
 
 
 @router.get("", response_model=SettingsResponse)
 def get_settings(db: Session = Depends(get_db)):
-    s = db.query(AppSettings).first()
+    s = settings_cache.get_app_settings(db)
     if not s:
         raise HTTPException(404, "Settings not initialized. Please run the seed command.")
     return s
@@ -31,7 +32,7 @@ def update_settings(data: SettingsUpdate, db: Session = Depends(get_db)):
     log_action(db, action="UPDATE_SETTINGS", summary="Updated company settings")
     db.commit()
     db.refresh(s)
-    return s
+    return settings_cache.refresh(s)
 
 
 @router.post("/logo", response_model=SettingsResponse)
@@ -41,22 +42,21 @@ def upload_logo(file: UploadFile = File(...), db: Session = Depends(get_db)):
         raise HTTPException(404, "Settings not initialized.")
 
     file_dir = os.path.join("settings")
-    full_dir = os.path.join(app_config.storage_root, file_dir)
-    os.makedirs(full_dir, exist_ok=True)
-
     ext = file.filename.rsplit(".", 1)[-1] if "." in file.filename else "png"
     stored_name = f"logo_{uuid.uuid4().hex[:8]}.{ext}"
     file_path = os.path.join(file_dir, stored_name)
-    full_path = os.path.join(app_config.storage_root, file_path)
 
-    with open(full_path, "wb") as f:
-        f.write(file.file.read())
+    # Read whole: the render variant is made from the same bytes
+    content = file.file.read()
+    get_storage().put(file_path, content, content_type=file.content_type)
+    metrics.upload_size.observe(len(content), kind="logo")
 
     s.logo_path = file_path
+    s.logo_render_path = image_assets.store_render_variant(content, "logo")
     log_action(db, action="UPDATE_SETTINGS", summary="Updated company logo")
     db.commit()
     db.refresh(s)
-    return s
+    return settings_cache.refresh(s)
 
 
 @router.post("/signature", response_model=SettingsResponse)
@@ -66,19 +66,18 @@ def upload_signature(file: UploadFile = File(...), db: Session = Depends(get_db)
         raise HTTPException(404, "Settings not initialized.")
 
     file_dir = os.path.join("settings")
-    full_dir = os.path.join(app_config.storage_root, file_dir)
-    os.makedirs(full_dir, exist_ok=True)
-
     ext = file.filename.rsplit(".", 1)[-1] if "." in file.filename else "png"
     stored_name = f"signature_{uuid.uuid4().hex[:8]}.{ext}"
     file_path = os.path.join(file_dir, stored_name)
-    full_path = os.path.join(app_config.storage_root, file_path)
 
-    with open(full_path, "wb") as f:
-        f.write(file.file.read())
+    # Read whole: the render variant is made from the same bytes
+    content = file.file.read()
+    get_storage().put(file_path, content, content_type=file.content_type)
+    metrics.upload_size.observe(len(content), kind="signature")
 
     s.signature_image_path = file_path
+    s.signature_render_path = image_assets.store_render_variant(content, "signature")
     log_action(db, action="UPDATE_SETTINGS", summary="Updated signature image")
     db.commit()
     db.refresh(s)
-    return s
+    return settings_cache.refresh(s)
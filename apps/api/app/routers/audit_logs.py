@@ -6,22 +6,21 @@ from fastapi import APIRouter, Depends, Query
 from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 
-from app.database import get_db
+from app.database import get_async_db, AsyncDB
 from app.models.audit_log import AuditLog
 from app.schemas.audit import AuditLogResponse
 
 router = APIRouter(prefix="/audit-logs", tags=["Audit Logs"])
 
 
-@router.get("", response_model=list[AuditLogResponse])
-def list_audit_logs(
-    deal_id: str | None = None,
-    action: str | None = None,
-    channel: str | None = None,
-    page: int = Query(1, ge=1),
-    size: int = Query(50, ge=1, le=200),
-    db: Session = Depends(get_db),
-):
+def _query_audit_logs(
+    db: Session,
+    deal_id: str | None,
+    action: str | None,
+    channel: str | None,
+    page: int,
+    size: int,
+) -> list[AuditLog]:
     q = db.query(AuditLog)
     if deal_id:
         q = q.filter(AuditLog.deal_id == deal_id)
@@ -33,11 +32,7 @@ def list_audit_logs(
     return q.order_by(AuditLog.created_at.desc()).offset((page - 1) * size).limit(size).all()
 
 
-@router.get("/export")
-def export_audit_logs(
-    deal_id: str | None = None,
-    db: Session = Depends(get_db),
-):
+def _export_csv(db: Session, deal_id: str | None) -> str:
     q = db.query(AuditLog)
     if deal_id:
         q = q.filter(AuditLog.deal_id == deal_id)
@@ -51,10 +46,29 @@ def export_audit_logs(
             log.id, log.deal_id, log.actor, log.channel, log.executor,
             log.action, log.summary, log.created_at.isoformat() if log.created_at else "",
         ])
+    return output.getvalue()
+
 
-    output.seek(0)
+@router.get("", response_model=list[AuditLogResponse])
+async def list_audit_logs(
+    deal_id: str | None = None,
+    action: str | None = None,
+    channel: str | None = None,
+    page: int = Query(1, ge=1),
+    size: int = Query(50, ge=1, le=200),
+    db: AsyncDB = Depends(get_async_db),
+):
+    return await db.run_sync(_query_audit_logs, deal_id, action, channel, page, size)
+
+
+@router.get("/export")
+async def export_audit_logs(
+    deal_id: str | None = None,
+    db: AsyncDB = Depends(get_async_db),
+):
+    content = await db.run_sync(_export_csv, deal_id)
     return StreamingResponse(
-        iter([output.getvalue()]),
+        iter([content]),
         media_type="text/csv",
         headers={"Content-Disposition": f"attachment; filename=audit_logs_{datetime.utcnow().strftime('%Y%m%d')}.csv"},
     )
@@ -5,7 +5,7 @@ from pydantic import BaseModel
 from jose import jwt, JWTError
 
 from app.config import settings
-from app.dependencies.auth import get_current_user
+from app.dependencies.auth import ADMIN_ROLE, get_current_user
 
 router = APIRouter(prefix="/auth", tags=["Auth"])
 
@@ -34,7 +34,8 @@ def login(data: LoginRequest):
         raise HTTPException(401, "Invalid username or password.")
 
     expire = datetime.now(timezone.utc) + timedelta(hours=JWT_EXPIRE_HOURS)
-    payload = {"sub": data.username, "exp": expire}
+    # The only account is the configured admin
+    payload = {"sub": data.username, "role": ADMIN_ROLE, "exp": expire}
     token = jwt.encode(payload, settings.api_secret_key, algorithm=JWT_ALGORITHM)
 
     return LoginResponse(access_token=token, username=data.username)
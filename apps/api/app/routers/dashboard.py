@@ -2,7 +2,7 @@ from fastapi import APIRouter, Depends
 from sqlalchemy.orm import Session
 from sqlalchemy import func
 
-from app.database import get_db
+from app.database import get_async_db, AsyncDB
 from app.models.deal import Deal
 from app.models.unit import Unit
 from app.schemas.dashboard import DashboardSummary, UnitOccupancy, DealStatusChart
@@ -10,8 +10,7 @@ from app.schemas.dashboard import DashboardSummary, UnitOccupancy, DealStatusCha
 router = APIRouter(prefix="/dashboard", tags=["Dashboard"])
 
 
-@router.get("", response_model=DashboardSummary)
-def get_dashboard(db: Session = Depends(get_db)):
+def _build_dashboard(db: Session) -> DashboardSummary:
     # Deal counts
     in_progress = db.query(func.count(Deal.id)).filter(Deal.status.in_(["DRAFT", "IN_PROGRESS"])).scalar() or 0
     blocked = db.query(func.count(Deal.id)).filter(Deal.blocked_reason.isnot(None), Deal.status != "CANCELLED").scalar() or 0
@@ -36,3 +35,8 @@ def get_dashboard(db: Session = Depends(get_db)):
         unit_occupancy=UnitOccupancy(available=available, reserved=reserved, occupied=occupied),
         deal_status_chart=DealStatusChart(in_progress=chart_in_progress, invoice_requested=chart_invoice, completed=chart_completed),
     )
+
+
+@router.get("", response_model=DashboardSummary)
+async def get_dashboard(db: AsyncDB = Depends(get_async_db)):
+    return await db.run_sync(_build_dashboard)
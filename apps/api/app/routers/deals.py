@@ -1,135 +1,114 @@
 import uuid
-from datetime import datetime, timezone
+from datetime import date, datetime, time, timedelta, timezone
 
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, File
+from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Header
+from fastapi.responses import Response, StreamingResponse
 from sqlalchemy.orm import Session, joinedload
 
-from app.database import get_db
+from app.database import get_db, get_read_db, get_async_db, AsyncDB
 from app.models.deal import Deal
 from app.models.unit import Unit
 from app.models.finance_attachment import FinanceAttachment
 from app.schemas.deal import DealCreate, DealUpdate, DealResponse, DealCancelRequest, DealOverrideRequest, DealActionResponse, DealSetPriceRequest, DealSetMoveInRequest
 from app.services.audit import log_action
-from app.services.journey import get_journey_steps, get_journey_status, advance_step, can_progress, STEP_DOCUMENT_MAP
-from app.services.document_generator import generate_document
-from app.services.email import send_invoice_request_email
-from app.models.document import Document
-from app.models.settings import AppSettings
-from app.config import settings as app_config
+from app.services.journey import get_journey_steps, advance_step
+from app.services import deal_actions, deal_packet, document_bundle, metrics
+from app.services.deal_actions import load_deal
+from app.services.storage import file_response, get_storage
 
 import os
 
 router = APIRouter(prefix="/deals", tags=["Deals"])
 
-TERM_PRICE_MAP = {
-    "DAILY": "daily_price",
-    "MONTHLY": "monthly_price",
-    "SIX_MONTHS": "six_month_price",
-    "TWELVE_MONTHS": "twelve_month_price",
-}
 
-
-def _generate_deal_code(db: Session) -> str:
-    count = db.query(Deal).count() + 1
-    return f"NEST-{count:05d}"
-
-
-def _load_deal(deal_id: str, db: Session) -> Deal:
-    deal = db.query(Deal).options(
-        joinedload(Deal.tenant),
-        joinedload(Deal.unit),
-    ).filter(Deal.id == deal_id).first()
-    if not deal:
-        raise HTTPException(404, "Deal not found.")
-    return deal
+def _query_deals(db: Session, status: str | None) -> list[Deal]:
+    q = db.query(Deal).options(joinedload(Deal.tenant), joinedload(Deal.unit))
+    if status:
+        q = q.filter(Deal.status == status)
+    return q.order_by(Deal.created_at.desc()).all()
 
 
-def _get_unit_price(unit: Unit, term_type: str):
-    """Get the unit price based on term type."""
-    price_field = TERM_PRICE_MAP.get(term_type)
-    if not price_field:
-        raise HTTPException(400, f"Invalid term type: {term_type}")
-    price = getattr(unit, price_field, None)
-    if price is None:
-        raise HTTPException(400, f"Unit {unit.unit_code} does not have a {term_type.lower().replace('_', ' ')} price configured.")
-    return price
+@router.get("", response_model=list[DealResponse])
+async def list_deals(
+    status: str | None = None,
+    db: AsyncDB = Depends(get_async_db),
+):
+    return await db.run_sync(_query_deals, status)
 
 
-@router.get("", response_model=list[DealResponse])
-def list_deals(
+@router.get("/documents.zip")
+def download_deals_documents_zip(
     status: str | None = None,
-    db: Session = Depends(get_db),
+    created_from: date | None = None,
+    created_to: date | None = None,
+    latest_only: bool = False,
+    db: Session = Depends(get_read_db),
 ):
-    q = db.query(Deal).options(joinedload(Deal.tenant), joinedload(Deal.unit))
+    """Month-end export: one streamed ZIP of the documents of every deal matching the filter."""
+    q = db.query(Deal.id)
     if status:
         q = q.filter(Deal.status == status)
-    return q.order_by(Deal.created_at.desc()).all()
+    if created_from:
+        q = q.filter(Deal.created_at >= datetime.combine(created_from, time.min, timezone.utc))
+    if created_to:
+        q = q.filter(Deal.created_at < datetime.combine(created_to + timedelta(days=1), time.min, timezone.utc))
+    deal_ids = [row.id for row in q.order_by(Deal.created_at)]
+    if not deal_ids:
+        raise HTTPException(404, "No deals match the filter.")
+    label = "_".join(str(part) for part in (status, created_from, created_to) if part) or "all"
+    return StreamingResponse(
+        document_bundle.stream_zip(deal_ids, latest_only=latest_only),
+        media_type="application/zip",
+        headers={"Content-Disposition": f'attachment; filename="deals_documents_{label}.zip"'},
+    )
 
 
-@router.get("/{deal_id}", response_model=DealResponse)
-def get_deal(deal_id: str, db: Session = Depends(get_db)):
-    return _load_deal(deal_id, db)
+@router.get("/{deal_id}/documents.zip")
+def download_deal_documents_zip(deal_id: str, latest_only: bool = False, db: Session = Depends(get_read_db)):
+    """Every document PDF and finance attachment of the deal as one streamed ZIP."""
+    deal = db.get(Deal, deal_id)
+    if not deal:
+        raise HTTPException(404, "Deal not found.")
+    return StreamingResponse(
+        document_bundle.stream_zip([deal.id], latest_only=latest_only),
+        media_type="application/zip",
+        headers={"Content-Disposition": f'attachment; filename="{deal.deal_code}_documents.zip"'},
+    )
 
 
-@router.get("/{deal_id}/journey")
-def get_deal_journey(deal_id: str, db: Session = Depends(get_db)):
-    deal = _load_deal(deal_id, db)
-    return {
-        "deal_id": deal.id,
-        "term_type": deal.term_type,
-        "current_step": deal.current_step,
-        "status": deal.status,
-        "steps": get_journey_status(deal, db),
-    }
+@router.get("/{deal_id}/packet.pdf")
+def download_deal_packet(deal_id: str, if_none_match: str | None = Header(None), db: Session = Depends(get_db)):
+    """The latest PDF of each journey document merged into one file (cached per set of versions)."""
+    deal = db.get(Deal, deal_id)
+    if not deal:
+        raise HTTPException(404, "Deal not found.")
+    path, key = deal_packet.build_packet(db, deal)
+    etag = f'"{key}"'
+    if if_none_match == etag:
+        return Response(status_code=304, headers={"ETag": etag})
+    return file_response(path, "application/pdf", filename=f"{deal.deal_code}_Deal-Packet.pdf", headers={"ETag": etag})
 
 
-@router.post("", response_model=DealResponse, status_code=201)
-def create_deal(data: DealCreate, db: Session = Depends(get_db)):
-    # Validate unit exists and is available
-    unit = db.query(Unit).filter(Unit.id == data.unit_id).first()
-    if not unit:
-        raise HTTPException(404, "Unit not found.")
-    if unit.status != "AVAILABLE":
-        raise HTTPException(409, "This unit is not available for booking.")
-
-    # Auto-set initial_price from unit pricing
-    initial_price = _get_unit_price(unit, data.term_type)
-
-    deal_code = _generate_deal_code(db)
-    deal = Deal(
-        deal_code=deal_code,
-        tenant_id=data.tenant_id,
-        unit_id=data.unit_id,
-        term_type=data.term_type,
-        start_date=data.start_date,
-        end_date=data.end_date,
-        initial_price=initial_price,
-        currency=data.currency,
-    )
-    # First step is SELECT_UNIT which is done by creating the deal
-    deal.current_step = "SELECT_UNIT"
-    deal.status = "DRAFT"
-    db.add(deal)
+@router.get("/{deal_id}", response_model=DealResponse)
+async def get_deal(deal_id: str, db: AsyncDB = Depends(get_async_db)):
+    return await db.run_sync(lambda s: load_deal(deal_id, s))
 
-    # Reserve the unit
-    unit.status = "RESERVED"
 
-    log_action(db, action="CREATE_DEAL", summary=f"Created deal {deal_code}", deal_id=deal.id)
+@router.get("/{deal_id}/journey")
+async def get_deal_journey(deal_id: str, db: AsyncDB = Depends(get_async_db)):
+    return await db.run_sync(lambda s: deal_actions.get_deal_journey(deal_id, s))
 
-    # Auto-advance past SELECT_UNIT since unit is selected by creating the deal
-    steps = get_journey_steps(deal.term_type)
-    if len(steps) > 1:
-        deal.current_step = steps[1]
-        deal.status = "IN_PROGRESS"
 
+@router.post("", response_model=DealResponse, status_code=201)
+def create_deal(data: DealCreate, db: Session = Depends(get_db)):
+    deal = deal_actions.create_deal(db, data)
     db.commit()
-    db.refresh(deal)
-    return _load_deal(deal.id, db)
+    return load_deal(deal.id, db)
 
 
 @router.patch("/{deal_id}", response_model=DealResponse)
 def update_deal(deal_id: str, data: DealUpdate, db: Session = Depends(get_db)):
-    deal = _load_deal(deal_id, db)
+    deal = load_deal(deal_id, db)
     if deal.status == "CANCELLED":
         raise HTTPException(409, "This deal has been cancelled and cannot be modified.")
     if deal.status == "COMPLETED":
@@ -147,7 +126,7 @@ def update_deal(deal_id: str, data: DealUpdate, db: Session = Depends(get_db)):
 @router.post("/{deal_id}/actions/set-deal-price", response_model=DealActionResponse)
 def action_set_deal_price(deal_id: str, data: DealSetPriceRequest, db: Session = Depends(get_db)):
     """Set the negotiated deal price. Available at FINALIZE_LOO or GENERATE_BOOKING_CONFIRMATION step."""
-    deal = _load_deal(deal_id, db)
+    deal = load_deal(deal_id, db)
     if deal.status in ("CANCELLED", "COMPLETED"):
         raise HTTPException(409, "This deal cannot be modified.")
     if deal.current_step not in ("FINALIZE_LOO", "GENERATE_BOOKING_CONFIRMATION"):
@@ -163,14 +142,14 @@ def action_set_deal_price(deal_id: str, data: DealSetPriceRequest, db: Session =
     )
     db.commit()
     db.refresh(deal)
-    refreshed = _load_deal(deal.id, db)
+    refreshed = load_deal(deal.id, db)
     return DealActionResponse(success=True, message="Deal price updated.", deal=DealResponse.model_validate(refreshed))
 
 
 @router.post("/{deal_id}/actions/set-move-in-details", response_model=DealActionResponse)
 def action_set_move_in_details(deal_id: str, data: DealSetMoveInRequest, db: Session = Depends(get_db)):
     """Set move-in date and items list. Available at GENERATE_MOVE_IN step."""
-    deal = _load_deal(deal_id, db)
+    deal = load_deal(deal_id, db)
     if deal.status in ("CANCELLED", "COMPLETED"):
         raise HTTPException(409, "This deal cannot be modified.")
     if deal.current_step != "GENERATE_MOVE_IN":
@@ -187,102 +166,23 @@ def action_set_move_in_details(deal_id: str, data: DealSetMoveInRequest, db: Ses
     )
     db.commit()
     db.refresh(deal)
-    refreshed = _load_deal(deal.id, db)
+    refreshed = load_deal(deal.id, db)
     return DealActionResponse(success=True, message="Move-in details saved.", deal=DealResponse.model_validate(refreshed))
 
 
 @router.post("/{deal_id}/actions/generate-document", response_model=DealActionResponse)
 def action_generate_document(deal_id: str, db: Session = Depends(get_db), channel: str = "WEB"):
-    deal = _load_deal(deal_id, db)
-    if deal.status in ("CANCELLED", "COMPLETED"):
-        raise HTTPException(409, "This deal cannot be progressed.")
-
-    current_step = deal.current_step
-    if current_step not in STEP_DOCUMENT_MAP:
-        raise HTTPException(400, "The current step does not require document generation.")
-
-    # If no deal_price set at document generation, use initial_price as deal_price
-    if current_step in ("FINALIZE_LOO", "GENERATE_BOOKING_CONFIRMATION") and deal.deal_price is None:
-        deal.deal_price = deal.initial_price
-
-    doc_type = STEP_DOCUMENT_MAP[current_step]
-    version = generate_document(db, deal, doc_type, channel=channel)
-
-    log_action(
-        db,
-        action="GENERATE_DOCUMENT",
-        summary=f"Generated {doc_type} v{version.version_no} for deal {deal.deal_code}",
-        deal_id=deal.id,
-        channel=channel,
-        executor="CLAWDBOT" if channel == "WHATSAPP" else "WEB",
-    )
-
-    # Advance to next step
-    advance_step(deal, db)
-    log_action(
-        db,
-        action="PROGRESS_DEAL",
-        summary=f"Advanced deal {deal.deal_code} to step: {deal.current_step}",
-        deal_id=deal.id,
-        channel=channel,
-        executor="CLAWDBOT" if channel == "WHATSAPP" else "WEB",
-    )
-
+    deal, _version = deal_actions.generate_next_document(db, deal_id, channel=channel)
     db.commit()
-    db.refresh(deal)
-    refreshed = _load_deal(deal.id, db)
+    refreshed = load_deal(deal.id, db)
     return DealActionResponse(success=True, message=f"Document generated successfully.", deal=DealResponse.model_validate(refreshed))
 
 
 @router.post("/{deal_id}/actions/request-invoice", response_model=DealActionResponse)
 def action_request_invoice(deal_id: str, db: Session = Depends(get_db), channel: str = "WEB"):
-    deal = _load_deal(deal_id, db)
-    if deal.current_step != "REQUEST_INVOICE":
-        raise HTTPException(400, "This action is not available yet.")
-
-    # Get settings for finance email
-    app_settings = db.query(AppSettings).first()
-    finance_email = app_settings.finance_email if app_settings else app_config.finance_email
-
-    # Use deal_price if set, otherwise initial_price
-    effective_price = deal.deal_price if deal.deal_price is not None else deal.initial_price
-
-    # Find latest document PDF to attach
-    pdf_path = None
-    latest_doc = db.query(Document).filter(Document.deal_id == deal.id).order_by(Document.created_at.desc()).first()
-    if latest_doc and latest_doc.versions:
-        latest_version = latest_doc.versions[0]  # ordered desc by version_no
-        if latest_version.pdf_path:
-            pdf_path = os.path.join(app_config.storage_root, latest_version.pdf_path)
-
-    send_invoice_request_email(
-        finance_email=finance_email,
-        deal_code=deal.deal_code,
-        tenant_name=deal.tenant.full_name,
-        unit_code=deal.unit.unit_code,
-        amount=str(effective_price),
-        currency=deal.currency,
-        pdf_path=pdf_path,
-    )
-
-    deal.invoice_requested_at = datetime.now(timezone.utc)
-    deal.status = "INVOICE_REQUESTED"
-
-    log_action(
-        db,
-        action="REQUEST_INVOICE",
-        summary=f"Invoice requested for deal {deal.deal_code}",
-        deal_id=deal.id,
-        channel=channel,
-        executor="CLAWDBOT" if channel == "WHATSAPP" else "WEB",
-    )
-
-    # Advance to UPLOAD_INVOICE
-    advance_step(deal, db)
-
+    deal = deal_actions.request_invoice(db, deal_id, channel=channel)
     db.commit()
-    db.refresh(deal)
-    refreshed = _load_deal(deal.id, db)
+    refreshed = load_deal(deal.id, db)
     return DealActionResponse(success=True, message="Invoice request sent to finance.", deal=DealResponse.model_validate(refreshed))
 
 
@@ -293,23 +193,18 @@ def action_upload_invoice(
     db: Session = Depends(get_db),
     channel: str = "WEB",
 ):
-    deal = _load_deal(deal_id, db)
+    deal = load_deal(deal_id, db)
     if deal.current_step != "UPLOAD_INVOICE":
         raise HTTPException(400, "This action is not available yet.")
 
-    # Save file
+    # Save file (streamed from the upload's spool file)
     deal_dir = os.path.join("finance", deal.id)
-    file_dir = os.path.join(app_config.storage_root, deal_dir)
-    os.makedirs(file_dir, exist_ok=True)
-
     file_ext = file.filename.rsplit(".", 1)[-1] if "." in file.filename else "pdf"
     stored_name = f"invoice_{uuid.uuid4().hex[:8]}.{file_ext}"
     file_path = os.path.join(deal_dir, stored_name)
-    full_path = os.path.join(app_config.storage_root, file_path)
 
-    with open(full_path, "wb") as f:
-        content = file.file.read()
-        f.write(content)
+    get_storage().put(file_path, file.file, content_type=file.content_type)
+    metrics.upload_size.observe(file.size or 0, kind="invoice")
 
     attachment = FinanceAttachment(
         deal_id=deal.id,
@@ -335,13 +230,13 @@ def action_upload_invoice(
 
     db.commit()
     db.refresh(deal)
-    refreshed = _load_deal(deal.id, db)
+    refreshed = load_deal(deal.id, db)
     return DealActionResponse(success=True, message="Invoice uploaded successfully.", deal=DealResponse.model_validate(refreshed))
 
 
 @router.post("/{deal_id}/actions/close", response_model=DealActionResponse)
 def action_close_deal(deal_id: str, db: Session = Depends(get_db)):
-    deal = _load_deal(deal_id, db)
+    deal = load_deal(deal_id, db)
     if deal.current_step != "DEAL_CLOSED":
         raise HTTPException(400, "This deal cannot be closed yet. Please complete all steps.")
 
@@ -354,13 +249,13 @@ def action_close_deal(deal_id: str, db: Session = Depends(get_db)):
     log_action(db, action="PROGRESS_DEAL", summary=f"Deal {deal.deal_code} closed", deal_id=deal.id)
     db.commit()
     db.refresh(deal)
-    refreshed = _load_deal(deal.id, db)
+    refreshed = load_deal(deal.id, db)
     return DealActionResponse(success=True, message="Deal closed successfully.", deal=DealResponse.model_validate(refreshed))
 
 
 @router.post("/{deal_id}/actions/cancel", response_model=DealActionResponse)
 def action_cancel_deal(deal_id: str, data: DealCancelRequest, db: Session = Depends(get_db)):
-    deal = _load_deal(deal_id, db)
+    deal = load_deal(deal_id, db)
     if deal.status == "CANCELLED":
         raise HTTPException(409, "This deal is already cancelled.")
 
@@ -382,7 +277,7 @@ def action_cancel_deal(deal_id: str, data: DealCancelRequest, db: Session = Depe
     )
     db.commit()
     db.refresh(deal)
-    refreshed = _load_deal(deal.id, db)
+    refreshed = load_deal(deal.id, db)
     return DealActionResponse(success=True, message="Deal cancelled.", deal=DealResponse.model_validate(refreshed))
 
 
@@ -397,7 +292,7 @@ def action_emergency_override(
     if channel == "WHATSAPP":
         raise HTTPException(403, "Emergency override is not accessible via WhatsApp.")
 
-    deal = _load_deal(deal_id, db)
+    deal = load_deal(deal_id, db)
     if deal.status in ("CANCELLED", "COMPLETED"):
         raise HTTPException(409, "Cannot override a cancelled or completed deal.")
 
@@ -423,5 +318,5 @@ def action_emergency_override(
     )
     db.commit()
     db.refresh(deal)
-    refreshed = _load_deal(deal.id, db)
+    refreshed = load_deal(deal.id, db)
     return DealActionResponse(success=True, message="Emergency override applied.", deal=DealResponse.model_validate(refreshed))
@@ -0,0 +1,52 @@
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import StreamingResponse
+from sqlalchemy.orm import Session
+
+from app.database import get_db
+from app.models.regeneration_job import DocumentRegenerationJob
+from app.schemas.regeneration import RegenerationJobCreate, RegenerationJobResponse
+from app.services import regeneration
+
+router = APIRouter(prefix="/document-jobs", tags=["Document Jobs"])
+
+
+def _get_job(job_id: str, db: Session) -> DocumentRegenerationJob:
+    job = db.get(DocumentRegenerationJob, job_id)
+    if not job:
+        raise HTTPException(404, "Job not found.")
+    return job
+
+
+@router.post("/regenerate", response_model=RegenerationJobResponse, status_code=202)
+def create_regeneration_job(data: RegenerationJobCreate, db: Session = Depends(get_db)):
+    """Regenerate the latest documents of every deal matching the filters, in the background."""
+    job = regeneration.create_job(db, data)
+    regeneration.start(job.id)
+    return job
+
+
+@router.get("", response_model=list[RegenerationJobResponse])
+def list_jobs(limit: int = 20, db: Session = Depends(get_db)):
+    return db.query(DocumentRegenerationJob).order_by(DocumentRegenerationJob.created_at.desc()).limit(min(limit, 100)).all()
+
+
+@router.get("/{job_id}", response_model=RegenerationJobResponse)
+def get_job(job_id: str, db: Session = Depends(get_db)):
+    return _get_job(job_id, db)
+
+
+@router.get("/{job_id}/progress")
+def stream_job_progress(job_id: str, db: Session = Depends(get_db)):
+    """NDJSON stream of the job's counters; ends when the job stops."""
+    _get_job(job_id, db)
+    return StreamingResponse(regeneration.progress_stream(job_id), media_type="application/x-ndjson")
+
+
+@router.post("/{job_id}/cancel", response_model=RegenerationJobResponse)
+def cancel_job(job_id: str, db: Session = Depends(get_db)):
+    return regeneration.cancel_job(db, _get_job(job_id, db))
+
+
+@router.post("/{job_id}/resume", response_model=RegenerationJobResponse)
+def resume_job(job_id: str, db: Session = Depends(get_db)):
+    return regeneration.resume_job(db, _get_job(job_id, db))
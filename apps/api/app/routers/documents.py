@@ -1,20 +1,21 @@
 import os
+from functools import partial
 
-from fastapi import APIRouter, Depends, HTTPException
-from fastapi.responses import FileResponse
+from fastapi import APIRouter, Depends, Header, HTTPException
 from sqlalchemy.orm import Session, joinedload
 
-from app.database import get_db
+from app.database import get_db, get_read_db
 from app.models.document import Document, DocumentVersion
 from app.schemas.document import DocumentResponse, DocumentVersionResponse
-from app.config import settings
 from app.dependencies.auth import get_current_user, get_current_user_or_token
+from app.services import document_archive, html_store
+from app.services.pdf_renderer import ensure_pdf
 
 router = APIRouter(prefix="/documents", tags=["Documents"])
 
 
 @router.get("", response_model=list[DocumentResponse])
-def list_documents(deal_id: str | None = None, db: Session = Depends(get_db), _user: str = Depends(get_current_user)):
+def list_documents(deal_id: str | None = None, db: Session = Depends(get_read_db), _user: str = Depends(get_current_user)):
     q = db.query(Document).options(joinedload(Document.versions))
     if deal_id:
         q = q.filter(Document.deal_id == deal_id)
@@ -22,7 +23,7 @@ def list_documents(deal_id: str | None = None, db: Session = Depends(get_db), _u
 
 
 @router.get("/{document_id}", response_model=DocumentResponse)
-def get_document(document_id: str, db: Session = Depends(get_db), _user: str = Depends(get_current_user)):
+def get_document(document_id: str, db: Session = Depends(get_read_db), _user: str = Depends(get_current_user)):
     doc = db.query(Document).options(joinedload(Document.versions)).filter(Document.id == document_id).first()
     if not doc:
         raise HTTPException(404, "Document not found.")
@@ -30,7 +31,13 @@ def get_document(document_id: str, db: Session = Depends(get_db), _user: str = D
 
 
 @router.get("/{document_id}/versions/{version_id}/preview")
-def preview_document(document_id: str, version_id: str, db: Session = Depends(get_db), _user: str = Depends(get_current_user_or_token)):
+def preview_document(
+    document_id: str,
+    version_id: str,
+    accept_encoding: str | None = Header(None),
+    db: Session = Depends(get_db),
+    _user: str = Depends(get_current_user_or_token),
+):
     version = db.query(DocumentVersion).filter(
         DocumentVersion.id == version_id,
         DocumentVersion.document_id == document_id,
@@ -38,10 +45,16 @@ def preview_document(document_id: str, version_id: str, db: Session = Depends(ge
     if not version:
         raise HTTPException(404, "Document version not found.")
 
-    full_path = os.path.join(settings.storage_root, version.html_path)
-    if not os.path.exists(full_path):
+    try:
+        if not html_store.is_compressed(version.html_path):
+            return document_archive.file_response(db, version.html_path, "text/html")
+        return html_store.gzip_response(
+            version.html_path, accept_encoding,
+            file_response=partial(document_archive.file_response, db),
+            read=partial(document_archive.read, db),
+        )
+    except FileNotFoundError:
         raise HTTPException(404, "HTML file not found on disk.")
-    return FileResponse(full_path, media_type="text/html")
 
 
 @router.get("/{document_id}/versions/{version_id}/pdf")
@@ -53,10 +66,14 @@ def download_document_pdf(document_id: str, version_id: str, db: Session = Depen
     if not version:
         raise HTTPException(404, "Document version not found.")
 
-    full_path = os.path.join(settings.storage_root, version.pdf_path)
-    if not os.path.exists(full_path):
+    pdf_path = ensure_pdf(db, version)
+    db.commit()
+    if not pdf_path:
+        raise HTTPException(404, "PDF file not found on disk.")
+    try:
+        return document_archive.file_response(db, pdf_path, "application/pdf", filename=os.path.basename(version.pdf_path))
+    except FileNotFoundError:
         raise HTTPException(404, "PDF file not found on disk.")
-    return FileResponse(full_path, media_type="application/pdf", filename=os.path.basename(version.pdf_path))
 
 
 @router.get("/{document_id}/latest/pdf")
@@ -68,7 +85,11 @@ def download_latest_pdf(document_id: str, db: Session = Depends(get_db), _user:
     if not version:
         raise HTTPException(404, "No version found for this document.")
 
-    full_path = os.path.join(settings.storage_root, version.pdf_path)
-    if not os.path.exists(full_path):
+    pdf_path = ensure_pdf(db, version)
+    db.commit()
+    if not pdf_path:
+        raise HTTPException(404, "PDF file not found on disk.")
+    try:
+        return document_archive.file_response(db, pdf_path, "application/pdf", filename=os.path.basename(version.pdf_path))
+    except FileNotFoundError:
         raise HTTPException(404, "PDF file not found on disk.")
-    return FileResponse(full_path, media_type="application/pdf", filename=os.path.basename(version.pdf_path))
@@ -0,0 +1,58 @@
+import mimetypes
+import posixpath
+
+from fastapi import APIRouter, Header, HTTPException
+from fastapi.staticfiles import StaticFiles
+from starlette.datastructures import Headers
+from starlette.exceptions import HTTPException as StarletteHTTPException
+
+from app.services import html_store
+from app.services.profiler import PROFILES_DIR
+from app.services.storage import file_response
+
+# Stored keys under these prefixes have their own authenticated routes
+PRIVATE_PREFIXES = (f"{PROFILES_DIR}/",)
+
+# Stands in for the /files StaticFiles mount when storage is not a local directory
+router = APIRouter(prefix="/files", tags=["Files"])
+
+
+def is_private(key: str) -> bool:
+    return posixpath.normpath(key.replace("\\", "/")).lstrip("/").startswith(PRIVATE_PREFIXES)
+
+
+def _gzip_response(key: str, accept_encoding: str | None):
+    """A stored gzip file, negotiated like the preview; None for other files."""
+    media_type, encoding = mimetypes.guess_type(key)
+    if encoding != "gzip":
+        return None
+    return html_store.gzip_response(key, accept_encoding, media_type or "application/octet-stream")
+
+
+class PublicFiles(StaticFiles):
+    """The /files mount of a local storage directory, without the private prefixes."""
+
+    async def get_response(self, path: str, scope):
+        if is_private(path):
+            raise StarletteHTTPException(404)
+        key = path.replace("\\", "/")
+        try:
+            response = _gzip_response(key, Headers(scope=scope).get("accept-encoding"))
+        except (FileNotFoundError, ValueError):
+            raise StarletteHTTPException(404)
+        return response or await super().get_response(path, scope)
+
+
+@router.get("/{key:path}", include_in_schema=False)
+def get_file(key: str, accept_encoding: str | None = Header(None)):
+    if is_private(key):
+        raise HTTPException(404, "Not Found")
+    try:
+        response = _gzip_response(key, accept_encoding)
+        if response is not None:
+            return response
+        media_type, encoding = mimetypes.guess_type(key)
+        # Other encodings are served as the raw bytes they are stored as
+        return file_response(key, "application/octet-stream" if encoding else media_type or "application/octet-stream")
+    except FileNotFoundError:
+        raise HTTPException(404, "Not Found")
@@ -35,7 +35,7 @@ def test_email():
 
         data = json.dumps(payload).encode("utf-8")
         req = urllib.request.Request(
-            "https://api.resend.com/emails",
+            settings.resend_api_url,
             data=data,
             headers={
                 "Authorization": f"Bearer {settings.resend_api_key}",
@@ -0,0 +1,50 @@
+from fastapi import APIRouter, Depends, Header, HTTPException
+from fastapi.responses import PlainTextResponse
+from fastapi.security import HTTPAuthorizationCredentials
+
+from app.config import settings
+from app.dependencies.auth import get_current_user
+from app.services.db_pool import pool_status
+from app.services.metrics import render_latest
+from app.services.slow_queries import recent_slow_queries
+
+
+def verify_metrics_token(authorization: str | None = Header(None)):
+    """Require ``Bearer <METRICS_TOKEN>`` when a metrics token is configured."""
+    if settings.metrics_token and authorization != f"Bearer {settings.metrics_token}":
+        raise HTTPException(401, "Invalid metrics token.")
+
+
+def verify_diagnostics_access(authorization: str | None = Header(None)):
+    """Accept ``Bearer <METRICS_TOKEN>`` (when one is configured) or a user JWT; reject anything else."""
+    scheme, _, token = (authorization or "").partition(" ")
+    if scheme != "Bearer" or not token:
+        raise HTTPException(401, "Not authenticated")
+    if settings.metrics_token and token == settings.metrics_token:
+        return
+    get_current_user(HTTPAuthorizationCredentials(scheme=scheme, credentials=token))
+
+
+# JSON diagnostics expose SQL and parameters: always authenticated, even without METRICS_TOKEN
+router = APIRouter(prefix="/metrics", tags=["Metrics"], dependencies=[Depends(verify_diagnostics_access)])
+
+# Scraped by Prometheus, which cannot log in; guarded by METRICS_TOKEN instead of a user JWT
+exposition_router = APIRouter(tags=["Metrics"])
+
+
+@exposition_router.get("/metrics", response_class=PlainTextResponse, dependencies=[Depends(verify_metrics_token)])
+def get_prometheus_metrics():
+    """Request, document pipeline, email, upload, audit and DB pool metrics in Prometheus text format."""
+    return PlainTextResponse(render_latest(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+
+@router.get("/db-pool")
+def get_db_pool_metrics():
+    """Connection pool occupancy, configuration and checkout wait-time histograms per engine."""
+    return {"pools": pool_status()}
+
+
+@router.get("/slow-queries")
+def get_slow_queries(limit: int = 50, route: str | None = None):
+    """Most recent statements slower than DB_SLOW_QUERY_MS, with parameters, route and (Postgres) plan."""
+    return {"threshold_ms": settings.db_slow_query_ms, "queries": recent_slow_queries(min(limit, 500), route)}
@@ -0,0 +1,23 @@
+import re
+
+from fastapi import APIRouter, Depends, HTTPException
+
+from app.dependencies.auth import get_admin_user
+from app.services.profiler import PROFILES_DIR
+from app.services.storage import file_response
+
+# Stored request profiles; kept out of /files, they expose code paths
+router = APIRouter(prefix="/profiles", tags=["Profiling"], dependencies=[Depends(get_admin_user)])
+
+_NAME = re.compile(r"[\w-]+\.collapsed")
+
+
+@router.get("/{name}")
+def get_profile(name: str):
+    """Collapsed stacks of a profiled request, by the name returned in ``X-Profile``."""
+    if not _NAME.fullmatch(name):
+        raise HTTPException(404, "Profile not found.")
+    try:
+        return file_response(f"{PROFILES_DIR}/{name}", "text/plain", filename=name)
+    except FileNotFoundError:
+        raise HTTPException(404, "Profile not found.")
@@ -2,42 +2,34 @@ import os
 import uuid
 
 from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form
-from fastapi.responses import FileResponse
 from sqlalchemy.orm import Session, joinedload
 
-from app.database import get_db
+from app.database import get_db, get_read_db
 from app.models.static_document import StaticDocument, StaticDocumentVersion
 from app.schemas.document import StaticDocumentResponse
 from app.services.audit import log_action
-from app.config import settings
+from app.services import metrics
+from app.services.static_documents import get_active_version
+from app.services.storage import file_response, get_storage
 from app.dependencies.auth import get_current_user, get_current_user_or_token
 
 router = APIRouter(prefix="/static-documents", tags=["Static Documents"])
 
 
 @router.get("", response_model=list[StaticDocumentResponse])
-def list_static_documents(db: Session = Depends(get_db), _user: str = Depends(get_current_user)):
+def list_static_documents(db: Session = Depends(get_read_db), _user: str = Depends(get_current_user)):
     return db.query(StaticDocument).options(joinedload(StaticDocument.versions)).all()
 
 
 @router.get("/{doc_type}/active")
 def get_active_static_document(doc_type: str, db: Session = Depends(get_db), _user: str = Depends(get_current_user_or_token)):
     """Get the active version of a static document (CATALOG or PRICELIST)."""
-    doc_type = doc_type.upper()
-    sdoc = db.query(StaticDocument).filter(StaticDocument.doc_type == doc_type).first()
-    if not sdoc or not sdoc.active_version_id:
-        raise HTTPException(404, f"No active {doc_type.lower()} found.")
+    version = get_active_version(db, doc_type)
 
-    version = db.query(StaticDocumentVersion).filter(
-        StaticDocumentVersion.id == sdoc.active_version_id,
-    ).first()
-    if not version:
-        raise HTTPException(404, "Active version record not found.")
-
-    full_path = os.path.join(settings.storage_root, version.file_path)
-    if not os.path.exists(full_path):
+    try:
+        return file_response(version.file_path, "application/pdf", filename=version.file_name)
+    except FileNotFoundError:
         raise HTTPException(404, "File not found on disk.")
-    return FileResponse(full_path, media_type="application/pdf", filename=version.file_name)
 
 
 @router.post("/{doc_type}/upload", response_model=StaticDocumentResponse)
@@ -66,19 +58,14 @@ def upload_static_document(
             max_ver = v.version_no
     new_ver = max_ver + 1
 
-    # Save file
+    # Save file (streamed from the upload's spool file)
     file_dir = os.path.join("static_documents", doc_type.lower())
-    full_dir = os.path.join(settings.storage_root, file_dir)
-    os.makedirs(full_dir, exist_ok=True)
-
     ext = file.filename.rsplit(".", 1)[-1] if "." in file.filename else "pdf"
     stored_name = f"{doc_type.lower()}_v{new_ver}.{ext}"
     file_path = os.path.join(file_dir, stored_name)
-    full_path = os.path.join(settings.storage_root, file_path)
 
-    with open(full_path, "wb") as f:
-        content = file.file.read()
-        f.write(content)
+    get_storage().put(file_path, file.file, content_type=file.content_type)
+    metrics.upload_size.observe(file.size or 0, kind=doc_type.lower())
 
     # Deactivate old versions
     for v in sdoc.versions:
@@ -1,7 +1,7 @@
 from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
 
-from app.database import get_db
+from app.database import get_db, get_async_db, AsyncDB
 from app.models.tenant import Tenant
 from app.schemas.tenant import TenantCreate, TenantUpdate, TenantResponse
 from app.services.audit import log_action
@@ -9,12 +9,7 @@ from app.services.audit import log_action
 router = APIRouter(prefix="/tenants", tags=["Tenants"])
 
 
-@router.get("", response_model=list[TenantResponse])
-def list_tenants(
-    include_archived: bool = False,
-    search: str | None = None,
-    db: Session = Depends(get_db),
-):
+def _query_tenants(db: Session, include_archived: bool, search: str | None) -> list[Tenant]:
     q = db.query(Tenant)
     if not include_archived:
         q = q.filter(Tenant.is_archived == False)
@@ -23,14 +18,27 @@ def list_tenants(
     return q.order_by(Tenant.created_at.desc()).all()
 
 
-@router.get("/{tenant_id}", response_model=TenantResponse)
-def get_tenant(tenant_id: str, db: Session = Depends(get_db)):
+def _get_tenant(db: Session, tenant_id: str) -> Tenant:
     tenant = db.query(Tenant).filter(Tenant.id == tenant_id).first()
     if not tenant:
         raise HTTPException(404, "Tenant not found.")
     return tenant
 
 
+@router.get("", response_model=list[TenantResponse])
+async def list_tenants(
+    include_archived: bool = False,
+    search: str | None = None,
+    db: AsyncDB = Depends(get_async_db),
+):
+    return await db.run_sync(_query_tenants, include_archived, search)
+
+
+@router.get("/{tenant_id}", response_model=TenantResponse)
+async def get_tenant(tenant_id: str, db: AsyncDB = Depends(get_async_db)):
+    return await db.run_sync(_get_tenant, tenant_id)
+
+
 @router.post("", response_model=TenantResponse, status_code=201)
 def create_tenant(data: TenantCreate, db: Session = Depends(get_db)):
     tenant = Tenant(**data.model_dump())
@@ -1,7 +1,7 @@
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
 
-from app.database import get_db
+from app.database import get_db, get_async_db, AsyncDB
 from app.models.unit import Unit
 from app.models.deal import Deal
 from app.schemas.unit import UnitCreate, UnitUpdate, UnitResponse
@@ -10,22 +10,30 @@ from app.services.audit import log_action
 router = APIRouter(prefix="/units", tags=["Units"])
 
 
-@router.get("", response_model=list[UnitResponse])
-def list_units(status: str | None = None, db: Session = Depends(get_db)):
+def _query_units(db: Session, status: str | None) -> list[Unit]:
     q = db.query(Unit)
     if status:
         q = q.filter(Unit.status == status)
     return q.order_by(Unit.unit_code).all()
 
 
-@router.get("/{unit_id}", response_model=UnitResponse)
-def get_unit(unit_id: str, db: Session = Depends(get_db)):
+def _get_unit(db: Session, unit_id: str) -> Unit:
     unit = db.query(Unit).filter(Unit.id == unit_id).first()
     if not unit:
         raise HTTPException(404, "Unit not found.")
     return unit
 
 
+@router.get("", response_model=list[UnitResponse])
+async def list_units(status: str | None = None, db: AsyncDB = Depends(get_async_db)):
+    return await db.run_sync(_query_units, status)
+
+
+@router.get("/{unit_id}", response_model=UnitResponse)
+async def get_unit(unit_id: str, db: AsyncDB = Depends(get_async_db)):
+    return await db.run_sync(_get_unit, unit_id)
+
+
 @router.post("", response_model=UnitResponse, status_code=201)
 def create_unit(data: UnitCreate, db: Session = Depends(get_db)):
     existing = db.query(Unit).filter(Unit.unit_code == data.unit_code).first()
@@ -1,16 +1,24 @@
-"""OpenClaw/ClawdBot webhook integration stub.
+"""OpenClaw/ClawdBot webhook integration.
 
-All bot commands go through this endpoint, which internally calls
-the same deal action logic. Audit logs correctly record channel=WHATSAPP
+All bot commands go through this endpoint, which dispatches straight into
+the same deal action services the web routers use (see
+app/services/bot_commands.py). Audit logs correctly record channel=WHATSAPP
 and executor=CLAWDBOT.
+
+With ``?mode=async`` (or ``Prefer: respond-async``) the command is persisted to
+the webhook inbox and 202 is returned at once; the result is delivered to the
+configured callback URL when a worker has run it.
 """
 from fastapi import APIRouter, Depends, HTTPException, Header
+from fastapi.responses import JSONResponse
 from sqlalchemy.orm import Session
 
 from app.database import get_db
 from app.config import settings
-from app.schemas.webhook import WebhookCommand, WebhookResponse
-from app.services.audit import log_action
+from app.models.webhook_inbox import WebhookInboxItem
+from app.schemas.webhook import WebhookCommand, WebhookResponse, WebhookAcceptedResponse, WebhookInboxStatus
+from app.services import webhook_inbox
+from app.services.bot_commands import process_command
 
 router = APIRouter(prefix="/integrations/openclaw", tags=["OpenClaw Integration"])
 
@@ -22,82 +30,48 @@ def verify_bot_token(authorization: str = Header(...)):
         raise HTTPException(401, "Invalid service token.")
 
 
-@router.post("/webhook", response_model=WebhookResponse, dependencies=[Depends(verify_bot_token)])
-def handle_webhook(cmd: WebhookCommand, db: Session = Depends(get_db)):
+@router.post(
+    "/webhook",
+    response_model=WebhookResponse,
+    responses={202: {"model": WebhookAcceptedResponse}},
+    dependencies=[Depends(verify_bot_token)],
+)
+def handle_webhook(
+    cmd: WebhookCommand,
+    db: Session = Depends(get_db),
+    mode: str = "sync",
+    idempotency_key: str | None = Header(None),
+    prefer: str | None = Header(None),
+):
     """
     Process a bot command. Supported commands:
-    - create_deal
-    - generate_document
-    - request_invoice
-    - get_deal_status
+    - create_deal (tenant_id, unit_id; params: term_type, start_date, end_date, currency)
+    - generate_document (deal_id)
+    - request_invoice (deal_id)
+    - get_deal_status (deal_id)
     - get_catalog
     - get_pricelist
 
-    This is a stub — it validates the token, logs the command,
-    and returns a structured response. The real integration would
-    call the same internal service functions.
+    In sync mode, errors from the underlying actions surface as the same HTTP
+    errors the deals endpoints return. In async mode they are reported in the
+    callback payload instead.
     """
-    log_action(
-        db,
-        action="PROGRESS_DEAL" if cmd.command.startswith("generate") else "UPDATE_DEAL",
-        summary=f"Bot command received: {cmd.command}",
-        deal_id=cmd.deal_id,
-        channel="WHATSAPP",
-        executor="CLAWDBOT",
-        metadata={"command": cmd.command, "params": cmd.params},
-    )
-
-    # Route commands
-    if cmd.command == "create_deal":
-        db.commit()
-        return WebhookResponse(
-            success=True,
-            message="Deal creation command received. Use POST /deals with channel=WHATSAPP for full implementation.",
-            data={"command": cmd.command},
-        )
-
-    elif cmd.command == "generate_document":
-        if not cmd.deal_id:
-            raise HTTPException(400, "deal_id is required for document generation.")
-        db.commit()
-        return WebhookResponse(
-            success=True,
-            message="Document generation command received. Use POST /deals/{id}/actions/generate-document?channel=WHATSAPP.",
-            data={"command": cmd.command, "deal_id": cmd.deal_id},
-        )
+    key = idempotency_key or cmd.idempotency_key
 
-    elif cmd.command == "request_invoice":
-        if not cmd.deal_id:
-            raise HTTPException(400, "deal_id is required for invoice request.")
-        db.commit()
-        return WebhookResponse(
-            success=True,
-            message="Invoice request command received. Use POST /deals/{id}/actions/request-invoice?channel=WHATSAPP.",
-            data={"command": cmd.command, "deal_id": cmd.deal_id},
-        )
+    if mode == "async" or (prefer and "respond-async" in prefer):
+        item = webhook_inbox.enqueue(db, cmd, key)
+        if webhook_inbox.worker_pool:
+            webhook_inbox.worker_pool.notify()
+        accepted = WebhookAcceptedResponse(inbox_id=item.id, status=item.status)
+        return JSONResponse(status_code=202, content=accepted.model_dump())
 
-    elif cmd.command == "get_deal_status":
-        if not cmd.deal_id:
-            raise HTTPException(400, "deal_id is required.")
-        db.commit()
-        return WebhookResponse(
-            success=True,
-            message="Deal status query received. Use GET /deals/{id}/journey.",
-            data={"command": cmd.command, "deal_id": cmd.deal_id},
-        )
+    return process_command(db, cmd, key)
 
-    elif cmd.command in ("get_catalog", "get_pricelist"):
-        doc_type = "catalog" if cmd.command == "get_catalog" else "pricelist"
-        db.commit()
-        return WebhookResponse(
-            success=True,
-            message=f"Use GET /static-documents/{doc_type}/active to retrieve the file.",
-            data={"command": cmd.command},
-        )
 
-    else:
-        db.commit()
-        return WebhookResponse(
-            success=False,
-            message=f"Unknown command: {cmd.command}",
-        )
+@router.get("/inbox/{item_id}", response_model=WebhookInboxStatus, dependencies=[Depends(verify_bot_token)])
+def get_inbox_item(item_id: str, db: Session = Depends(get_db)):
+    """Poll the status of a command accepted in async mode."""
+    item = db.get(WebhookInboxItem, item_id)
+    if not item:
+        raise HTTPException(404, "Inbox item not found.")
+    return item
@@ -7,6 +7,7 @@ class DocumentVersionResponse(BaseModel):
     version_no: int
     html_path: str
     pdf_path: str
+    pdf_status: str
     channel: str
     is_latest: bool
     generated_at: datetime
@@ -0,0 +1,30 @@
+from datetime import date, datetime
+
+from pydantic import BaseModel
+
+
+class RegenerationJobCreate(BaseModel):
+    # Deal filters; unset means "any"
+    statuses: list[str] | None = None
+    doc_types: list[str] | None = None
+    created_from: date | None = None
+    created_to: date | None = None
+
+
+class RegenerationJobResponse(BaseModel):
+    id: str
+    status: str
+    filters: dict
+    total_deals: int
+    processed_deals: int
+    failed_deals: int
+    regenerated_documents: int
+    cursor: str | None
+    errors: list | None
+    error: str | None
+    created_at: datetime
+    started_at: datetime | None
+    heartbeat_at: datetime | None
+    finished_at: datetime | None
+
+    model_config = {"from_attributes": True}
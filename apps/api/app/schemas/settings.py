@@ -16,9 +16,11 @@ class SettingsResponse(BaseModel):
     company_legal_name: str
     company_address: str
     logo_path: str | None
+    logo_render_path: str | None
     signatory_name: str
     signatory_title: str
     signature_image_path: str | None
+    signature_render_path: str | None
     finance_email: str
     bot_whatsapp_number: str
     updated_at: datetime
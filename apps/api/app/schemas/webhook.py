@@ -1,15 +1,57 @@
-from pydantic import BaseModel
+from datetime import datetime
+
+from pydantic import BaseModel, Field, model_validator
+
+MAX_BATCH_COMMANDS = 20
 
 
 class WebhookCommand(BaseModel):
-    command: str
+    command: str | None = None
     deal_id: str | None = None
     tenant_id: str | None = None
     unit_id: str | None = None
     params: dict | None = None
+    # One key per WhatsApp message; retries with the same key replay the stored response
+    idempotency_key: str | None = None
+    # Batch form: several commands executed in one session. Sub-commands inherit
+    # deal_id, tenant_id and unit_id from the batch when they leave them unset.
+    commands: list["WebhookCommand"] | None = Field(None, max_length=MAX_BATCH_COMMANDS)
+
+    @model_validator(mode="after")
+    def _command_or_batch(self):
+        if bool(self.command) == bool(self.commands):
+            raise ValueError("Provide either 'command' or a non-empty 'commands' list.")
+        for sub in self.commands or []:
+            if sub.commands:
+                raise ValueError("Batched commands cannot be nested.")
+        return self
 
 
 class WebhookResponse(BaseModel):
     success: bool
     message: str
     data: dict | None = None
+    replayed: bool = False
+    # Per-command results for a batch, in request order
+    results: list["WebhookResponse"] | None = None
+
+
+class WebhookAcceptedResponse(BaseModel):
+    accepted: bool = True
+    inbox_id: str
+    status: str
+
+
+class WebhookInboxStatus(BaseModel):
+    id: str
+    command: str
+    deal_id: str | None
+    status: str
+    attempts: int
+    result_json: dict | None
+    error: str | None
+    created_at: datetime
+    finished_at: datetime | None
+    delivered_at: datetime | None
+
+    model_config = {"from_attributes": True}
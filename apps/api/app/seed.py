@@ -4,7 +4,6 @@ Seed script — run after migrations to populate initial data.
 Usage: python -m app.seed
 """
 import os
-import shutil
 import uuid
 from datetime import date, datetime, timezone
 from decimal import Decimal
@@ -18,15 +17,15 @@ from app.models.unit import Unit
 from app.models.deal import Deal
 from app.models.static_document import StaticDocument, StaticDocumentVersion
 from app.config import settings
+from app.services import image_assets, settings_cache
+from app.services.storage import get_storage
 
 
 def _copy_initial_asset(src_filename: str, dest_rel_path: str) -> str:
-    """Copy a file from initial_asset/ to storage/ and return relative path."""
+    """Copy a file from initial_asset/ into storage and return relative path."""
     src = os.path.join(settings.initial_asset_path, src_filename)
-    dest = os.path.join(settings.storage_root, dest_rel_path)
-    os.makedirs(os.path.dirname(dest), exist_ok=True)
     if os.path.exists(src):
-        shutil.copy2(src, dest)
+        get_storage().put_file(dest_rel_path, src)
         print(f"  Copied: {src_filename} → {dest_rel_path}")
     else:
         print(f"  WARNING: Source not found: {src}")
@@ -54,6 +53,7 @@ def seed():
                 finance_email="finance@example.com",
                 bot_whatsapp_number="+62800000000",
             )
+            image_assets.backfill_render_variants(s)
             db.add(s)
             db.flush()
             print(f"  Settings created (id={s.id})")
@@ -157,6 +157,8 @@ def seed():
             print(f"  Deal created: {deal.deal_code} (id={deal.id})")
 
         db.commit()
+        # Running API workers reload settings on their next stamp check
+        settings_cache.invalidate()
         print("\nSeed completed successfully!")
 
     except Exception as e:
@@ -2,6 +2,7 @@
 from sqlalchemy.orm import Session
 
 from app.models.audit_log import AuditLog
+from app.services import metrics
 
 
 def log_action(
@@ -25,4 +26,26 @@ def log_action(
     )
     db.add(entry)
     db.flush()
+    metrics.audit_writes.inc(action=action)
     return entry
+
+
+def log_actions(db: Session, entries: list[dict]) -> list[AuditLog]:
+    """Append several audit entries with a single flush. Each entry takes log_action's keyword arguments."""
+    rows = [
+        AuditLog(
+            deal_id=entry.get("deal_id"),
+            actor="ADMIN",
+            channel=entry.get("channel", "WEB"),
+            executor=entry.get("executor", "WEB"),
+            action=entry["action"],
+            summary=entry["summary"],
+            metadata_json=entry.get("metadata"),
+        )
+        for entry in entries
+    ]
+    db.add_all(rows)
+    db.flush()
+    for row in rows:
+        metrics.audit_writes.inc(action=row.action)
+    return rows
@@ -0,0 +1,231 @@
+"""Bot command execution — shared by the OpenClaw webhook and the inbox workers.
+
+Each WhatsApp message carries an idempotency key. The key is claimed in the
+same transaction as the action, so a retry from the bot platform replays the
+stored response instead of running the action twice.
+"""
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable
+
+from fastapi import HTTPException
+from pydantic import ValidationError
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.database import SessionLocal
+from app.models.webhook_idempotency import WebhookIdempotencyKey
+from app.schemas.deal import DealCreate, DealResponse
+from app.schemas.webhook import WebhookCommand, WebhookResponse
+from app.services import deal_actions
+from app.services.audit import log_action, log_actions
+from app.services.static_documents import get_active_version
+
+BOT_CHANNEL = "WHATSAPP"
+
+# Commands that never write; batches made only of these run concurrently
+READ_ONLY_COMMANDS = {"get_deal_status", "get_catalog", "get_pricelist"}
+
+_read_pool = ThreadPoolExecutor(max_workers=settings.webhook_batch_concurrency, thread_name_prefix="bot-read")
+
+
+def _require_deal_id(cmd: WebhookCommand) -> str:
+    if not cmd.deal_id:
+        raise HTTPException(400, f"deal_id is required for {cmd.command}.")
+    return cmd.deal_id
+
+
+def _deal_data(db: Session, deal_id: str) -> dict:
+    deal = deal_actions.load_deal(deal_id, db)
+    return DealResponse.model_validate(deal).model_dump(mode="json")
+
+
+def _cmd_create_deal(db: Session, cmd: WebhookCommand) -> WebhookResponse:
+    try:
+        data = DealCreate.model_validate({
+            **(cmd.params or {}),
+            "tenant_id": cmd.tenant_id,
+            "unit_id": cmd.unit_id,
+        })
+    except ValidationError as e:
+        raise HTTPException(422, f"Invalid create_deal parameters: {e.errors(include_url=False)}")
+    deal = deal_actions.create_deal(db, data, channel=BOT_CHANNEL)
+    return WebhookResponse(
+        success=True,
+        message=f"Deal {deal.deal_code} created.",
+        data={"deal": _deal_data(db, deal.id)},
+    )
+
+
+def _cmd_generate_document(db: Session, cmd: WebhookCommand) -> WebhookResponse:
+    deal, version = deal_actions.generate_next_document(db, _require_deal_id(cmd), channel=BOT_CHANNEL)
+    return WebhookResponse(
+        success=True,
+        message="Document generated successfully.",
+        data={
+            "deal": _deal_data(db, deal.id),
+            "document": {
+                "document_id": version.document_id,
+                "version_id": version.id,
+                "doc_type": version.document.doc_type,
+                "version_no": version.version_no,
+            },
+        },
+    )
+
+
+def _cmd_request_invoice(db: Session, cmd: WebhookCommand) -> WebhookResponse:
+    deal = deal_actions.request_invoice(db, _require_deal_id(cmd), channel=BOT_CHANNEL)
+    return WebhookResponse(
+        success=True,
+        message="Invoice request sent to finance.",
+        data={"deal": _deal_data(db, deal.id)},
+    )
+
+
+def _cmd_get_deal_status(db: Session, cmd: WebhookCommand) -> WebhookResponse:
+    journey = deal_actions.get_deal_journey(_require_deal_id(cmd), db)
+    return WebhookResponse(success=True, message="Deal status retrieved.", data=journey)
+
+
+def _static_document_command(doc_type: str) -> Callable[[Session, WebhookCommand], WebhookResponse]:
+    def handler(db: Session, cmd: WebhookCommand) -> WebhookResponse:
+        version = get_active_version(db, doc_type)
+        return WebhookResponse(
+            success=True,
+            message=f"Active {doc_type.lower()} retrieved.",
+            data={
+                "doc_type": doc_type,
+                "version_no": version.version_no,
+                "file_name": version.file_name,
+                "download_path": f"/static-documents/{doc_type.lower()}/active",
+            },
+        )
+    return handler
+
+
+COMMAND_HANDLERS: dict[str, Callable[[Session, WebhookCommand], WebhookResponse]] = {
+    "create_deal": _cmd_create_deal,
+    "generate_document": _cmd_generate_document,
+    "request_invoice": _cmd_request_invoice,
+    "get_deal_status": _cmd_get_deal_status,
+    "get_catalog": _static_document_command("CATALOG"),
+    "get_pricelist": _static_document_command("PRICELIST"),
+}
+
+
+def _replay(db: Session, key: str) -> WebhookResponse | None:
+    record = db.get(WebhookIdempotencyKey, key)
+    if not record:
+        return None
+    return WebhookResponse(**{**record.response_json, "replayed": True})
+
+
+def _receipt_entry(cmd: WebhookCommand) -> dict:
+    return {
+        "action": "PROGRESS_DEAL" if cmd.command.startswith("generate") else "UPDATE_DEAL",
+        "summary": f"Bot command received: {cmd.command}",
+        "deal_id": cmd.deal_id,
+        "channel": BOT_CHANNEL,
+        "executor": "CLAWDBOT",
+        "metadata": {"command": cmd.command, "params": cmd.params},
+    }
+
+
+def _dispatch(db: Session, cmd: WebhookCommand) -> WebhookResponse:
+    handler = COMMAND_HANDLERS.get(cmd.command)
+    if not handler:
+        return WebhookResponse(success=False, message=f"Unknown command: {cmd.command}")
+    return handler(db, cmd)
+
+
+def _failure(e: HTTPException) -> WebhookResponse:
+    return WebhookResponse(success=False, message=str(e.detail), data={"status_code": e.status_code})
+
+
+def execute_command(db: Session, cmd: WebhookCommand) -> WebhookResponse:
+    """Log and dispatch a single bot command. Flushes but does not commit."""
+    log_action(db, **_receipt_entry(cmd))
+    return _dispatch(db, cmd)
+
+
+def _run_read_only(cmd: WebhookCommand) -> WebhookResponse:
+    """Run a read-only command on its own short-lived session (batch worker thread)."""
+    db = SessionLocal()
+    try:
+        return _dispatch(db, cmd)
+    except HTTPException as e:
+        return _failure(e)
+    finally:
+        db.close()
+
+
+def execute_batch(db: Session, batch: WebhookCommand) -> WebhookResponse:
+    """Log and run a batch of bot commands. Flushes but does not commit.
+
+    Receipts for the whole batch are written with one audit flush. A batch of
+    read-only queries (the typical status/catalog/pricelist burst) runs
+    concurrently; once a batch contains a write, every command runs in order
+    on the request session so later reads see earlier writes. Each write runs
+    in a savepoint, so one failing command does not undo the others.
+    """
+    inherited = batch.model_dump(include={"deal_id", "tenant_id", "unit_id"}, exclude_none=True)
+    commands = [
+        sub.model_copy(update={k: v for k, v in inherited.items() if getattr(sub, k) is None})
+        for sub in batch.commands
+    ]
+    log_actions(db, [_receipt_entry(c) for c in commands])
+
+    if all(c.command in READ_ONLY_COMMANDS for c in commands):
+        # Each worker runs in a copy of the request context, so its queries count toward this request's stats
+        futures = [_read_pool.submit(contextvars.copy_context().run, _run_read_only, c) for c in commands]
+        results = [f.result() for f in futures]
+    else:
+        results = []
+        for c in commands:
+            savepoint = db.begin_nested()
+            try:
+                results.append(_dispatch(db, c))
+                savepoint.commit()
+            except HTTPException as e:
+                savepoint.rollback()
+                results.append(_failure(e))
+
+    succeeded = sum(1 for r in results if r.success)
+    return WebhookResponse(
+        success=succeeded == len(results),
+        message=f"{succeeded} of {len(results)} commands succeeded.",
+        results=results,
+    )
+
+
+def process_command(db: Session, cmd: WebhookCommand, key: str | None = None) -> WebhookResponse:
+    """Run a bot command under its idempotency key and commit.
+
+    Errors from the underlying actions propagate as HTTPException and are not
+    recorded against the key, so a corrected retry can still succeed.
+    """
+    if key:
+        cached = _replay(db, key)
+        if cached:
+            return cached
+        # Claim the key first: a concurrent retry blocks on the unique key
+        # until this transaction finishes, then replays instead of re-running.
+        record = WebhookIdempotencyKey(key=key, command=cmd.command or "batch", deal_id=cmd.deal_id, response_json={})
+        db.add(record)
+        try:
+            db.flush()
+        except IntegrityError:
+            db.rollback()
+            cached = _replay(db, key)
+            if cached:
+                return cached
+            raise HTTPException(409, "A command with this idempotency key is already being processed.")
+
+    response = execute_batch(db, cmd) if cmd.commands else execute_command(db, cmd)
+
+    if key:
+        record.response_json = response.model_dump(mode="json", exclude={"replayed"})
+    db.commit()
+    return response
@@ -0,0 +1,180 @@
+"""Connection pool tuning and observability.
+
+Engines are built with an instrumented QueuePool that times every checkout
+(including the wait for a free connection), keeps a wait-time histogram and
+logs slow checkouts. The pre-ping strategy is configurable:
+
+- ``always`` — SQLAlchemy's pool_pre_ping (a ``SELECT 1`` on every checkout)
+- ``idle``   — ping only connections idle longer than DB_POOL_PRE_PING_IDLE_SECONDS
+- ``never``  — rely on pool_recycle alone
+"""
+import logging
+import threading
+import time
+from bisect import bisect_left
+
+from sqlalchemy import event, exc
+from sqlalchemy.engine import Engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+WAIT_BUCKETS_MS = (1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+
+
+class PoolStats:
+    """Thread-safe checkout counters and wait-time histogram for one pool."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.slow_checkouts = 0
+        self.timeouts = 0
+        self.pings = 0
+        self.wait_ms_sum = 0.0
+        self.wait_buckets = [0] * (len(WAIT_BUCKETS_MS) + 1)
+
+    def observe_checkout(self, wait_ms: float) -> None:
+        with self._lock:
+            self.checkouts += 1
+            self.wait_ms_sum += wait_ms
+            self.wait_buckets[bisect_left(WAIT_BUCKETS_MS, wait_ms)] += 1
+            if wait_ms >= settings.db_slow_checkout_ms:
+                self.slow_checkouts += 1
+
+    def observe_timeout(self) -> None:
+        with self._lock:
+            self.timeouts += 1
+
+    def observe_ping(self) -> None:
+        with self._lock:
+            self.pings += 1
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            cumulative, buckets = 0, []
+            for bound, count in zip((*WAIT_BUCKETS_MS, "+Inf"), self.wait_buckets):
+                cumulative += count
+                buckets.append({"le": bound, "count": cumulative})
+            return {
+                "checkouts": self.checkouts,
+                "slow_checkouts": self.slow_checkouts,
+                "timeouts": self.timeouts,
+                "pings": self.pings,
+                "wait_ms_sum": round(self.wait_ms_sum, 3),
+                "wait_ms_histogram": buckets,
+            }
+
+
+class _InstrumentedPoolMixin:
+    stats: PoolStats | None = None
+
+    def connect(self):
+        start = time.perf_counter()
+        try:
+            conn = super().connect()
+        except exc.TimeoutError:
+            if self.stats:
+                self.stats.observe_timeout()
+            logger.warning(
+                "DB pool '%s' checkout timed out after %.0f ms (checked_out=%d, overflow=%d)",
+                self.stats.name if self.stats else "?", (time.perf_counter() - start) * 1000,
+                self.checkedout(), self.overflow(),
+            )
+            raise
+        wait_ms = (time.perf_counter() - start) * 1000
+        if self.stats:
+            self.stats.observe_checkout(wait_ms)
+            if wait_ms >= settings.db_slow_checkout_ms:
+                logger.warning(
+                    "Slow DB pool checkout on '%s': %.1f ms (checked_out=%d, overflow=%d, size=%d)",
+                    self.stats.name, wait_ms, self.checkedout(), self.overflow(), self.size(),
+                )
+        return conn
+
+    def recreate(self):
+        # Engine.dispose() swaps in a fresh pool; keep the same stats object
+        new_pool = super().recreate()
+        new_pool.stats = self.stats
+        return new_pool
+
+
+class InstrumentedQueuePool(_InstrumentedPoolMixin, QueuePool):
+    pass
+
+
+class InstrumentedAsyncQueuePool(_InstrumentedPoolMixin, AsyncAdaptedQueuePool):
+    pass
+
+
+def engine_kwargs(url: str, is_async: bool = False) -> dict:
+    """create_engine keyword arguments for the configured pool sizing and pre-ping strategy."""
+    if url.startswith("sqlite") and (":memory:" in url or url.rstrip("/").endswith(":")):
+        # In-memory SQLite needs its single-connection pool
+        return {}
+    return {
+        "poolclass": InstrumentedAsyncQueuePool if is_async else InstrumentedQueuePool,
+        "pool_size": settings.db_pool_size,
+        "max_overflow": settings.db_max_overflow,
+        "pool_timeout": settings.db_pool_timeout,
+        "pool_recycle": settings.db_pool_recycle,
+        "pool_pre_ping": settings.db_pool_pre_ping == "always",
+    }
+
+
+_instrumented: dict[str, Engine] = {}
+
+
+def instrument_engine(name: str, engine: Engine) -> None:
+    """Attach stats and the idle pre-ping hook to an engine's pool (sync engine or AsyncEngine.sync_engine)."""
+    pool = engine.pool
+    if not isinstance(pool, _InstrumentedPoolMixin):
+        return
+    pool.stats = PoolStats(name)
+    _instrumented[name] = engine
+
+    if settings.db_pool_pre_ping == "idle":
+        @event.listens_for(engine, "checkin")
+        def _mark_idle(dbapi_connection, connection_record):
+            connection_record.info["checked_in_at"] = time.monotonic()
+
+        @event.listens_for(engine, "checkout")
+        def _ping_if_idle(dbapi_connection, connection_record, connection_proxy):
+            checked_in_at = connection_record.info.get("checked_in_at")
+            if checked_in_at is None or time.monotonic() - checked_in_at < settings.db_pool_pre_ping_idle_seconds:
+                return
+            engine.pool.stats.observe_ping()
+            cursor = dbapi_connection.cursor()
+            try:
+                cursor.execute("SELECT 1")
+            except Exception:
+                # The pool discards this connection and retries with a fresh one
+                raise exc.DisconnectionError()
+            finally:
+                cursor.close()
+
+
+def pool_status() -> list[dict]:
+    """Current occupancy, configuration and checkout stats of every instrumented pool."""
+    result = []
+    for name, engine in _instrumented.items():
+        pool = engine.pool
+        result.append({
+            "name": name,
+            "config": {
+                "pool_size": pool.size(),
+                "max_overflow": settings.db_max_overflow,
+                "pool_timeout": settings.db_pool_timeout,
+                "pool_recycle": settings.db_pool_recycle,
+                "pre_ping": settings.db_pool_pre_ping,
+            },
+            "checked_out": pool.checkedout(),
+            "checked_in": pool.checkedin(),
+            # QueuePool counts overflow from -pool_size; only positive values are real overflow
+            "overflow": max(0, pool.overflow()),
+            **pool.stats.snapshot(),
+        })
+    return result
@@ -0,0 +1,221 @@
+"""Deal action service — shared by the deals router and the bot webhook.
+
+Functions here flush but never commit; the caller owns the transaction so
+that extra rows (e.g. webhook idempotency records) land atomically with the
+action itself.
+"""
+from datetime import datetime, timezone
+
+from fastapi import HTTPException
+from sqlalchemy import Integer, cast, func
+from sqlalchemy.orm import Session, joinedload
+
+from app.config import settings
+from app.models.deal import DEAL_CODE_SEQUENCE, Deal
+from app.models.document import Document, DocumentVersion
+from app.models.unit import Unit
+from app.schemas.deal import DealCreate
+from app.services.audit import log_action
+from app.services.document_generator import generate_document
+from app.services.email import send_invoice_request_email
+from app.services.journey import get_journey_steps, get_journey_status, advance_step, STEP_DOCUMENT_MAP
+from app.services.pdf_renderer import ensure_pdf
+from app.services.settings_cache import get_app_settings
+
+TERM_PRICE_MAP = {
+    "DAILY": "daily_price",
+    "MONTHLY": "monthly_price",
+    "SIX_MONTHS": "six_month_price",
+    "TWELVE_MONTHS": "twelve_month_price",
+}
+
+
+def _executor_for(channel: str) -> str:
+    return "CLAWDBOT" if channel == "WHATSAPP" else "WEB"
+
+
+DEAL_CODE_PREFIX = "NEST-"
+
+
+def _generate_deal_code(db: Session) -> str:
+    """Next NEST-<n> code. A sequence on PostgreSQL, so concurrent creates never collide."""
+    if db.get_bind().dialect.name == "postgresql":
+        number = db.execute(DEAL_CODE_SEQUENCE.next_value()).scalar_one()
+    else:
+        # Dev and tests on SQLite
+        highest = (
+            db.query(func.max(cast(func.substr(Deal.deal_code, len(DEAL_CODE_PREFIX) + 1), Integer)))
+            .filter(Deal.deal_code.like(f"{DEAL_CODE_PREFIX}%"))
+            .scalar()
+        )
+        number = (highest or 0) + 1
+    return f"{DEAL_CODE_PREFIX}{number:05d}"
+
+
+def load_deal(deal_id: str, db: Session) -> Deal:
+    deal = db.query(Deal).options(
+        joinedload(Deal.tenant),
+        joinedload(Deal.unit),
+    ).filter(Deal.id == deal_id).first()
+    if not deal:
+        raise HTTPException(404, "Deal not found.")
+    return deal
+
+
+def get_unit_price(unit: Unit, term_type: str):
+    """Get the unit price based on term type."""
+    price_field = TERM_PRICE_MAP.get(term_type)
+    if not price_field:
+        raise HTTPException(400, f"Invalid term type: {term_type}")
+    price = getattr(unit, price_field, None)
+    if price is None:
+        raise HTTPException(400, f"Unit {unit.unit_code} does not have a {term_type.lower().replace('_', ' ')} price configured.")
+    return price
+
+
+def get_deal_journey(deal_id: str, db: Session) -> dict:
+    deal = load_deal(deal_id, db)
+    return {
+        "deal_id": deal.id,
+        "term_type": deal.term_type,
+        "current_step": deal.current_step,
+        "status": deal.status,
+        "steps": get_journey_status(deal, db),
+    }
+
+
+def create_deal(db: Session, data: DealCreate, channel: str = "WEB") -> Deal:
+    """Create a deal, reserve its unit and advance past SELECT_UNIT."""
+    # Validate unit exists and is available
+    unit = db.query(Unit).filter(Unit.id == data.unit_id).first()
+    if not unit:
+        raise HTTPException(404, "Unit not found.")
+    if unit.status != "AVAILABLE":
+        raise HTTPException(409, "This unit is not available for booking.")
+
+    # Auto-set initial_price from unit pricing
+    initial_price = get_unit_price(unit, data.term_type)
+
+    deal_code = _generate_deal_code(db)
+    deal = Deal(
+        deal_code=deal_code,
+        tenant_id=data.tenant_id,
+        unit_id=data.unit_id,
+        term_type=data.term_type,
+        start_date=data.start_date,
+        end_date=data.end_date,
+        initial_price=initial_price,
+        currency=data.currency,
+    )
+    # First step is SELECT_UNIT which is done by creating the deal
+    deal.current_step = "SELECT_UNIT"
+    deal.status = "DRAFT"
+    db.add(deal)
+
+    # Reserve the unit
+    unit.status = "RESERVED"
+
+    log_action(
+        db,
+        action="CREATE_DEAL",
+        summary=f"Created deal {deal_code}",
+        deal_id=deal.id,
+        channel=channel,
+        executor=_executor_for(channel),
+    )
+
+    # Auto-advance past SELECT_UNIT since unit is selected by creating the deal
+    steps = get_journey_steps(deal.term_type)
+    if len(steps) > 1:
+        deal.current_step = steps[1]
+        deal.status = "IN_PROGRESS"
+
+    db.flush()
+    return deal
+
+
+def generate_next_document(db: Session, deal_id: str, channel: str = "WEB") -> tuple[Deal, DocumentVersion]:
+    """Generate the document required by the deal's current step and advance the journey."""
+    deal = load_deal(deal_id, db)
+    if deal.status in ("CANCELLED", "COMPLETED"):
+        raise HTTPException(409, "This deal cannot be progressed.")
+
+    current_step = deal.current_step
+    if current_step not in STEP_DOCUMENT_MAP:
+        raise HTTPException(400, "The current step does not require document generation.")
+
+    # If no deal_price set at document generation, use initial_price as deal_price
+    if current_step in ("FINALIZE_LOO", "GENERATE_BOOKING_CONFIRMATION") and deal.deal_price is None:
+        deal.deal_price = deal.initial_price
+
+    doc_type = STEP_DOCUMENT_MAP[current_step]
+    version = generate_document(db, deal, doc_type, channel=channel)
+
+    log_action(
+        db,
+        action="GENERATE_DOCUMENT",
+        summary=f"Generated {doc_type} v{version.version_no} for deal {deal.deal_code}",
+        deal_id=deal.id,
+        channel=channel,
+        executor=_executor_for(channel),
+    )
+
+    # Advance to next step
+    advance_step(deal, db)
+    log_action(
+        db,
+        action="PROGRESS_DEAL",
+        summary=f"Advanced deal {deal.deal_code} to step: {deal.current_step}",
+        deal_id=deal.id,
+        channel=channel,
+        executor=_executor_for(channel),
+    )
+    return deal, version
+
+
+def request_invoice(db: Session, deal_id: str, channel: str = "WEB") -> Deal:
+    """Email the invoice request to finance and advance to UPLOAD_INVOICE."""
+    deal = load_deal(deal_id, db)
+    if deal.current_step != "REQUEST_INVOICE":
+        raise HTTPException(400, "This action is not available yet.")
+
+    # Get settings for finance email
+    app_settings = get_app_settings(db)
+    finance_email = app_settings.finance_email if app_settings else settings.finance_email
+
+    # Use deal_price if set, otherwise initial_price
+    effective_price = deal.deal_price if deal.deal_price is not None else deal.initial_price
+
+    # Find latest document PDF to attach
+    pdf_path = None
+    latest_doc = db.query(Document).filter(Document.deal_id == deal.id).order_by(Document.created_at.desc()).first()
+    if latest_doc and latest_doc.versions:
+        latest_version = latest_doc.versions[0]  # ordered desc by version_no
+        if latest_version.pdf_path:
+            pdf_path = ensure_pdf(db, latest_version)
+
+    send_invoice_request_email(
+        finance_email=finance_email,
+        deal_code=deal.deal_code,
+        tenant_name=deal.tenant.full_name,
+        unit_code=deal.unit.unit_code,
+        amount=str(effective_price),
+        currency=deal.currency,
+        pdf_path=pdf_path,
+    )
+
+    deal.invoice_requested_at = datetime.now(timezone.utc)
+    deal.status = "INVOICE_REQUESTED"
+
+    log_action(
+        db,
+        action="REQUEST_INVOICE",
+        summary=f"Invoice requested for deal {deal.deal_code}",
+        deal_id=deal.id,
+        channel=channel,
+        executor=_executor_for(channel),
+    )
+
+    # Advance to UPLOAD_INVOICE
+    advance_step(deal, db)
+    return deal
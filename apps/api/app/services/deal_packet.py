@@ -0,0 +1,95 @@
+"""Deal packet — the latest PDF of each journey document, merged into one file.
+
+The PDFs are merged at the PDF level with pypdf, not re-rendered from HTML.
+The result is cached in storage at packets/<deal_id>/<key>.pdf. The key is
+a hash of the constituent version ids, so a repeated request reads the
+cached file, and any new version of a constituent document produces a new
+key. Older packets of the deal are deleted when a new one is built.
+"""
+import hashlib
+import os
+from contextlib import ExitStack
+
+from fastapi import HTTPException
+from sqlalchemy.orm import Session
+
+from app.models.deal import Deal
+from app.models.document import Document, DocumentVersion
+from app.services import document_archive
+from app.services.journey import STEP_DOCUMENT_MAP
+from app.services.pdf_renderer import PDF_PENDING, ensure_pdf, single_flight
+from app.services.storage import get_storage
+
+try:
+    from pypdf import PdfWriter
+    PYPDF_AVAILABLE = True
+except ImportError:
+    PYPDF_AVAILABLE = False
+
+PACKET_DIR = "packets"
+
+
+def packet_versions(db: Session, deal: Deal) -> list[DocumentVersion]:
+    """Latest version of each journey document of the deal, in journey order."""
+    latest = {
+        doc_type: version
+        for doc_type, version in db.query(Document.doc_type, DocumentVersion)
+        .join(DocumentVersion, DocumentVersion.document_id == Document.id)
+        .filter(Document.deal_id == deal.id, DocumentVersion.is_latest == True)
+    }
+    # The final LOO supersedes the draft
+    if "LOO_FINAL" in latest:
+        latest.pop("LOO_DRAFT", None)
+    return [latest[doc_type] for doc_type in STEP_DOCUMENT_MAP.values() if doc_type in latest]
+
+
+def packet_key(versions: list[DocumentVersion]) -> str:
+    return hashlib.sha256(":".join(v.id for v in versions).encode()).hexdigest()[:32]
+
+
+def build_packet(db: Session, deal: Deal) -> tuple[str, str]:
+    """Storage path of the deal's packet PDF and its cache key, merging it first on a cache miss."""
+    versions = packet_versions(db, deal)
+    if not versions:
+        raise HTTPException(404, "This deal has no documents yet.")
+
+    key = packet_key(versions)
+    packet_dir = f"{PACKET_DIR}/{deal.id}/"
+    packet_path = f"{packet_dir}{key}.pdf"
+    storage = get_storage()
+    if storage.exists(packet_path):
+        return packet_path, key
+
+    if not PYPDF_AVAILABLE:
+        raise HTTPException(503, "PDF merging is not available (pypdf is not installed).")
+
+    with single_flight(packet_path):
+        if not storage.exists(packet_path):
+            document_archive.preload(db, deal.id)
+            rendered = any(v.pdf_status == PDF_PENDING for v in versions)
+            sources = [ensure_pdf(db, v) for v in versions]
+            if rendered:
+                db.commit()
+            missing = [v.pdf_path for v, path in zip(versions, sources) if not path or not document_archive.exists(db, path)]
+            if missing:
+                raise HTTPException(404, f"PDF file not found on disk: {missing[0]}.")
+
+            writer = PdfWriter()
+            tmp_path = storage.temp_path(packet_path)
+            try:
+                with ExitStack() as stack:
+                    for path in sources:
+                        writer.append(stack.enter_context(document_archive.local_copy(db, path)))
+                    with open(tmp_path, "wb") as f:
+                        writer.write(f)
+                storage.put_file(packet_path, tmp_path, move=True)
+            finally:
+                writer.close()
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+
+            # Superseded packets of this deal are never served again
+            for obj in list(storage.iter_objects(packet_dir)):
+                if obj.key.endswith(".pdf") and obj.key != packet_path:
+                    storage.delete(obj.key)
+    return packet_path, key
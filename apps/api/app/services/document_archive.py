@@ -0,0 +1,288 @@
+"""Per-deal document archives for deals that are long closed.
+
+A completed or cancelled deal keeps dozens of loose HTML and PDF files under
+``documents/<deal_id>/``. ``archive_deal`` packs them into one ZIP at
+``archives/documents/<deal_id>.zip`` and then deletes the loose files:
+- Members already compressed (``.html.gz``) are stored as they are.
+- Other members are deflated when that saves space.
+
+Each member gets a row in ``archived_files``. The row keeps the key the file
+had while loose, and the offset and length of the member's data in the
+archive. Document rows keep their paths. Reads go through the functions
+here, which use the loose file when it exists. Otherwise they fetch just the
+member's bytes by offset: a seek locally, a ranged GET on S3. A gzip preview
+is still sent as stored.
+
+The archive is a plain ZIP, so it can be inspected and extracted with
+standard tools. ``restore_deal`` writes the members back as loose files and
+drops the archive.
+
+The archive is stored and indexed before the loose files are deleted, so an
+interrupted run leaves both copies. Both hold the same bytes, and
+``reconcile_storage`` deletes the leftover loose copies. A PDF rendered lazily
+after archiving stays loose.
+"""
+import io
+import logging
+import os
+import struct
+import zipfile
+import zlib
+from contextlib import contextmanager
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import BinaryIO
+
+from fastapi.responses import Response
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from app.models.archived_file import ArchivedFile
+from app.models.deal import Deal
+from app.models.document import Document, DocumentVersion
+from app.services.storage import StoredObject, content_disposition, file_response as storage_file_response, get_storage
+
+logger = logging.getLogger(__name__)
+
+ARCHIVE_DIR = "archives/documents"
+CLOSED_STATUSES = ("COMPLETED", "CANCELLED")
+
+# Local file header: fixed part, then file name and extra field (lengths at bytes 26 and 28)
+_LOCAL_HEADER = struct.Struct("<4s5H3L2H")
+# Deflate must save at least this much to be worth a decompression on every read
+_MIN_DEFLATE_SAVING = 0.05
+
+
+@dataclass
+class ArchiveResult:
+    files: int
+    loose_bytes: int
+    archive_bytes: int
+
+
+def archive_path(deal_id: str) -> str:
+    return f"{ARCHIVE_DIR}/{deal_id}.zip"
+
+
+def member(db: Session, key: str) -> ArchivedFile | None:
+    """Index row of an archived file. Found rows are kept on the session; the identity map alone holds them weakly."""
+    key = key.replace(os.sep, "/")
+    found = db.info.setdefault("archived_files", {})
+    if key not in found:
+        entry = db.get(ArchivedFile, key)
+        if entry is None:
+            return None
+        found[key] = entry
+    return found[key]
+
+
+def preload(db: Session, deal_id: str) -> None:
+    """Load all index rows of a deal in one query, replacing those of the deal preloaded before."""
+    rows = db.query(ArchivedFile).filter(ArchivedFile.deal_id == deal_id)
+    db.info["archived_files"] = {row.key: row for row in rows}
+
+
+def _read_member(entry: ArchivedFile) -> bytes:
+    if not entry.stored_size:
+        return b""
+    data = get_storage().read_range(entry.archive_path, entry.data_offset, entry.stored_size)
+    if entry.compression == "deflate":
+        data = zlib.decompress(data, -zlib.MAX_WBITS)
+    return data
+
+
+# Archive-aware reads: the loose file if it exists, the archive member otherwise
+
+def stat(db: Session, key: str) -> StoredObject | None:
+    found = get_storage().stat(key)
+    if found is None and (entry := member(db, key)):
+        return StoredObject(key, entry.size, entry.modified_at)
+    return found
+
+
+def exists(db: Session, key: str) -> bool:
+    return get_storage().exists(key) or member(db, key) is not None
+
+
+def read(db: Session, key: str) -> bytes:
+    try:
+        return get_storage().read(key)
+    except FileNotFoundError:
+        entry = member(db, key)
+        if entry is None:
+            raise
+        return _read_member(entry)
+
+
+def open_file(db: Session, key: str) -> BinaryIO:
+    try:
+        return get_storage().open(key)
+    except FileNotFoundError:
+        entry = member(db, key)
+        if entry is None:
+            raise
+        return io.BytesIO(_read_member(entry))
+
+
+@contextmanager
+def local_copy(db: Session, key: str):
+    if get_storage().exists(key):
+        with get_storage().local_copy(key) as path:
+            yield path
+        return
+    entry = member(db, key)
+    if entry is None:
+        raise FileNotFoundError(key)
+    path = get_storage().temp_path(key)
+    try:
+        with open(path, "wb") as f:
+            f.write(_read_member(entry))
+        yield path
+    finally:
+        if os.path.exists(path):
+            os.remove(path)
+
+
+def file_response(db: Session, key: str, media_type: str, filename: str | None = None,
+                  content_encoding: str | None = None, headers: dict | None = None) -> Response:
+    """Like storage.file_response, falling back to the archive. Raises FileNotFoundError if neither has it."""
+    try:
+        return storage_file_response(key, media_type, filename=filename, content_encoding=content_encoding, headers=headers)
+    except FileNotFoundError:
+        entry = member(db, key)
+        if entry is None:
+            raise
+    headers = dict(headers or {})
+    if content_encoding:
+        headers["Content-Encoding"] = content_encoding
+    if filename:
+        headers["Content-Disposition"] = content_disposition(filename)
+    return Response(_read_member(entry), media_type=media_type, headers=headers)
+
+
+# Archiving and restoring
+
+def archivable_deals(db: Session, older_than_days: int):
+    """Closed deals past the cutoff that have documents and no archive yet."""
+    cutoff = datetime.now(timezone.utc) - timedelta(days=older_than_days)
+    archived = db.query(ArchivedFile.deal_id).distinct()
+    return (
+        db.query(Deal)
+        .filter(
+            Deal.status.in_(CLOSED_STATUSES),
+            # Closed deals reject every action, so their last update is when they were closed
+            func.coalesce(Deal.cancelled_at, Deal.updated_at) < cutoff,
+            Deal.id.in_(db.query(Document.deal_id)),
+            Deal.id.notin_(archived),
+        )
+        .order_by(Deal.id)
+    )
+
+
+def _deal_keys(db: Session, deal_id: str) -> list[str]:
+    keys = set()
+    for html_path, pdf_path in (
+        db.query(DocumentVersion.html_path, DocumentVersion.pdf_path)
+        .join(Document, Document.id == DocumentVersion.document_id)
+        .filter(Document.deal_id == deal_id)
+    ):
+        keys.update((html_path.replace(os.sep, "/"), pdf_path.replace(os.sep, "/")))
+    return sorted(keys)
+
+
+def _zip_time(modified_at: datetime) -> tuple:
+    return max(modified_at.astimezone(), datetime(1980, 1, 1).astimezone()).timetuple()[:6]
+
+
+def _compression(key: str, data: bytes) -> int:
+    if key.endswith(".gz") or not data:
+        return zipfile.ZIP_STORED
+    deflated = zlib.compressobj(6, zlib.DEFLATED, -zlib.MAX_WBITS)
+    size = len(deflated.compress(data)) + len(deflated.flush())
+    return zipfile.ZIP_DEFLATED if size <= len(data) * (1 - _MIN_DEFLATE_SAVING) else zipfile.ZIP_STORED
+
+
+def _index(zip_path: str) -> list[tuple[zipfile.ZipInfo, int]]:
+    """Every member of a written ZIP with the offset of its data."""
+    with zipfile.ZipFile(zip_path) as zf, open(zip_path, "rb") as f:
+        entries = []
+        for info in zf.infolist():
+            f.seek(info.header_offset)
+            header = _LOCAL_HEADER.unpack(f.read(_LOCAL_HEADER.size))
+            name_len, extra_len = header[-2], header[-1]
+            entries.append((info, info.header_offset + _LOCAL_HEADER.size + name_len + extra_len))
+        return entries
+
+
+def archive_deal(db: Session, deal: Deal) -> ArchiveResult | None:
+    """Pack the deal's document files into its archive and index them; commits. None if there was nothing loose."""
+    storage = get_storage()
+    zip_key = archive_path(deal.id)
+    prefix = f"documents/{deal.id}/"
+    tmp_path = storage.temp_path(zip_key)
+    archived_keys, loose_bytes = [], 0
+    try:
+        with zipfile.ZipFile(tmp_path, "w") as zf:
+            for key in _deal_keys(db, deal.id):
+                found = storage.stat(key)
+                if found is None:
+                    continue  # lazy PDF never rendered, or already missing
+                data = storage.read(key)
+                arcname = key[len(prefix):] if key.startswith(prefix) else key
+                info = zipfile.ZipInfo(arcname, date_time=_zip_time(found.modified_at))
+                info.compress_type = _compression(key, data)
+                zf.writestr(info, data)
+                archived_keys.append((key, found.modified_at))
+                loose_bytes += found.size
+        if not archived_keys:
+            return None
+
+        entries = _index(tmp_path)
+        archive_bytes = os.path.getsize(tmp_path)
+        storage.put_file(zip_key, tmp_path, move=True)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+    rows = []
+    for (key, modified_at), (info, data_offset) in zip(archived_keys, entries):
+        rows.append(ArchivedFile(
+            key=key,
+            deal_id=deal.id,
+            archive_path=zip_key,
+            data_offset=data_offset,
+            stored_size=info.compress_size,
+            size=info.file_size,
+            compression="deflate" if info.compress_type == zipfile.ZIP_DEFLATED else "stored",
+            crc32=info.CRC,
+            modified_at=modified_at,
+        ))
+    # Read every member back through the index before anything loose is deleted
+    for row in rows:
+        if zlib.crc32(_read_member(row)) != row.crc32:
+            storage.delete(zip_key)
+            raise RuntimeError(f"Archive of deal {deal.id} failed verification at {row.key}.")
+    db.add_all(rows)
+    db.commit()
+
+    for row in rows:
+        storage.delete(row.key)
+    logger.info(f"Archived {len(rows)} files of deal {deal.id} ({loose_bytes} → {archive_bytes} bytes)")
+    return ArchiveResult(len(rows), loose_bytes, archive_bytes)
+
+
+def restore_deal(db: Session, deal_id: str) -> int:
+    """Write the deal's archived files back as loose files and drop the archive; commits. Returns the file count."""
+    storage = get_storage()
+    rows = db.query(ArchivedFile).filter(ArchivedFile.deal_id == deal_id).all()
+    for row in rows:
+        if not storage.exists(row.key):
+            storage.put(row.key, _read_member(row))
+    archives = {row.archive_path for row in rows}
+    for row in rows:
+        db.delete(row)
+    db.commit()
+    for path in archives:
+        storage.delete(path)
+    logger.info(f"Restored {len(rows)} archived files of deal {deal_id}")
+    return len(rows)
@@ -0,0 +1,112 @@
+"""Streamed ZIP bundles of deal documents and finance attachments.
+
+The archive is built while it is sent. zipfile writes into a sink that
+cannot seek, so it falls back to data descriptors. After each chunk of
+input the bytes written so far are yielded. Neither memory nor temp files
+ever hold more than one read chunk, plus the small central directory that is
+written at the end.
+
+Entries are stored without compression, because PDFs are already
+compressed. Files missing on disk are skipped and listed in manifest.csv,
+which is always the last entry.
+"""
+import csv
+import io
+import os
+import zipfile
+from typing import Iterable, Iterator
+
+from sqlalchemy.orm import selectinload
+
+from app.database import SessionLocal
+from app.models.deal import Deal
+from app.models.document import Document
+from app.services import document_archive
+from app.services.pdf_renderer import PDF_PENDING, ensure_pdf
+
+CHUNK_SIZE = 1024 * 1024
+
+
+class _Sink(io.RawIOBase):
+    """Write-only, unseekable buffer that is emptied after every chunk."""
+
+    def __init__(self):
+        self._chunks: list[bytes] = []
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, b) -> int:
+        self._chunks.append(bytes(b))
+        return len(b)
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def _unique(name: str, used: set[str]) -> str:
+    stem, ext = os.path.splitext(name)
+    candidate, n = name, 1
+    while candidate in used:
+        n += 1
+        candidate = f"{stem}_{n}{ext}"
+    used.add(candidate)
+    return candidate
+
+
+def _deal_files(db, deal: Deal, latest_only: bool) -> Iterator[tuple[str, str | None, dict]]:
+    """(arcname, storage path or None if missing, manifest row) for one deal."""
+    used: set[str] = set()
+    rendered = False
+    for doc in sorted(deal.documents, key=lambda d: d.created_at):
+        versions = [v for v in doc.versions if v.is_latest] if latest_only else doc.versions
+        for version in versions:
+            rendered |= version.pdf_status == PDF_PENDING
+            path = ensure_pdf(db, version)
+            arcname = f"{deal.deal_code}/documents/{_unique(os.path.basename(version.pdf_path), used)}"
+            row = {"deal_code": deal.deal_code, "kind": doc.doc_type, "version": version.version_no, "file": arcname}
+            yield arcname, path, row
+    if rendered:
+        db.commit()  # lazy-mode PDFs rendered on the way are READY now
+    for attachment in sorted(deal.finance_attachments, key=lambda a: a.uploaded_at):
+        arcname = f"{deal.deal_code}/invoices/{_unique(os.path.basename(attachment.file_name), used)}"
+        row = {"deal_code": deal.deal_code, "kind": attachment.attachment_type, "version": "", "file": arcname}
+        yield arcname, attachment.file_path, row
+
+
+def stream_zip(deal_ids: Iterable[str], latest_only: bool = False) -> Iterator[bytes]:
+    """Yield a ZIP of every document PDF and finance attachment of the given deals."""
+    sink = _Sink()
+    manifest = io.StringIO()
+    writer = csv.DictWriter(manifest, fieldnames=["deal_code", "kind", "version", "file", "status"])
+    writer.writeheader()
+    db = SessionLocal()
+    try:
+        with zipfile.ZipFile(sink, mode="w", compression=zipfile.ZIP_STORED) as zf:
+            for deal_id in deal_ids:
+                deal = db.query(Deal).options(
+                    selectinload(Deal.documents).selectinload(Document.versions),
+                    selectinload(Deal.finance_attachments),
+                ).filter(Deal.id == deal_id).first()
+                if not deal:
+                    continue
+                document_archive.preload(db, deal.id)
+                for arcname, path, row in _deal_files(db, deal, latest_only):
+                    stat = document_archive.stat(db, path) if path else None
+                    if stat is None:
+                        writer.writerow({**row, "status": "missing"})
+                        continue
+                    info = zipfile.ZipInfo(arcname, date_time=stat.modified_at.astimezone().timetuple()[:6])
+                    with document_archive.open_file(db, path) as src, zf.open(info, mode="w", force_zip64=True) as dest:
+                        while chunk := src.read(CHUNK_SIZE):
+                            dest.write(chunk)
+                            if data := sink.drain():
+                                yield data
+                    writer.writerow({**row, "status": "included"})
+                db.expunge_all()
+            zf.writestr("manifest.csv", manifest.getvalue())
+        yield sink.drain()
+    finally:
+        db.close()
@@ -1,26 +1,49 @@
 """Document generation service — per-doc-type HTML templates → PDF via WeasyPrint."""
+import base64
+import logging
 import os
 import re
+import time
 import uuid
 from datetime import datetime, timezone
 
-from jinja2 import Environment, FileSystemLoader
+from jinja2 import Environment, FileSystemBytecodeCache, FileSystemLoader
+from markupsafe import Markup
 from sqlalchemy.orm import Session
 
 from app.config import settings
 from app.models.deal import Deal
 from app.models.document import Document, DocumentVersion
-from app.models.settings import AppSettings
+from app.services import html_store, metrics, pdf_renderer
+from app.services.storage import get_storage
+from app.services.profiler import stage
+from app.services.settings_cache import AppSettingsSnapshot, get_app_settings
 
-# Try to import weasyprint; if not available, generate HTML only
-try:
-    from weasyprint import HTML as WeasyHTML
-    WEASYPRINT_AVAILABLE = True
-except ImportError:
-    WEASYPRINT_AVAILABLE = False
+logger = logging.getLogger(__name__)
 
 TEMPLATE_DIR = os.path.join(os.path.dirname(__file__), "..", "templates")
-jinja_env = Environment(loader=FileSystemLoader(TEMPLATE_DIR), autoescape=True)
+
+
+def _bytecode_cache() -> FileSystemBytecodeCache | None:
+    cache_dir = settings.jinja_bytecode_cache_dir
+    if not cache_dir:
+        return None
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+    except OSError as e:
+        logger.warning(f"Jinja bytecode cache disabled, cannot create {cache_dir}: {e}")
+        return None
+    return FileSystemBytecodeCache(cache_dir)
+
+
+jinja_env = Environment(
+    loader=FileSystemLoader(TEMPLATE_DIR),
+    autoescape=True,
+    auto_reload=settings.templates_auto_reload,
+    bytecode_cache=_bytecode_cache(),
+)
+# Shared print styles (templates/print.css), embedded by every template
+jinja_env.globals["print_base"] = Markup(pdf_renderer.PRINT_BASE_BLOCK)
 
 # Map doc_type to its dedicated template file
 DOC_TYPE_TEMPLATE = {
@@ -45,104 +68,134 @@ DOC_TYPE_DISPLAY_NAME = {
 }
 
 
+def warm_templates() -> dict[str, float]:
+    """Load every document template now, so the first render after a restart skips compilation.
+
+    Returns the load time in ms per template. Loads are much faster when
+    the bytecode cache was filled by an earlier process.
+    """
+    timings = {}
+    for template_file in [*DOC_TYPE_TEMPLATE.values(), "document_base.html"]:
+        start = time.perf_counter()
+        jinja_env.get_template(template_file)
+        timings[template_file] = (time.perf_counter() - start) * 1000
+    return timings
+
+
 def _sanitize_filename(name: str) -> str:
     """Replace spaces with dashes and remove non-alphanumeric chars (except dash)."""
     name = name.strip().replace(" ", "-")
     return re.sub(r"[^a-zA-Z0-9\-]", "", name)
 
 
-def _ensure_dir(path: str):
-    os.makedirs(os.path.dirname(path), exist_ok=True)
-
-
-def _get_settings(db: Session) -> AppSettings | None:
-    return db.query(AppSettings).first()
+def _get_settings(db: Session) -> AppSettingsSnapshot | None:
+    return get_app_settings(db)
 
 
-def _get_logo_base64(app_settings: AppSettings | None) -> str:
-    """Read logo file and return base64 data URI for embedding in HTML."""
-    if not app_settings or not app_settings.logo_path:
+def _image_data_uri(rel_path: str | None) -> str:
+    """Read an image from storage and return a base64 data URI for embedding in HTML."""
+    if not rel_path:
         return ""
-    logo_full = os.path.join(settings.storage_root, app_settings.logo_path)
-    if not os.path.exists(logo_full):
+    try:
+        data = base64.b64encode(get_storage().read(rel_path)).decode()
+    except FileNotFoundError:
         return ""
-    import base64
-    with open(logo_full, "rb") as f:
-        data = base64.b64encode(f.read()).decode()
-    ext = app_settings.logo_path.rsplit(".", 1)[-1].lower()
+    ext = rel_path.rsplit(".", 1)[-1].lower()
     mime = {"webp": "image/webp", "png": "image/png", "jpg": "image/jpeg", "jpeg": "image/jpeg"}.get(ext, "image/png")
     return f"data:{mime};base64,{data}"
 
 
-def _get_signature_base64(app_settings: AppSettings | None) -> str:
-    """Read signature image file and return base64 data URI for embedding in HTML."""
-    if not app_settings or not app_settings.signature_image_path:
+def _get_logo_base64(app_settings: AppSettingsSnapshot | None) -> str:
+    """Logo data URI, preferring the render-ready variant over the uploaded original."""
+    if not app_settings:
         return ""
-    sig_full = os.path.join(settings.storage_root, app_settings.signature_image_path)
-    if not os.path.exists(sig_full):
-        return ""
-    import base64
-    with open(sig_full, "rb") as f:
-        data = base64.b64encode(f.read()).decode()
-    ext = app_settings.signature_image_path.rsplit(".", 1)[-1].lower()
-    mime = {"webp": "image/webp", "png": "image/png", "jpg": "image/jpeg", "jpeg": "image/jpeg"}.get(ext, "image/png")
-    return f"data:{mime};base64,{data}"
+    return _image_data_uri(app_settings.logo_render_path or app_settings.logo_path)
 
 
-def generate_document(
-    db: Session,
-    deal: Deal,
-    doc_type: str,
-    channel: str = "WEB",
-) -> DocumentVersion:
-    """Generate an HTML document and its PDF, store them, and create DB records."""
-    app_settings = _get_settings(db)
-
-    # Find or create Document record
-    doc = db.query(Document).filter(
-        Document.deal_id == deal.id,
-        Document.doc_type == doc_type,
-    ).first()
-
-    if not doc:
-        doc = Document(deal_id=deal.id, doc_type=doc_type, latest_version=0)
-        db.add(doc)
-        db.flush()
-
-    # Mark old versions as not latest
-    for v in doc.versions:
-        v.is_latest = False
+def _get_signature_base64(app_settings: AppSettingsSnapshot | None) -> str:
+    """Signature data URI, preferring the render-ready variant over the uploaded original."""
+    if not app_settings:
+        return ""
+    return _image_data_uri(app_settings.signature_render_path or app_settings.signature_image_path)
 
-    new_version_no = doc.latest_version + 1
 
+def build_context(
+    deal,
+    tenant,
+    unit,
+    doc_type: str,
+    version_no: int,
+    app_settings,
+    logo_data_uri: str,
+    signature_data_uri: str,
+) -> dict:
+    """Template context for a document. Takes plain attribute objects so it also serves the render benchmarks."""
     # Determine effective price (deal_price if set, otherwise initial_price)
     effective_price = deal.deal_price if deal.deal_price is not None else deal.initial_price
-
-    # Build template context
-    tenant = deal.tenant
-    unit = deal.unit
-    context = {
+    return {
         "deal": deal,
         "tenant": tenant,
         "unit": unit,
         "doc_type": doc_type,
-        "version": new_version_no,
+        "version": version_no,
         "effective_price": effective_price,
         "generated_at": datetime.now(timezone.utc).strftime("%B %d, %Y"),
         "company_name": app_settings.company_legal_name if app_settings else "NEST Serviced Apartment",
         "company_address": app_settings.company_address if app_settings else "",
         "signatory_name": app_settings.signatory_name if app_settings else "",
         "signatory_title": app_settings.signatory_title if app_settings else "",
-        "logo_data_uri": _get_logo_base64(app_settings),
-        "signature_data_uri": _get_signature_base64(app_settings),
+        "logo_data_uri": logo_data_uri,
+        "signature_data_uri": signature_data_uri,
         "move_in_date": deal.move_in_date.strftime("%B %d, %Y") if deal.move_in_date else None,
         "move_in_notes": deal.move_in_notes or "",
     }
 
+
+def generate_document(
+    db: Session,
+    deal: Deal,
+    doc_type: str,
+    channel: str = "WEB",
+) -> DocumentVersion:
+    """Generate an HTML document and its PDF, store them, and create DB records.
+
+    In lazy PDF mode only the HTML is written and the version is marked
+    PENDING; see pdf_renderer.ensure_pdf.
+    """
+    with stage("load_records"):
+        app_settings = _get_settings(db)
+
+        # Find or create Document record
+        doc = db.query(Document).filter(
+            Document.deal_id == deal.id,
+            Document.doc_type == doc_type,
+        ).first()
+
+        if not doc:
+            doc = Document(deal_id=deal.id, doc_type=doc_type, latest_version=0)
+            db.add(doc)
+            db.flush()
+
+        # Mark old versions as not latest
+        for v in doc.versions:
+            v.is_latest = False
+
+    new_version_no = doc.latest_version + 1
+
+    # Build template context
+    with stage("load_records"):
+        tenant = deal.tenant
+        unit = deal.unit
+    with stage("embed_images"):
+        logo_data_uri = _get_logo_base64(app_settings)
+        signature_data_uri = _get_signature_base64(app_settings)
+    context = build_context(deal, tenant, unit, doc_type, new_version_no, app_settings, logo_data_uri, signature_data_uri)
+
     # Select template
     template_file = DOC_TYPE_TEMPLATE.get(doc_type, "document_base.html")
-    template = jinja_env.get_template(template_file)
-    html_content = template.render(**context)
+    with stage("jinja_render"), metrics.template_render_duration.time(template=template_file):
+        template = jinja_env.get_template(template_file)
+        html_content = template.render(**context)
 
     # Storage paths — format: DocName_TenantName_UnitCode_Date.ext
     deal_dir = os.path.join("documents", deal.id)
@@ -156,23 +209,15 @@ def generate_document(
     html_rel = os.path.join(deal_dir, html_filename)
     pdf_rel = os.path.join(deal_dir, pdf_filename)
 
-    html_full = os.path.join(settings.storage_root, html_rel)
-    pdf_full = os.path.join(settings.storage_root, pdf_rel)
-
-    _ensure_dir(html_full)
-    _ensure_dir(pdf_full)
-
-    # Write HTML
-    with open(html_full, "w", encoding="utf-8") as f:
-        f.write(html_content)
+    # Write HTML (gzip-compressed unless HTML_STORAGE_COMPRESSION=none)
+    with stage("write_html"):
+        html_rel = html_store.write_html(html_rel, html_content)
 
     # Generate PDF
-    if WEASYPRINT_AVAILABLE:
-        WeasyHTML(string=html_content).write_pdf(pdf_full)
-    else:
-        # Fallback: copy HTML as placeholder PDF marker
-        with open(pdf_full, "w", encoding="utf-8") as f:
-            f.write(html_content)
+    lazy_pdf = pdf_renderer.is_lazy()
+    if not lazy_pdf:
+        with stage("pdf_render"):
+            pdf_renderer.render_pdf(html_content, pdf_rel, doc_type)
 
     # Create version record
     version = DocumentVersion(
@@ -180,6 +225,7 @@ def generate_document(
         version_no=new_version_no,
         html_path=html_rel,
         pdf_path=pdf_rel,
+        pdf_status=pdf_renderer.PDF_PENDING if lazy_pdf else pdf_renderer.PDF_READY,
         signatory_name=app_settings.signatory_name if app_settings else None,
         signatory_title=app_settings.signatory_title if app_settings else None,
         channel=channel,
@@ -188,6 +234,10 @@ def generate_document(
     db.add(version)
 
     doc.latest_version = new_version_no
-    db.flush()
+    with stage("save_version"):
+        db.flush()
+    metrics.document_generations.inc(doc_type=doc_type)
+    if lazy_pdf and doc_type in pdf_renderer.prerender_doc_types():
+        pdf_renderer.prerender_after_commit(db, version.id)
 
     return version
@@ -3,16 +3,16 @@ import base64
 import json
 import logging
 import os
+import time
 import urllib.request
 from datetime import datetime, timezone
 
 from app.config import settings
+from app.services import metrics
+from app.services.storage import get_storage
 
 logger = logging.getLogger(__name__)
 
-RESEND_API_URL = "https://api.resend.com/emails"
-
-
 def _build_invoice_html(
     deal_code: str,
     tenant_name: str,
@@ -71,12 +71,15 @@ def send_invoice_request_email(
     pdf_path: str | None = None,
 ) -> bool:
     """Send invoice request email via Resend. Falls back to logging if API key is stub."""
+    start = time.perf_counter()
+
     # Stub mode — just log
     if settings.resend_api_key == "stub":
         logger.info(
             "[EMAIL STUB] Invoice request → %s | Deal: %s | Tenant: %s | Unit: %s | Amount: %s %s",
             finance_email, deal_code, tenant_name, unit_code, currency, amount,
         )
+        metrics.email_send_duration.observe(time.perf_counter() - start, outcome="stub")
         return True
 
     try:
@@ -89,18 +92,21 @@ def send_invoice_request_email(
             "html": html_body,
         }
 
-        # Attach PDF if available
-        if pdf_path and os.path.isfile(pdf_path):
-            with open(pdf_path, "rb") as f:
-                pdf_b64 = base64.b64encode(f.read()).decode("utf-8")
-            payload["attachments"] = [{
-                "filename": os.path.basename(pdf_path),
-                "content": pdf_b64,
-            }]
+        # Attach PDF if available (pdf_path is a storage path)
+        if pdf_path:
+            try:
+                pdf_b64 = base64.b64encode(get_storage().read(pdf_path)).decode("utf-8")
+            except FileNotFoundError:
+                pdf_b64 = None
+            if pdf_b64:
+                payload["attachments"] = [{
+                    "filename": os.path.basename(pdf_path),
+                    "content": pdf_b64,
+                }]
 
         data = json.dumps(payload).encode("utf-8")
         req = urllib.request.Request(
-            RESEND_API_URL,
+            settings.resend_api_url,
             data=data,
             headers={
                 "Authorization": f"Bearer {settings.resend_api_key}",
@@ -114,8 +120,10 @@ def send_invoice_request_email(
             result = json.loads(resp.read().decode("utf-8"))
 
         logger.info("[EMAIL] Invoice request sent to %s for deal %s (id: %s)", finance_email, deal_code, result.get("id"))
+        metrics.email_send_duration.observe(time.perf_counter() - start, outcome="sent")
         return True
 
     except Exception as e:
         logger.error("[EMAIL] Failed to send invoice request for deal %s: %s", deal_code, e)
+        metrics.email_send_duration.observe(time.perf_counter() - start, outcome="failed")
         return False
@@ -0,0 +1,91 @@
+"""Compressed storage of generated document HTML.
+
+Generated HTML embeds the logo and signature as base64 and repeats a lot of
+markup, so it compresses well. With HTML_STORAGE_COMPRESSION=gzip the file is
+written as ``<name>.html.gz`` and the version's html_path points to it.
+Previews send the gzip bytes as they are to clients that accept gzip, which
+is every browser, and decompress only for clients that do not. ``gzip_response``
+is the one place that choice is made, for previews and ``/files`` alike; the
+stored object itself carries no Content-Encoding.
+
+Readers go by the file extension, so plain ``.html`` files written before
+compression existed, or with HTML_STORAGE_COMPRESSION=none, keep working.
+``python -m app.maintenance.compress_html`` compresses those in place.
+"""
+import gzip
+from typing import Callable
+
+from fastapi.responses import Response
+
+from app.config import settings
+from app.services.storage import file_response as storage_file_response, get_storage
+
+GZIP_SUFFIX = ".gz"
+
+
+def is_compressed(path: str) -> bool:
+    return path.endswith(GZIP_SUFFIX)
+
+
+def compress(data: bytes) -> bytes:
+    # mtime=0 keeps the output identical for identical HTML
+    return gzip.compress(data, compresslevel=settings.html_gzip_level, mtime=0)
+
+
+def write_html(rel_path: str, html_content: str) -> str:
+    """Store HTML, compressed if configured; returns the storage path actually written."""
+    data = html_content.encode("utf-8")
+    if settings.html_storage_compression == "gzip":
+        rel_path += GZIP_SUFFIX
+        data = compress(data)
+    get_storage().put(rel_path, data, content_type="text/html")
+    return rel_path
+
+
+def decode_html(rel_path: str, data: bytes) -> str:
+    if is_compressed(rel_path):
+        data = gzip.decompress(data)
+    return data.decode("utf-8")
+
+
+def read_html(rel_path: str) -> str:
+    return decode_html(rel_path, get_storage().read(rel_path))
+
+
+def accepts_gzip(accept_encoding: str | None) -> bool:
+    """Whether an Accept-Encoding header allows gzip (explicitly or via ``*``, and not with q=0)."""
+    if not accept_encoding:
+        return False
+    allowed = {}
+    for item in accept_encoding.split(","):
+        coding, _, params = item.strip().partition(";")
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        allowed[coding.strip().lower()] = q > 0
+    if "gzip" in allowed:
+        return allowed["gzip"]
+    return allowed.get("*", False)
+
+
+def gzip_response(
+    rel_path: str,
+    accept_encoding: str | None,
+    media_type: str = "text/html",
+    file_response: Callable[..., Response] = storage_file_response,
+    read: Callable[[str], bytes] | None = None,
+) -> Response:
+    """Serve a stored gzip file: as stored with Content-Encoding to clients that accept gzip, decompressed otherwise.
+
+    ``file_response`` and ``read`` default to plain storage; the preview passes
+    the archive-aware ones. Raises FileNotFoundError if the file does not exist.
+    """
+    vary = {"Vary": "Accept-Encoding"}
+    if accepts_gzip(accept_encoding):
+        return file_response(rel_path, media_type, content_encoding="gzip", headers=vary)
+    data = (read or get_storage().read)(rel_path)
+    return Response(gzip.decompress(data), media_type=media_type, headers=vary)
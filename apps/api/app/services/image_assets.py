@@ -0,0 +1,111 @@
+"""Render-ready variants of the company logo and signature images.
+
+Uploads are stored as-is (the original), plus a variant made for documents:
+- scaled down to what the templates print, at most 60 CSS px high at
+  IMAGE_RENDER_DPI and one A4 text width wide
+- EXIF orientation applied, then all metadata and ICC profiles dropped
+- saved as PNG when the image has transparency (typical for signatures),
+  otherwise as JPEG
+
+The generator inlines the variant, which keeps every stored HTML file small
+and saves WeasyPrint from decoding multi-megabyte images on every render.
+Without Pillow, or for images it cannot read (e.g. SVG), there is no variant
+and documents keep using the original.
+"""
+import io
+import logging
+import math
+import os
+import uuid
+
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.models.settings import AppSettings
+from app.services.storage import get_storage
+
+try:
+    from PIL import Image, ImageOps
+    PILLOW_AVAILABLE = True
+except ImportError:
+    PILLOW_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+# Templates cap logo and signature images at max-height: 60px (1 CSS px = 1/96 in)
+TEMPLATE_MAX_HEIGHT_CSS_PX = 60
+MAX_WIDTH_INCHES = 6.5
+JPEG_QUALITY = 85
+
+
+def normalize_image(content: bytes) -> tuple[bytes, str] | None:
+    """Downsized, metadata-free image bytes and their extension, or None if not possible."""
+    if not PILLOW_AVAILABLE:
+        return None
+    dpi = settings.image_render_dpi
+    max_size = (math.ceil(MAX_WIDTH_INCHES * dpi), math.ceil(TEMPLATE_MAX_HEIGHT_CSS_PX * dpi / 96))
+    try:
+        with Image.open(io.BytesIO(content)) as img:
+            img = ImageOps.exif_transpose(img)
+            img.thumbnail(max_size, Image.LANCZOS)  # never enlarges
+            has_alpha = img.mode in ("RGBA", "LA", "PA") or "transparency" in img.info
+            clean = img.convert("RGBA" if has_alpha else "RGB")
+            clean.info = {}
+            out = io.BytesIO()
+            if has_alpha:
+                clean.save(out, "PNG", optimize=True)
+                return out.getvalue(), "png"
+            clean.save(out, "JPEG", quality=JPEG_QUALITY, optimize=True)
+            return out.getvalue(), "jpg"
+    except (OSError, ValueError, Image.DecompressionBombError) as e:
+        logger.warning(f"Could not normalize image, documents will use the original: {e}")
+        return None
+
+
+def store_render_variant(content: bytes, kind: str) -> str | None:
+    """Store the render-ready variant of an uploaded image; returns its storage path."""
+    normalized = normalize_image(content)
+    if not normalized:
+        return None
+    data, ext = normalized
+    rel_path = os.path.join("settings", f"{kind}_{uuid.uuid4().hex[:8]}_render.{ext}")
+    get_storage().put(rel_path, data)
+    logger.info(f"Stored {kind} render variant {rel_path} ({len(content)} → {len(data)} bytes)")
+    return rel_path
+
+
+def backfill_render_variants(row: AppSettings) -> bool:
+    """Create missing variants for images uploaded before normalization existed. True if the row changed."""
+    changed = False
+    for kind, original_attr, render_attr in (
+        ("logo", "logo_path", "logo_render_path"),
+        ("signature", "signature_image_path", "signature_render_path"),
+    ):
+        original = getattr(row, original_attr)
+        if not original or getattr(row, render_attr):
+            continue
+        try:
+            content = get_storage().read(original)
+        except FileNotFoundError:
+            continue
+        render_path = store_render_variant(content, kind)
+        if render_path:
+            setattr(row, render_attr, render_path)
+            changed = True
+    return changed
+
+
+def needs_backfill(app_settings) -> bool:
+    return PILLOW_AVAILABLE and (
+        bool(app_settings.logo_path and not app_settings.logo_render_path)
+        or bool(app_settings.signature_image_path and not app_settings.signature_render_path)
+    )
+
+
+def backfill(db: Session) -> AppSettings | None:
+    """Load the settings row and create missing variants; returns the committed row if it changed."""
+    row = db.query(AppSettings).first()
+    if row and backfill_render_variants(row):
+        db.commit()
+        return row
+    return None
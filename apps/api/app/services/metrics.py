@@ -0,0 +1,225 @@
+"""In-process metrics in Prometheus text exposition format.
+
+A deliberately small registry (counters, gauges, histograms with labels) so
+the API does not need another dependency. Updates are a dict lookup plus a
+lock-protected add, cheap enough to leave on in production. Values are per
+worker process; scrape every worker (or run one) to get the full picture.
+"""
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+
+from fastapi import Request
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (1_024, 10_240, 102_400, 512_000, 1_048_576, 5_242_880, 10_485_760, 52_428_800)
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: tuple[str, ...], values: tuple, extra: str = "") -> str:
+    parts = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._values: dict[tuple, object] = {}
+
+    def _key(self, labels: dict) -> tuple:
+        return tuple(str(labels.get(n, "")) for n in self.labelnames)
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        with self._lock:
+            items = sorted(self._values.items())
+            lines.extend(self._render_samples(items))
+        return lines
+
+    def _render_samples(self, items) -> list[str]:
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}" for key, value in items]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def set(self, value: float, **labels) -> None:
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount: float = 1, **labels) -> None:
+        self.inc(-amount, **labels)
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple[str, ...] = (), buckets=LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._values.get(key)
+            if series is None:
+                # [per-bucket counts..., +Inf count, sum]
+                series = self._values[key] = [0] * (len(self.buckets) + 1) + [0.0]
+            series[index] += 1
+            series[-1] += value
+
+    @contextmanager
+    def time(self, **labels):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def _render_samples(self, items) -> list[str]:
+        lines = []
+        for key, series in items:
+            cumulative = 0
+            for bound, count in zip((*self.buckets, float("inf")), series[:-1]):
+                cumulative += count
+                le = f'le="{_format_value(bound)}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {cumulative}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(series[-1])}")
+            lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+_registry: list[_Metric] = []
+
+
+def _register(metric):
+    _registry.append(metric)
+    return metric
+
+
+# --- HTTP ---
+http_request_duration = _register(Histogram(
+    "nest_http_request_duration_seconds", "HTTP request latency by route template.",
+    ("method", "route", "status"),
+))
+http_requests_in_flight = _register(Gauge(
+    "nest_http_requests_in_flight", "Requests currently being served.",
+))
+
+# --- Document pipeline ---
+pdf_render_duration = _register(Histogram(
+    "nest_pdf_render_seconds", "WeasyPrint HTML to PDF render time.", ("doc_type",),
+))
+template_render_duration = _register(Histogram(
+    "nest_template_render_seconds", "Jinja template render time.", ("template",),
+))
+document_generations = _register(Counter(
+    "nest_document_generations_total", "Generated document versions.", ("doc_type",),
+))
+
+# --- Email ---
+email_send_duration = _register(Histogram(
+    "nest_email_send_seconds", "Invoice request email send latency by outcome (sent, failed, stub).", ("outcome",),
+))
+
+# --- Uploads ---
+upload_size = _register(Histogram(
+    "nest_upload_size_bytes", "Size of uploaded files.", ("kind",), buckets=SIZE_BUCKETS,
+))
+
+# --- Audit ---
+audit_writes = _register(Counter(
+    "nest_audit_writes_total", "Audit log entries written.", ("action",),
+))
+
+
+def _pool_lines() -> list[str]:
+    """DB pool gauges and counters, read from the pool stats at scrape time."""
+    from app.services.db_pool import pool_status
+
+    pools = pool_status()
+    specs = [
+        ("nest_db_pool_size", "gauge", "Configured pool size.", lambda p: p["config"]["pool_size"]),
+        ("nest_db_pool_checked_out", "gauge", "Connections currently checked out.", lambda p: p["checked_out"]),
+        ("nest_db_pool_checked_in", "gauge", "Idle connections in the pool.", lambda p: p["checked_in"]),
+        ("nest_db_pool_overflow", "gauge", "Connections open beyond pool_size.", lambda p: p["overflow"]),
+        ("nest_db_pool_checkouts_total", "counter", "Pool checkouts.", lambda p: p["checkouts"]),
+        ("nest_db_pool_slow_checkouts_total", "counter", "Checkouts slower than DB_SLOW_CHECKOUT_MS.", lambda p: p["slow_checkouts"]),
+        ("nest_db_pool_timeouts_total", "counter", "Checkouts that hit pool_timeout.", lambda p: p["timeouts"]),
+    ]
+    lines = []
+    for name, kind, doc, value in specs:
+        lines += [f"# HELP {name} {doc}", f"# TYPE {name} {kind}"]
+        lines += [f'{name}{{pool="{p["name"]}"}} {value(p)}' for p in pools]
+
+    name = "nest_db_pool_wait_seconds"
+    lines += [f"# HELP {name} Time spent waiting for a pool connection.", f"# TYPE {name} histogram"]
+    for p in pools:
+        for bucket in p["wait_ms_histogram"]:
+            le = "+Inf" if bucket["le"] == "+Inf" else _format_value(bucket["le"] / 1000)
+            lines.append(f'{name}_bucket{{pool="{p["name"]}",le="{le}"}} {bucket["count"]}')
+        lines.append(f'{name}_sum{{pool="{p["name"]}"}} {_format_value(p["wait_ms_sum"] / 1000)}')
+        lines.append(f'{name}_count{{pool="{p["name"]}"}} {p["checkouts"]}')
+    return lines
+
+
+def render_latest() -> str:
+    """All metrics in Prometheus text exposition format (version 0.0.4)."""
+    lines = []
+    for metric in _registry:
+        lines += metric.render()
+    lines += _pool_lines()
+    return "\n".join(lines) + "\n"
+
+
+async def metrics_middleware(request: Request, call_next):
+    http_requests_in_flight.inc()
+    start = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        http_requests_in_flight.dec()
+        # Label by route template (/deals/{deal_id}), never the raw path, to bound cardinality
+        route = request.scope.get("route")
+        http_request_duration.observe(
+            time.perf_counter() - start,
+            method=request.method,
+            route=getattr(route, "path", "unmatched"),
+            status=status,
+        )
@@ -0,0 +1,264 @@
+"""PDF rendering for document versions, up front or on first access.
+
+With PDF_RENDER_MODE=eager, generate_document renders the PDF next to the
+HTML, as it always has. With PDF_RENDER_MODE=lazy, it stores only the HTML
+and marks the version PENDING. ``ensure_pdf`` then renders the PDF from the
+stored HTML the first time it is needed: a download or the invoice email.
+Concurrent requests for the same version render it once. They wait on an
+exclusive lock file next to the PDF, which works across worker processes
+sharing the storage volume. With the S3 storage backend the lock file is
+local to each node, so two nodes may both render; the results are identical.
+The PDF is written to a temp file and then stored, so readers never see a
+partial file.
+
+Doc types listed in PDF_PRERENDER_DOC_TYPES are still rendered in lazy mode.
+A small background pool does it once the generating transaction commits.
+
+Renders inside ``background()`` (pre-renders, bulk regeneration) yield to
+interactive renders: before starting, they wait until no interactive render
+is running in this process.
+
+The print styles shared by all templates live in templates/print.css.
+Generated HTML embeds them as the ``print_base`` block, so a stored file is
+complete on its own. When rendering, that block is removed and the same rules
+are passed as a stylesheet that was parsed once, together with a reused font
+configuration. Each render then only parses the template's own rules.
+"""
+import contextvars
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.database import SessionLocal
+from app.models.document import DocumentVersion
+from app.services import document_archive, html_store, metrics
+from app.services.storage import get_storage
+
+try:
+    from weasyprint import CSS, HTML as WeasyHTML
+    from weasyprint.text.fonts import FontConfiguration
+    WEASYPRINT_AVAILABLE = True
+except ImportError:
+    WEASYPRINT_AVAILABLE = False
+
+try:
+    import fcntl
+except ImportError:  # non-POSIX: single-flight within this process only
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+PDF_READY = "READY"
+PDF_PENDING = "PENDING"
+
+PRINT_CSS_PATH = os.path.join(os.path.dirname(__file__), "..", "templates", "print.css")
+with open(PRINT_CSS_PATH, encoding="utf-8") as _f:
+    PRINT_CSS = _f.read()
+PRINT_BASE_BLOCK = f'<style id="print-base">\n{PRINT_CSS}</style>'
+
+# Longest a background render waits for interactive ones before going ahead anyway
+BACKGROUND_MAX_WAIT_SECONDS = 30.0
+
+_local_locks = [threading.Lock() for _ in range(64)]
+_background = contextvars.ContextVar("pdf_background", default=False)
+_interactive = 0
+_interactive_idle = threading.Condition()
+_executor: ThreadPoolExecutor | None = None
+_executor_guard = threading.Lock()
+_stylesheet = threading.local()
+
+
+def is_lazy() -> bool:
+    return settings.pdf_render_mode == "lazy"
+
+
+def prerender_doc_types() -> set[str]:
+    return {t.strip().upper() for t in settings.pdf_prerender_doc_types.split(",") if t.strip()}
+
+
+@contextmanager
+def background():
+    """Mark renders in this context as background work that yields to interactive renders."""
+    token = _background.set(True)
+    try:
+        yield
+    finally:
+        _background.reset(token)
+
+
+@contextmanager
+def _render_slot():
+    global _interactive
+    if _background.get():
+        with _interactive_idle:
+            _interactive_idle.wait_for(lambda: _interactive == 0, timeout=BACKGROUND_MAX_WAIT_SECONDS)
+        yield
+        return
+    with _interactive_idle:
+        _interactive += 1
+    try:
+        yield
+    finally:
+        with _interactive_idle:
+            _interactive -= 1
+            if not _interactive:
+                _interactive_idle.notify_all()
+
+
+def _print_stylesheet() -> tuple["CSS", "FontConfiguration"]:
+    """The parsed shared stylesheet and its font configuration, built once per render thread.
+
+    WeasyPrint objects are not documented as thread-safe, so each thread
+    (request, pre-render or regeneration worker) keeps its own pair.
+    """
+    if not hasattr(_stylesheet, "css"):
+        font_config = FontConfiguration()
+        _stylesheet.css = CSS(string=PRINT_CSS, font_config=font_config)
+        _stylesheet.font_config = font_config
+    return _stylesheet.css, _stylesheet.font_config
+
+
+def weasy_document(html_content: str) -> tuple["WeasyHTML", dict]:
+    """WeasyPrint HTML for a document and the options for render()/write_pdf().
+
+    HTML stored before the shared stylesheet existed, or embedding an older
+    copy of it, is rendered from its own inline styles as before.
+    """
+    if PRINT_BASE_BLOCK not in html_content:
+        return WeasyHTML(string=html_content), {}
+    css, font_config = _print_stylesheet()
+    html = WeasyHTML(string=html_content.replace(PRINT_BASE_BLOCK, "", 1))
+    return html, {"stylesheets": [css], "font_config": font_config}
+
+
+def render_pdf(html_content: str, pdf_path: str, doc_type: str) -> None:
+    """Render HTML and store it at ``pdf_path`` atomically."""
+    storage = get_storage()
+    tmp_path = storage.temp_path(pdf_path)
+    try:
+        with _render_slot():
+            if WEASYPRINT_AVAILABLE:
+                with metrics.pdf_render_duration.time(doc_type=doc_type):
+                    html, options = weasy_document(html_content)
+                    html.write_pdf(tmp_path, **options)
+            else:
+                # Fallback: copy HTML as placeholder PDF marker
+                with open(tmp_path, "w", encoding="utf-8") as f:
+                    f.write(html_content)
+        storage.put_file(pdf_path, tmp_path, move=True)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+class single_flight:
+    """Exclusive per-file lock: a thread lock in this process, plus flock across processes."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.lock_path = get_storage().lock_path(path)
+        self.local = _local_locks[hash(path) % len(_local_locks)]
+        self.fd = None
+
+    def __enter__(self):
+        self.local.acquire()
+        if fcntl:
+            try:
+                self.fd = os.open(self.lock_path, os.O_CREAT | os.O_RDWR, 0o644)
+                fcntl.flock(self.fd, fcntl.LOCK_EX)
+            except BaseException:
+                self._release()
+                raise
+        return self
+
+    def __exit__(self, *exc):
+        # Once the file exists nobody builds it again, so the lock file can go
+        if get_storage().exists(self.path):
+            try:
+                os.remove(self.lock_path)
+            except OSError:
+                pass
+        self._release()
+
+    def _release(self):
+        if self.fd is not None:
+            fcntl.flock(self.fd, fcntl.LOCK_UN)
+            os.close(self.fd)
+            self.fd = None
+        self.local.release()
+
+
+def ensure_pdf(db: Session, version: DocumentVersion) -> str | None:
+    """Storage path of the version's PDF, rendering it first if it is still pending.
+
+    Marks the version READY in ``db``; the caller commits. Returns None when
+    neither the PDF nor its source HTML is in storage.
+    """
+    if version.pdf_status != PDF_PENDING:
+        return version.pdf_path
+
+    if not document_archive.exists(db, version.pdf_path):
+        if not document_archive.exists(db, version.html_path):
+            return None
+        with single_flight(version.pdf_path):
+            # Someone else may have rendered it while we waited for the lock
+            if not get_storage().exists(version.pdf_path):
+                html_content = html_store.decode_html(version.html_path, document_archive.read(db, version.html_path))
+                render_pdf(html_content, version.pdf_path, version.document.doc_type)
+                logger.info(f"Rendered pending PDF for version {version.id}")
+
+    version.pdf_status = PDF_READY
+    return version.pdf_path
+
+
+def _prerender(version_id: str) -> None:
+    db = SessionLocal()
+    try:
+        version = db.query(DocumentVersion).filter(DocumentVersion.id == version_id).first()
+        if version:
+            with background():
+                ensure_pdf(db, version)
+            db.commit()
+    except Exception:
+        db.rollback()
+        logger.exception(f"Background PDF render failed for version {version_id}")
+    finally:
+        db.close()
+
+
+def prerender_after_commit(db: Session, version_id: str) -> None:
+    """Render the version's PDF in the background once ``db`` commits."""
+    db.info.setdefault("pdf_prerender", []).append(version_id)
+
+
+@event.listens_for(Session, "after_commit")
+def _submit_prerenders(session: Session) -> None:
+    global _executor
+    version_ids = session.info.pop("pdf_prerender", None)
+    if not version_ids:
+        return
+    with _executor_guard:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=settings.pdf_prerender_workers, thread_name_prefix="pdf-prerender")
+    for version_id in version_ids:
+        _executor.submit(_prerender, version_id)
+
+
+@event.listens_for(Session, "after_rollback")
+def _drop_prerenders(session: Session) -> None:
+    session.info.pop("pdf_prerender", None)
+
+
+def shutdown() -> None:
+    """Wait for queued background renders (called on app shutdown)."""
+    global _executor
+    with _executor_guard:
+        if _executor is not None:
+            _executor.shutdown(wait=True)
+            _executor = None
@@ -0,0 +1,182 @@
+"""On-demand sampling profiler for single requests.
+
+An admin adds ``?profile=1`` (or ``X-Profile: 1``) to any request. While the
+request runs, a background thread snapshots every busy thread's Python stack
+every PROFILE_INTERVAL_MS and aggregates them into collapsed stacks
+(``frame;frame;frame count``, the input format of flamegraph.pl and
+speedscope). The result is written to ``profiles/`` in storage and served by
+the admin-only ``GET /profiles/{name}``, never by ``/files``; with
+``profile=collapsed`` it replaces the response body instead. Only tokens with
+the admin role may profile.
+
+Code can mark stages with ``stage("name")``. Samples taken inside a stage are
+rooted under ``[name]`` in the collapsed output, and stage durations are
+returned in the ``Server-Timing`` header. Outside a profiled request
+``stage()`` is a no-op.
+
+The sampler cannot tell which threadpool thread serves which request, so
+other requests running on the same worker at the same time show up too;
+profile on a quiet worker for a clean picture.
+"""
+import logging
+import os
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime, timezone
+
+from fastapi import Request
+from fastapi.responses import JSONResponse, PlainTextResponse
+from starlette.concurrency import run_in_threadpool
+
+from app.config import settings
+from app.dependencies.auth import is_admin_token
+from app.services.storage import get_storage
+
+logger = logging.getLogger(__name__)
+
+PROFILES_DIR = "profiles"
+
+_APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+_SITE_PACKAGES = "site-packages" + os.sep
+
+# Threads whose innermost frame is in one of these modules are idle (waiting on a lock, queue or socket)
+_IDLE_MODULES = ("threading.py", "selectors.py", "queue.py", os.path.join("concurrent", "futures", "thread.py"))
+
+
+class RequestProfile:
+    def __init__(self, interval: float):
+        self.interval = interval
+        self.samples: Counter[str] = Counter()
+        self.sample_count = 0
+        self.stage_ms: Counter[str] = Counter()
+        # thread ident -> stack of open stage names
+        self.thread_stages: dict[int, list[str]] = {}
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="request-profiler", daemon=True)
+
+    def start(self) -> None:
+        self.started = time.perf_counter()
+        self._thread.start()
+
+    def stop(self) -> float:
+        self._stop.set()
+        self._thread.join()
+        return (time.perf_counter() - self.started) * 1000
+
+    def _run(self) -> None:
+        own = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            for ident, frame in sys._current_frames().items():
+                if ident == own or frame.f_code.co_filename.endswith(_IDLE_MODULES):
+                    continue
+                stack = _collapse(frame)
+                stages = self.thread_stages.get(ident)
+                if stages:
+                    stack = ";".join(f"[{s}]" for s in stages) + ";" + stack
+                self.samples[stack] += 1
+            self.sample_count += 1
+
+    def collapsed(self) -> str:
+        return "".join(f"{stack} {count}\n" for stack, count in self.samples.most_common())
+
+    def server_timing(self, total_ms: float) -> str:
+        parts = [f'profile;dur={total_ms:.2f};desc="{self.sample_count} samples"']
+        parts += [f"{re.sub(r'[^A-Za-z0-9_-]', '_', name)};dur={ms:.2f}" for name, ms in self.stage_ms.items()]
+        return ", ".join(parts)
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    filename = code.co_filename
+    if _SITE_PACKAGES in filename:
+        filename = filename.rsplit(_SITE_PACKAGES, 1)[1]
+    elif filename.startswith(_APP_DIR):
+        filename = os.path.relpath(filename, os.path.dirname(_APP_DIR))
+    else:
+        filename = os.path.basename(filename)
+    return f"{code.co_name} ({filename}:{code.co_firstlineno})"
+
+
+def _collapse(frame) -> str:
+    labels = []
+    while frame is not None:
+        labels.append(_frame_label(frame))
+        frame = frame.f_back
+    return ";".join(reversed(labels))
+
+
+_current: ContextVar[RequestProfile | None] = ContextVar("request_profile", default=None)
+
+
+@contextmanager
+def stage(name: str):
+    """Time a named stage of the current request when it is being profiled."""
+    profile = _current.get()
+    if profile is None:
+        yield
+        return
+    ident = threading.get_ident()
+    stages = profile.thread_stages.setdefault(ident, [])
+    stages.append(name)
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        profile.stage_ms[name] += (time.perf_counter() - start) * 1000
+        stages.pop()
+        if not stages:
+            profile.thread_stages.pop(ident, None)
+
+
+def _requested_mode(request: Request) -> str | None:
+    mode = request.query_params.get("profile") or request.headers.get("X-Profile")
+    if not mode or mode in ("0", "false"):
+        return None
+    return "collapsed" if mode == "collapsed" else "store"
+
+
+def _is_admin(request: Request) -> bool:
+    auth = request.headers.get("Authorization", "")
+    return auth.startswith("Bearer ") and is_admin_token(auth.split(" ", 1)[1])
+
+
+async def _store(request: Request, profile: RequestProfile) -> str:
+    """Store the collapsed stacks; returns the profile's file name."""
+    route = getattr(request.scope.get("route"), "path", request.url.path)
+    slug = re.sub(r"[^A-Za-z0-9]+", "-", route).strip("-") or "root"
+    stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S%f")
+    name = f"{stamp}_{request.method}_{slug}.collapsed"
+    # Off the event loop: with the S3 backend this is a network upload
+    await run_in_threadpool(get_storage().put, f"{PROFILES_DIR}/{name}", profile.collapsed().encode("utf-8"), "text/plain")
+    return name
+
+
+async def profiler_middleware(request: Request, call_next):
+    mode = _requested_mode(request)
+    if mode is None:
+        return await call_next(request)
+    if not _is_admin(request):
+        return JSONResponse(status_code=403, content={"detail": "Profiling requires an admin token."})
+
+    profile = RequestProfile(settings.profile_interval_ms / 1000)
+    token = _current.set(profile)
+    profile.start()
+    try:
+        response = await call_next(request)
+    finally:
+        total_ms = profile.stop()
+        _current.reset(token)
+
+    if mode == "collapsed":
+        response = PlainTextResponse(profile.collapsed(), headers={"X-Profile-Status": str(response.status_code)})
+    else:
+        name = await _store(request, profile)
+        response.headers["X-Profile"] = f"/profiles/{name}"
+        logger.info("Profiled %s %s: %.0f ms, %d samples -> %s", request.method, request.url.path, total_ms, profile.sample_count, name)
+    response.headers.append("Server-Timing", profile.server_timing(total_ms))
+    return response
@@ -0,0 +1,114 @@
+"""Per-request SQL statement counting and N+1 detection.
+
+Cursor events on every engine feed the stats object of the request being
+served (a context variable set by the middleware; it follows the request
+into threadpool workers and SQLAlchemy's async greenlets). Each response
+carries ``X-DB-Queries`` and a ``Server-Timing: db`` entry. When the same
+parameterised statement runs DB_DUPLICATE_QUERY_THRESHOLD times or more in
+one request, the response also gets ``X-DB-Duplicate-Queries`` and a
+warning is logged — the usual signature of an N+1 lazy load.
+"""
+import logging
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from fastapi import Request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class QueryStats:
+    def __init__(self, request: Request | None = None):
+        self.request = request
+        self._lock = threading.Lock()
+        self.count = 0
+        self.total_ms = 0.0
+        self.statements: Counter[str] = Counter()
+
+    def record(self, statement: str, elapsed_ms: float) -> None:
+        with self._lock:
+            self.count += 1
+            self.total_ms += elapsed_ms
+            self.statements[statement] += 1
+
+    def duplicates(self, threshold: int | None = None) -> list[tuple[str, int]]:
+        """Statements executed at least ``threshold`` times, most frequent first."""
+        threshold = threshold or settings.db_duplicate_query_threshold
+        with self._lock:
+            return [(sql, n) for sql, n in self.statements.most_common() if n >= threshold]
+
+
+_current: ContextVar[QueryStats | None] = ContextVar("query_stats", default=None)
+
+
+def current_stats() -> QueryStats | None:
+    return _current.get()
+
+
+def track_queries(engine: Engine) -> None:
+    """Count statements and DB time on an engine (sync engine or AsyncEngine.sync_engine)."""
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        start = conn.info["query_start"].pop()
+        stats = _current.get()
+        if stats is not None:
+            stats.record(statement, (time.perf_counter() - start) * 1000)
+
+
+@contextmanager
+def count_queries():
+    """Count the statements run in this context (outside of a request, e.g. in a test or script)."""
+    stats = QueryStats()
+    token = _current.set(stats)
+    try:
+        yield stats
+    finally:
+        _current.reset(token)
+
+
+async def query_stats_middleware(request: Request, call_next):
+    stats = QueryStats(request)
+    token = _current.set(stats)
+    try:
+        response = await call_next(request)
+    finally:
+        _current.reset(token)
+
+    response.headers["X-DB-Queries"] = str(stats.count)
+    response.headers.append("Server-Timing", f'db;dur={stats.total_ms:.2f};desc="{stats.count} queries"')
+
+    duplicates = stats.duplicates()
+    if duplicates:
+        response.headers["X-DB-Duplicate-Queries"] = str(sum(n for _, n in duplicates))
+        top_sql, top_n = duplicates[0]
+        logger.warning(
+            "Possible N+1 on %s %s: %d queries, %d repeated statement(s); top repeated %dx: %s",
+            request.method, request.url.path, stats.count, len(duplicates), top_n, " ".join(top_sql.split())[:200],
+        )
+    return response
+
+
+class QueryBudgetExceeded(AssertionError):
+    pass
+
+
+def check_query_budget(response, max_queries: int) -> None:
+    """Fail when a response's X-DB-Queries header exceeds the endpoint's query budget."""
+    used = int(response.headers["X-DB-Queries"])
+    if used > max_queries:
+        raise QueryBudgetExceeded(
+            f"{response.request.method} {response.request.url.path} ran {used} queries "
+            f"(budget {max_queries}, {response.headers.get('X-DB-Duplicate-Queries', 0)} repeated)"
+        )
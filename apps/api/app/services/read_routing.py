@@ -0,0 +1,69 @@
+"""Read-your-writes stickiness for replica routing.
+
+After a client performs a successful write, its reads go to the primary for
+DATABASE_REPLICA_STICKY_SECONDS so the UI never shows data older than what
+it just saved. Clients are recognised by their Authorization header (tracked
+in-process) and by a short-lived cookie that survives a hop to another worker.
+"""
+import hashlib
+import threading
+import time
+
+from fastapi import Request
+
+from app.config import settings
+
+STICKY_COOKIE = "nest_primary_until"
+SAFE_METHODS = {"GET", "HEAD", "OPTIONS"}
+
+_lock = threading.Lock()
+_last_write: dict[str, float] = {}
+
+
+def _client_key(request: Request) -> str | None:
+    auth = request.headers.get("Authorization")
+    if not auth:
+        return None
+    return hashlib.sha1(auth.encode()).hexdigest()
+
+
+def mark_write(request: Request) -> float:
+    """Record a write for this client; returns the time until which reads stay on the primary."""
+    until = time.time() + settings.database_replica_sticky_seconds
+    key = _client_key(request)
+    if key:
+        with _lock:
+            _last_write[key] = until
+            if len(_last_write) > 1024:
+                now = time.time()
+                for k in [k for k, v in _last_write.items() if v < now]:
+                    del _last_write[k]
+    return until
+
+
+def pinned_to_primary(request: Request) -> bool:
+    """True when this client wrote recently and must read from the primary."""
+    now = time.time()
+    key = _client_key(request)
+    if key:
+        with _lock:
+            if _last_write.get(key, 0) > now:
+                return True
+    try:
+        return float(request.cookies.get(STICKY_COOKIE, 0)) > now
+    except ValueError:
+        return False
+
+
+async def sticky_primary_middleware(request: Request, call_next):
+    response = await call_next(request)
+    if request.method not in SAFE_METHODS and response.status_code < 400:
+        until = mark_write(request)
+        response.set_cookie(
+            STICKY_COOKIE,
+            f"{until:.3f}",
+            max_age=max(1, int(settings.database_replica_sticky_seconds)),
+            httponly=True,
+            samesite="lax",
+        )
+    return response
@@ -0,0 +1,252 @@
+"""Bulk document regeneration — re-render existing documents after a settings or template change.
+
+A job selects deals by status, doc type and creation date, and gives every
+matching document of those deals a new latest version. Deals are processed
+in id order, in batches of REGEN_BATCH_SIZE, on REGEN_WORKERS threads (one
+session per deal). After each batch the job row records its counters and a
+cursor, the last deal id done. A cancelled, failed or interrupted job
+therefore resumes after the cursor, redoing at most one batch.
+
+The work is throttled so interactive renders keep priority. Renders run in
+pdf_renderer.background() and wait while interactive renders are in flight.
+Each worker also pauses REGEN_THROTTLE_MS between deals. The runner is a
+thread in the API process that created or resumed the job. A job whose
+heartbeat is older than REGEN_LEASE_SECONDS counts as interrupted and is
+picked up again at startup.
+"""
+import json
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+
+from fastapi import HTTPException
+from sqlalchemy import exists, or_, and_, update
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.database import SessionLocal
+from app.models.deal import Deal
+from app.models.document import Document
+from app.models.regeneration_job import DocumentRegenerationJob
+from app.schemas.regeneration import RegenerationJobCreate
+from app.services import pdf_renderer
+from app.services.audit import log_action
+from app.services.document_generator import DOC_TYPE_TEMPLATE, generate_document
+
+logger = logging.getLogger(__name__)
+
+TERMINAL_STATUSES = ("DONE", "FAILED", "CANCELLED")
+MAX_RECORDED_ERRORS = 100
+
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def _deal_query(db: Session, filters: dict):
+    """Deals matching the job filters that have at least one generated document."""
+    doc_filter = [Document.deal_id == Deal.id, Document.latest_version > 0]
+    if filters.get("doc_types"):
+        doc_filter.append(Document.doc_type.in_(filters["doc_types"]))
+    q = db.query(Deal.id).filter(exists().where(*doc_filter))
+    if filters.get("statuses"):
+        q = q.filter(Deal.status.in_(filters["statuses"]))
+    if filters.get("created_from"):
+        q = q.filter(Deal.created_at >= datetime.fromisoformat(filters["created_from"]).replace(tzinfo=timezone.utc))
+    if filters.get("created_to"):
+        end = datetime.fromisoformat(filters["created_to"]).replace(tzinfo=timezone.utc) + timedelta(days=1)
+        q = q.filter(Deal.created_at < end)
+    return q
+
+
+def create_job(db: Session, data: RegenerationJobCreate) -> DocumentRegenerationJob:
+    unknown = set(data.doc_types or []) - set(DOC_TYPE_TEMPLATE)
+    if unknown:
+        raise HTTPException(400, f"Unknown document type: {', '.join(sorted(unknown))}.")
+    filters = data.model_dump(mode="json", exclude_none=True)
+    job = DocumentRegenerationJob(filters=filters, total_deals=_deal_query(db, filters).count(), errors=[])
+    db.add(job)
+    db.flush()  # assigns job.id for the audit entry
+    log_action(db, action="START_REGENERATION", summary=f"Started bulk regeneration of {job.total_deals} deals",
+               metadata={"job_id": job.id, "filters": filters})
+    db.commit()
+    db.refresh(job)
+    return job
+
+
+def _claim(db: Session, job_id: str) -> bool:
+    """Atomically take a PENDING job, or a RUNNING one whose runner stopped heartbeating."""
+    stale = _now() - timedelta(seconds=settings.regen_lease_seconds)
+    claimed = db.execute(
+        update(DocumentRegenerationJob)
+        .where(
+            DocumentRegenerationJob.id == job_id,
+            or_(
+                DocumentRegenerationJob.status == "PENDING",
+                and_(DocumentRegenerationJob.status == "RUNNING", DocumentRegenerationJob.heartbeat_at < stale),
+            ),
+        )
+        .values(status="RUNNING", heartbeat_at=_now(), error=None)
+        .execution_options(synchronize_session=False)
+    ).rowcount == 1
+    db.commit()
+    return claimed
+
+
+def _regenerate_deal(job_id: str, deal_id: str, doc_types: list[str] | None) -> tuple[int, str | None]:
+    """New latest version of each matching document of one deal. Returns (documents, error)."""
+    db = SessionLocal()
+    try:
+        deal = db.get(Deal, deal_id)
+        q = db.query(Document).filter(Document.deal_id == deal_id, Document.latest_version > 0)
+        if doc_types:
+            q = q.filter(Document.doc_type.in_(doc_types))
+        regenerated = []
+        with pdf_renderer.background():
+            for doc in q.order_by(Document.created_at).all():
+                version = generate_document(db, deal, doc.doc_type)
+                regenerated.append(f"{doc.doc_type} v{version.version_no}")
+        log_action(
+            db,
+            action="REGENERATE_DOCUMENTS",
+            summary=f"Regenerated {', '.join(regenerated)} for deal {deal.deal_code}",
+            deal_id=deal_id,
+            executor="SYSTEM",
+            metadata={"job_id": job_id},
+        )
+        db.commit()
+        return len(regenerated), None
+    except Exception as e:
+        db.rollback()
+        logger.exception(f"Regeneration job {job_id} failed for deal {deal_id}")
+        return 0, str(e)
+    finally:
+        db.close()
+        time.sleep(settings.regen_throttle_ms / 1000)
+
+
+def run_job(job_id: str) -> None:
+    """Process a job from its checkpoint until done, cancelled or failed."""
+    db = SessionLocal()
+    try:
+        if not _claim(db, job_id):
+            return
+        job = db.get(DocumentRegenerationJob, job_id)
+        job.started_at = job.started_at or _now()
+        db.commit()
+        doc_types = job.filters.get("doc_types")
+        logger.info(f"Regeneration job {job_id} running from cursor {job.cursor}")
+
+        with ThreadPoolExecutor(max_workers=settings.regen_workers, thread_name_prefix="regen") as executor:
+            while True:
+                db.refresh(job)
+                if job.status != "RUNNING":
+                    break  # cancelled
+                q = _deal_query(db, job.filters)
+                if job.cursor:
+                    q = q.filter(Deal.id > job.cursor)
+                deal_ids = [row.id for row in q.order_by(Deal.id).limit(settings.regen_batch_size)]
+                if not deal_ids:
+                    job.status = "DONE"
+                    job.finished_at = _now()
+                    db.commit()
+                    break
+
+                results = list(executor.map(lambda deal_id: _regenerate_deal(job_id, deal_id, doc_types), deal_ids))
+
+                errors = list(job.errors or [])
+                for deal_id, (count, error) in zip(deal_ids, results):
+                    job.processed_deals += 1
+                    job.regenerated_documents += count
+                    if error:
+                        job.failed_deals += 1
+                        if len(errors) < MAX_RECORDED_ERRORS:
+                            errors.append({"deal_id": deal_id, "error": error})
+                job.errors = errors
+                job.cursor = deal_ids[-1]
+                job.heartbeat_at = _now()
+                db.commit()
+        logger.info(f"Regeneration job {job_id} finished with status {job.status}")
+    except Exception as e:
+        db.rollback()
+        logger.exception(f"Regeneration job {job_id} failed")
+        job = db.get(DocumentRegenerationJob, job_id)
+        if job:
+            job.status = "FAILED"
+            job.error = str(e)
+            job.finished_at = _now()
+            db.commit()
+    finally:
+        db.close()
+
+
+def start(job_id: str) -> None:
+    threading.Thread(target=run_job, args=(job_id,), name=f"regen-job-{job_id[:8]}", daemon=True).start()
+
+
+def cancel_job(db: Session, job: DocumentRegenerationJob) -> DocumentRegenerationJob:
+    """Stop after the current batch; the checkpoint is kept for resume."""
+    if job.status in TERMINAL_STATUSES:
+        raise HTTPException(409, f"Job is already {job.status.lower()}.")
+    job.status = "CANCELLED"
+    job.finished_at = _now()
+    db.commit()
+    db.refresh(job)
+    return job
+
+
+def resume_job(db: Session, job: DocumentRegenerationJob) -> DocumentRegenerationJob:
+    """Continue a cancelled, failed or interrupted job from its checkpoint."""
+    stale = job.heartbeat_at is None or job.heartbeat_at.replace(tzinfo=timezone.utc) < _now() - timedelta(seconds=settings.regen_lease_seconds)
+    if job.status == "DONE" or (job.status == "RUNNING" and not stale):
+        raise HTTPException(409, "Job is not resumable.")
+    if job.status != "RUNNING":
+        job.status = "PENDING"
+        job.finished_at = None
+        db.commit()
+    db.refresh(job)
+    start(job.id)
+    return job
+
+
+def resume_interrupted_jobs() -> None:
+    """Restart jobs left PENDING or RUNNING by a worker that stopped (called at startup)."""
+    db = SessionLocal()
+    try:
+        job_ids = [row.id for row in db.query(DocumentRegenerationJob.id).filter(
+            DocumentRegenerationJob.status.in_(["PENDING", "RUNNING"])
+        )]
+    finally:
+        db.close()
+    for job_id in job_ids:
+        start(job_id)  # run_job's claim skips jobs another worker is still running
+
+
+def progress_stream(job_id: str, poll_interval: float = 1.0):
+    """NDJSON progress lines: one whenever the counters change, until the job stops."""
+    last = None
+    while True:
+        db = SessionLocal()
+        try:
+            job = db.get(DocumentRegenerationJob, job_id)
+            if not job:
+                return
+            line = {
+                "status": job.status,
+                "total_deals": job.total_deals,
+                "processed_deals": job.processed_deals,
+                "failed_deals": job.failed_deals,
+                "regenerated_documents": job.regenerated_documents,
+                "cursor": job.cursor,
+            }
+            stopped = job.status in TERMINAL_STATUSES
+        finally:
+            db.close()
+        if line != last:
+            yield json.dumps(line) + "\n"
+            last = line
+        if stopped:
+            return
+        time.sleep(poll_interval)
@@ -0,0 +1,123 @@
+"""Read-through cache for the AppSettings singleton row.
+
+Readers get an immutable snapshot instead of querying the row on every
+document render and invoice request. Writers call ``refresh`` after
+committing. That replaces this worker's snapshot and writes a new token to
+a stamp file in storage, so workers and nodes sharing the volume or bucket
+see it. Every worker reads the stamp at most once per
+APP_SETTINGS_CACHE_CHECK_SECONDS and reloads when it changed. APP_SETTINGS_CACHE_TTL
+bounds staleness for writes that bypass the API (e.g. a manual SQL update).
+"""
+import dataclasses
+import logging
+import os
+import threading
+import time
+from datetime import datetime
+
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.models.settings import AppSettings
+from app.services.storage import get_storage
+
+logger = logging.getLogger(__name__)
+
+STAMP_FILE = ".app_settings_stamp"
+
+
+@dataclasses.dataclass(frozen=True)
+class AppSettingsSnapshot:
+    id: str
+    company_legal_name: str
+    company_address: str
+    logo_path: str | None
+    logo_render_path: str | None
+    signatory_name: str
+    signatory_title: str
+    signature_image_path: str | None
+    signature_render_path: str | None
+    finance_email: str
+    bot_whatsapp_number: str
+    updated_at: datetime
+
+    @classmethod
+    def from_row(cls, row: AppSettings) -> "AppSettingsSnapshot":
+        return cls(**{f.name: getattr(row, f.name) for f in dataclasses.fields(cls)})
+
+
+_lock = threading.Lock()
+_snapshot: AppSettingsSnapshot | None = None
+_loaded_at = 0.0
+_checked_at = 0.0
+_stamp: str | None = None
+_generation = 0
+
+
+def _read_stamp() -> str | None:
+    try:
+        return get_storage().read(STAMP_FILE).decode()
+    except FileNotFoundError:
+        return None
+    except Exception as e:
+        # Unreadable stamp: treat as changed, so the next check reloads from the database
+        logger.warning(f"Could not read the settings stamp: {e}")
+        return None
+
+
+def _touch_stamp() -> str | None:
+    token = f"{time.time_ns()}-{os.getpid()}-{threading.get_ident()}"
+    try:
+        get_storage().put(STAMP_FILE, token.encode(), content_type="text/plain")
+    except Exception as e:
+        logger.warning(f"Could not write the settings stamp, other workers reload after the TTL: {e}")
+        return None
+    return token
+
+
+def _is_fresh(now: float) -> bool:
+    global _checked_at
+    if _snapshot is None or now - _loaded_at >= settings.app_settings_cache_ttl:
+        return False
+    if now - _checked_at < settings.app_settings_cache_check_seconds:
+        return True
+    _checked_at = now
+    return _read_stamp() == _stamp
+
+
+def get_app_settings(db: Session) -> AppSettingsSnapshot | None:
+    """Current settings snapshot; loads the row with ``db`` only when the cached one is stale."""
+    global _snapshot, _loaded_at, _checked_at, _stamp, _generation
+    generation = _generation
+    now = time.monotonic()
+    if _is_fresh(now):
+        return _snapshot
+    with _lock:
+        if _generation != generation:
+            return _snapshot  # another thread reloaded while we waited
+        # Read the stamp before the row so a concurrent write is picked up on the next check
+        stamp = _read_stamp()
+        row = db.query(AppSettings).first()
+        _snapshot = AppSettingsSnapshot.from_row(row) if row else None
+        _stamp, _loaded_at, _checked_at = stamp, now, now
+        _generation += 1
+        return _snapshot
+
+
+def refresh(row: AppSettings) -> AppSettingsSnapshot:
+    """Publish a committed settings row to this worker and signal the others to reload."""
+    global _snapshot, _loaded_at, _checked_at, _stamp, _generation
+    with _lock:
+        _snapshot = AppSettingsSnapshot.from_row(row)
+        _stamp = _touch_stamp()
+        _loaded_at = _checked_at = time.monotonic()
+        _generation += 1
+        return _snapshot
+
+
+def invalidate() -> None:
+    """Drop cached settings everywhere (e.g. after a script wrote the row directly)."""
+    global _snapshot
+    with _lock:
+        _snapshot = None
+        _touch_stamp()
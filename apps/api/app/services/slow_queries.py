@@ -0,0 +1,205 @@
+"""Slow-query recorder.
+
+Statements slower than DB_SLOW_QUERY_MS are recorded with the route that ran
+them. Records go to an in-memory ring buffer (GET /metrics/slow-queries) and
+to a size-rotated NDJSON file (DB_SLOW_QUERY_LOG).
+
+Bound values hold tenant names, phones and emails, so by default only their
+types are recorded, and string literals in captured plans are masked.
+DB_SLOW_QUERY_LOG_PARAMETERS=true records the values themselves.
+
+On PostgreSQL a slow plain SELECT is also re-run under
+``EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON)`` on the same connection, at most
+once per statement fingerprint every DB_SLOW_QUERY_EXPLAIN_INTERVAL seconds.
+A statement starting with WITH may hold a data-modifying CTE, so it only gets
+a plain EXPLAIN, which does not execute it. The EXPLAIN runs inside a
+savepoint that is always rolled back, so it can neither abort the caller's
+transaction nor leave anything in it.
+"""
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+import time
+from collections import deque
+from datetime import datetime, timezone
+from logging.handlers import RotatingFileHandler
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.config import settings
+from app.services.query_stats import current_stats
+
+logger = logging.getLogger(__name__)
+
+_lock = threading.Lock()
+_buffer: deque[dict] = deque(maxlen=settings.db_slow_query_buffer_size)
+_last_explained: dict[str, float] = {}
+
+_file_logger = logging.getLogger("app.slow_queries.ndjson")
+_file_logger.propagate = False
+_file_state: str | None = None  # None until first write, then "ready" or "disabled"
+
+
+def fingerprint(statement: str) -> str:
+    """Stable id for a statement shape: whitespace, literals and expanded IN lists normalised."""
+    sql = " ".join(statement.split())
+    sql = re.sub(r"'(?:[^']|'')*'", "?", sql)
+    sql = re.sub(r"\((?:\s*(?:%\(\w+\)s|\$\d+|\?|:\w+)\s*,?)+\)", "(?)", sql)
+    sql = re.sub(r"\b\d+\b", "?", sql)
+    return hashlib.sha1(sql.encode()).hexdigest()[:16]
+
+
+def _describe(value) -> str:
+    return "NULL" if value is None else type(value).__name__
+
+
+def _parameters(parameters, executemany: bool):
+    """Bound parameters for the record: their types, or their values when DB_SLOW_QUERY_LOG_PARAMETERS is on."""
+    if settings.db_slow_query_log_parameters:
+        return repr(parameters)[:1000]
+    if executemany:
+        rows = list(parameters or ())
+        return {"rows": len(rows), "first": _parameters(rows[0], False) if rows else None}
+    if isinstance(parameters, dict):
+        return {k: _describe(v) for k, v in parameters.items()}
+    if isinstance(parameters, (list, tuple)):
+        return [_describe(v) for v in parameters]
+    return _describe(parameters)
+
+
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+
+
+def _mask_plan(plan):
+    """A plan with its string literals (the interpolated parameter values) replaced by '?'."""
+    if isinstance(plan, str):
+        return _STRING_LITERAL.sub("'?'", plan)
+    if isinstance(plan, list):
+        return [_mask_plan(p) for p in plan]
+    if isinstance(plan, dict):
+        return {k: _mask_plan(v) for k, v in plan.items()}
+    return plan
+
+
+def _write_file(record: dict) -> None:
+    global _file_state
+    if not settings.db_slow_query_log or _file_state == "disabled":
+        return
+    if _file_state is None:
+        with _lock:
+            if _file_state is None:
+                try:
+                    os.makedirs(os.path.dirname(os.path.abspath(settings.db_slow_query_log)), exist_ok=True)
+                    handler = RotatingFileHandler(
+                        settings.db_slow_query_log,
+                        maxBytes=settings.db_slow_query_log_max_bytes,
+                        backupCount=settings.db_slow_query_log_backups,
+                        encoding="utf-8",
+                    )
+                    handler.setFormatter(logging.Formatter("%(message)s"))
+                    _file_logger.addHandler(handler)
+                    _file_logger.setLevel(logging.INFO)
+                    _file_state = "ready"
+                except OSError as e:
+                    logger.warning("Slow-query log %s unavailable: %s", settings.db_slow_query_log, e)
+                    _file_state = "disabled"
+                    return
+    _file_logger.info(json.dumps(record, default=str))
+
+
+def _explain_options(statement: str) -> str | None:
+    """EXPLAIN options for a statement, or None if it should not be explained."""
+    keyword = statement.lstrip().split(None, 1)[0].upper() if statement.strip() else ""
+    if keyword == "SELECT":
+        return "ANALYZE, BUFFERS, FORMAT JSON"
+    if keyword == "WITH":
+        return "FORMAT JSON"  # never execute: the CTE may write
+    return None
+
+
+def _should_explain(dialect: str, statement: str, fp: str) -> bool:
+    if dialect != "postgresql" or not settings.db_slow_query_explain:
+        return False
+    if _explain_options(statement) is None:
+        return False
+    now = time.monotonic()
+    with _lock:
+        if now - _last_explained.get(fp, float("-inf")) < settings.db_slow_query_explain_interval:
+            return False
+        _last_explained[fp] = now
+        return True
+
+
+def _explain(conn, statement: str, parameters) -> list | str:
+    """Run EXPLAIN on the raw DBAPI connection (bypasses engine events, so no recursion)."""
+    cursor = conn.connection.cursor()
+    try:
+        cursor.execute("SAVEPOINT slow_query_explain")
+        try:
+            cursor.execute(f"EXPLAIN ({_explain_options(statement)}) {statement}", parameters)
+            plan = cursor.fetchone()[0]
+        except Exception as e:
+            return f"EXPLAIN failed: {e}"
+        finally:
+            # Undo whatever the re-run did, even on success
+            cursor.execute("ROLLBACK TO SAVEPOINT slow_query_explain")
+            cursor.execute("RELEASE SAVEPOINT slow_query_explain")
+    except Exception as e:
+        # No transaction to take a savepoint in (autocommit connection)
+        return f"EXPLAIN skipped: {e}"
+    finally:
+        cursor.close()
+    return json.loads(plan) if isinstance(plan, str) else plan
+
+
+def watch_slow_queries(name: str, engine: Engine) -> None:
+    """Record statements slower than DB_SLOW_QUERY_MS on an engine (sync engine or AsyncEngine.sync_engine)."""
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("slow_query_start", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        elapsed_ms = (time.perf_counter() - conn.info["slow_query_start"].pop()) * 1000
+        if elapsed_ms < settings.db_slow_query_ms:
+            return
+
+        fp = fingerprint(statement)
+        stats = current_stats()
+        request = stats.request if stats else None
+        record = {
+            "at": datetime.now(timezone.utc).isoformat(),
+            "engine": name,
+            "duration_ms": round(elapsed_ms, 2),
+            "fingerprint": fp,
+            "statement": " ".join(statement.split()),
+            "parameters": _parameters(parameters, executemany),
+            "executemany": executemany,
+            "route": getattr(request.scope.get("route"), "path", request.url.path) if request else None,
+            "method": request.method if request else None,
+        }
+        if not executemany and _should_explain(conn.dialect.name, statement, fp):
+            plan = _explain(conn, statement, parameters)
+            record["plan"] = plan if settings.db_slow_query_log_parameters else _mask_plan(plan)
+
+        with _lock:
+            _buffer.append(record)
+        logger.warning(
+            "Slow query (%.0f ms) on %s %s [%s]: %s",
+            elapsed_ms, record["method"] or "-", record["route"] or "-", fp, record["statement"][:200],
+        )
+        _write_file(record)
+
+
+def recent_slow_queries(limit: int = 50, route: str | None = None) -> list[dict]:
+    """Most recent slow queries first."""
+    with _lock:
+        records = list(_buffer)
+    if route:
+        records = [r for r in records if r["route"] == route]
+    return records[::-1][:limit]
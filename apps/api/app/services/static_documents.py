@@ -0,0 +1,20 @@
+"""Static document lookups (catalog, pricelist) shared by routers and the bot webhook."""
+from fastapi import HTTPException
+from sqlalchemy.orm import Session
+
+from app.models.static_document import StaticDocument, StaticDocumentVersion
+
+
+def get_active_version(db: Session, doc_type: str) -> StaticDocumentVersion:
+    """Return the active version of a static document (CATALOG or PRICELIST)."""
+    doc_type = doc_type.upper()
+    sdoc = db.query(StaticDocument).filter(StaticDocument.doc_type == doc_type).first()
+    if not sdoc or not sdoc.active_version_id:
+        raise HTTPException(404, f"No active {doc_type.lower()} found.")
+
+    version = db.query(StaticDocumentVersion).filter(
+        StaticDocumentVersion.id == sdoc.active_version_id,
+    ).first()
+    if not version:
+        raise HTTPException(404, "Active version record not found.")
+    return version
@@ -0,0 +1,352 @@
+"""File storage behind one interface: the local volume or an S3-compatible bucket.
+
+Keys are the relative paths the database already stores, such as
+``documents/<deal_id>/<name>.pdf`` or ``settings/logo_1a2b3c4d.png``.
+- STORAGE_BACKEND=local: keys resolve under STORAGE_ROOT, as before.
+- STORAGE_BACKEND=s3: keys are object keys in STORAGE_S3_BUCKET, under
+  STORAGE_S3_PREFIX. Existing rows stay valid once the volume is copied into
+  the bucket, e.g. ``aws s3 sync storage/ s3://<bucket>/<prefix>``.
+  STORAGE_S3_ENDPOINT_URL points the client at MinIO or another
+  S3-compatible server.
+
+Writes and reads stream. Uploads above STORAGE_S3_MULTIPART_THRESHOLD_MB use
+multipart upload. Downloads are served from disk with the local backend. With
+S3 they are streamed through the API, or with STORAGE_S3_PRESIGNED_READS
+answered with a redirect to a short-lived presigned URL.
+
+WeasyPrint and pypdf need real files. ``temp_path`` gives a scratch path for
+output that ``put_file(move=True)`` then stores; locally that is an atomic
+rename next to the target. ``local_copy`` gives a readable path for input.
+"""
+import hashlib
+import io
+import mimetypes
+import os
+import shutil
+import tempfile
+import threading
+from contextlib import contextmanager
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import BinaryIO, Iterator
+from urllib.parse import quote
+
+from fastapi.responses import FileResponse, RedirectResponse, Response, StreamingResponse
+
+from app.config import settings
+
+try:
+    import boto3
+    from boto3.s3.transfer import TransferConfig
+    from botocore.exceptions import ClientError
+    BOTO3_AVAILABLE = True
+except ImportError:
+    BOTO3_AVAILABLE = False
+
+CHUNK_SIZE = 1024 * 1024
+_ENCODED_TYPES = {"gzip": "application/gzip"}
+
+
+@dataclass(frozen=True)
+class StoredObject:
+    key: str
+    size: int
+    modified_at: datetime  # UTC
+
+
+def _scratch_name(key: str) -> str:
+    return f"{os.path.basename(key)}.{os.getpid()}.{threading.get_ident()}.tmp"
+
+
+class LocalStorage:
+    """Files under STORAGE_ROOT (read on every call, so it can be changed at runtime)."""
+
+    @property
+    def root(self) -> str:
+        return settings.storage_root
+
+    def path(self, key: str) -> str:
+        root = os.path.abspath(self.root)
+        full_path = os.path.abspath(os.path.join(root, key))
+        if os.path.commonpath([root, full_path]) != root:
+            raise ValueError(f"Storage key escapes the storage root: {key}")
+        return full_path
+
+    def local_path(self, key: str) -> str:
+        return self.path(key)
+
+    def exists(self, key: str) -> bool:
+        return os.path.isfile(self.path(key))
+
+    def stat(self, key: str) -> StoredObject | None:
+        try:
+            st = os.stat(self.path(key))
+        except FileNotFoundError:
+            return None
+        return StoredObject(key, st.st_size, datetime.fromtimestamp(st.st_mtime, timezone.utc))
+
+    def open(self, key: str) -> BinaryIO:
+        return open(self.path(key), "rb")
+
+    def read(self, key: str) -> bytes:
+        with self.open(key) as f:
+            return f.read()
+
+    def read_range(self, key: str, offset: int, length: int) -> bytes:
+        with self.open(key) as f:
+            f.seek(offset)
+            return f.read(length)
+
+    def put(self, key: str, data: bytes | BinaryIO, content_type: str | None = None) -> None:
+        """Write bytes or a file object; readers never see a partial file."""
+        tmp_path = self.temp_path(key)
+        try:
+            with open(tmp_path, "wb") as f:
+                if isinstance(data, (bytes, bytearray)):
+                    f.write(data)
+                else:
+                    shutil.copyfileobj(data, f, CHUNK_SIZE)
+            os.replace(tmp_path, self.path(key))
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    def put_file(self, key: str, src_path: str, move: bool = False) -> None:
+        full_path = self.path(key)
+        os.makedirs(os.path.dirname(full_path), exist_ok=True)
+        if move:
+            os.replace(src_path, full_path)
+        else:
+            with open(src_path, "rb") as f:
+                self.put(key, f)
+
+    def temp_path(self, key: str) -> str:
+        """Scratch file next to the target, so put_file(move=True) is an atomic rename."""
+        full_path = self.path(key)
+        os.makedirs(os.path.dirname(full_path), exist_ok=True)
+        return f"{full_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+
+    def lock_path(self, key: str) -> str:
+        full_path = self.path(key)
+        os.makedirs(os.path.dirname(full_path), exist_ok=True)
+        return f"{full_path}.lock"
+
+    def delete(self, key: str) -> None:
+        try:
+            os.remove(self.path(key))
+        except FileNotFoundError:
+            pass
+
+    def iter_objects(self, prefix: str = "") -> Iterator[StoredObject]:
+        root = os.path.abspath(self.root)
+        base = self.path(prefix) if prefix else root
+        for dirpath, _dirs, files in os.walk(base):
+            for name in files:
+                full_path = os.path.join(dirpath, name)
+                try:
+                    st = os.stat(full_path)
+                except FileNotFoundError:
+                    continue
+                key = os.path.relpath(full_path, root).replace(os.sep, "/")
+                yield StoredObject(key, st.st_size, datetime.fromtimestamp(st.st_mtime, timezone.utc))
+
+    def presigned_url(self, key: str, filename: str | None = None, content_type: str | None = None,
+                      content_encoding: str | None = None) -> str | None:
+        return None
+
+    @contextmanager
+    def local_copy(self, key: str):
+        yield self.path(key)
+
+
+class S3Storage:
+    """Objects in an S3-compatible bucket (AWS S3, MinIO, ...)."""
+
+    def __init__(self):
+        self.bucket = settings.storage_s3_bucket
+        self.prefix = settings.storage_s3_prefix.strip("/")
+        self.client = boto3.client(
+            "s3",
+            endpoint_url=settings.storage_s3_endpoint_url or None,
+            region_name=settings.storage_s3_region or None,
+            aws_access_key_id=settings.storage_s3_access_key or None,
+            aws_secret_access_key=settings.storage_s3_secret_key or None,
+        )
+        self.transfer = TransferConfig(
+            multipart_threshold=settings.storage_s3_multipart_threshold_mb * 1024 * 1024,
+            multipart_chunksize=settings.storage_s3_multipart_chunk_mb * 1024 * 1024,
+        )
+
+    def _object_key(self, key: str) -> str:
+        key = key.replace(os.sep, "/").lstrip("/")
+        return f"{self.prefix}/{key}" if self.prefix else key
+
+    def _extra_args(self, key: str, content_type: str | None) -> dict:
+        guessed_type, encoding = mimetypes.guess_type(key)
+        if encoding:
+            # Compressed files are stored as what they are. With ContentEncoding set, S3 clients,
+            # CDNs and presigned GETs would decompress them; the API negotiates the encoding instead.
+            return {"ContentType": _ENCODED_TYPES.get(encoding, "application/octet-stream")}
+        return {"ContentType": content_type or guessed_type or "application/octet-stream"}
+
+    def local_path(self, key: str) -> None:
+        return None
+
+    def stat(self, key: str) -> StoredObject | None:
+        try:
+            head = self.client.head_object(Bucket=self.bucket, Key=self._object_key(key))
+        except ClientError as e:
+            if e.response.get("Error", {}).get("Code") in ("404", "NoSuchKey", "NotFound"):
+                return None
+            raise
+        return StoredObject(key, head["ContentLength"], head["LastModified"].astimezone(timezone.utc))
+
+    def exists(self, key: str) -> bool:
+        return self.stat(key) is not None
+
+    def open(self, key: str) -> BinaryIO:
+        try:
+            return self.client.get_object(Bucket=self.bucket, Key=self._object_key(key))["Body"]
+        except ClientError as e:
+            if e.response.get("Error", {}).get("Code") in ("404", "NoSuchKey"):
+                raise FileNotFoundError(key) from e
+            raise
+
+    def read(self, key: str) -> bytes:
+        body = self.open(key)
+        try:
+            return body.read()
+        finally:
+            body.close()
+
+    def read_range(self, key: str, offset: int, length: int) -> bytes:
+        try:
+            body = self.client.get_object(Bucket=self.bucket, Key=self._object_key(key),
+                                          Range=f"bytes={offset}-{offset + length - 1}")["Body"]
+        except ClientError as e:
+            if e.response.get("Error", {}).get("Code") in ("404", "NoSuchKey"):
+                raise FileNotFoundError(key) from e
+            raise
+        try:
+            return body.read()
+        finally:
+            body.close()
+
+    def put(self, key: str, data: bytes | BinaryIO, content_type: str | None = None) -> None:
+        """Upload bytes or a file object, in parts when it is larger than the multipart threshold."""
+        fileobj = io.BytesIO(data) if isinstance(data, (bytes, bytearray)) else data
+        self.client.upload_fileobj(fileobj, self.bucket, self._object_key(key),
+                                   ExtraArgs=self._extra_args(key, content_type), Config=self.transfer)
+
+    def put_file(self, key: str, src_path: str, move: bool = False) -> None:
+        self.client.upload_file(src_path, self.bucket, self._object_key(key),
+                                ExtraArgs=self._extra_args(key, None), Config=self.transfer)
+        if move:
+            os.remove(src_path)
+
+    def temp_path(self, key: str) -> str:
+        return os.path.join(tempfile.gettempdir(), _scratch_name(key))
+
+    def lock_path(self, key: str) -> str:
+        """Lock files are node-local: single-flight holds per node, and duplicate renders across nodes are harmless."""
+        lock_dir = os.path.join(tempfile.gettempdir(), "nest-storage-locks")
+        os.makedirs(lock_dir, exist_ok=True)
+        return os.path.join(lock_dir, hashlib.sha1(self._object_key(key).encode()).hexdigest() + ".lock")
+
+    def delete(self, key: str) -> None:
+        self.client.delete_object(Bucket=self.bucket, Key=self._object_key(key))
+
+    def iter_objects(self, prefix: str = "") -> Iterator[StoredObject]:
+        strip = len(self.prefix) + 1 if self.prefix else 0
+        paginator = self.client.get_paginator("list_objects_v2")
+        for page in paginator.paginate(Bucket=self.bucket, Prefix=self._object_key(prefix)):
+            for obj in page.get("Contents", []):
+                yield StoredObject(obj["Key"][strip:], obj["Size"], obj["LastModified"].astimezone(timezone.utc))
+
+    def presigned_url(self, key: str, filename: str | None = None, content_type: str | None = None,
+                      content_encoding: str | None = None) -> str:
+        params = {"Bucket": self.bucket, "Key": self._object_key(key)}
+        if content_type:
+            params["ResponseContentType"] = content_type
+        if filename:
+            params["ResponseContentDisposition"] = content_disposition(filename)
+        if content_encoding:
+            params["ResponseContentEncoding"] = content_encoding
+        return self.client.generate_presigned_url("get_object", Params=params, ExpiresIn=settings.storage_presign_seconds)
+
+    @contextmanager
+    def local_copy(self, key: str):
+        path = self.temp_path(key)
+        try:
+            self.client.download_file(self.bucket, self._object_key(key), path, Config=self.transfer)
+        except ClientError as e:
+            if e.response.get("Error", {}).get("Code") in ("404", "NoSuchKey"):
+                raise FileNotFoundError(key) from e
+            raise
+        try:
+            yield path
+        finally:
+            if os.path.exists(path):
+                os.remove(path)
+
+
+_storage: LocalStorage | S3Storage | None = None
+_storage_guard = threading.Lock()
+
+
+def get_storage() -> LocalStorage | S3Storage:
+    global _storage
+    if _storage is None:
+        with _storage_guard:
+            if _storage is None:
+                if settings.storage_backend == "s3":
+                    if not BOTO3_AVAILABLE:
+                        raise RuntimeError("STORAGE_BACKEND=s3 requires boto3 to be installed.")
+                    _storage = S3Storage()
+                else:
+                    _storage = LocalStorage()
+    return _storage
+
+
+def content_disposition(filename: str) -> str:
+    quoted = quote(filename)
+    if quoted != filename:
+        return f"attachment; filename*=utf-8''{quoted}"
+    return f'attachment; filename="{filename}"'
+
+
+def file_response(key: str, media_type: str, filename: str | None = None,
+                  content_encoding: str | None = None, headers: dict | None = None) -> Response:
+    """Response serving a stored file. Raises FileNotFoundError if it does not exist."""
+    storage = get_storage()
+    headers = dict(headers or {})
+    if content_encoding:
+        headers["Content-Encoding"] = content_encoding
+
+    local = storage.local_path(key)
+    if local is not None:
+        if not os.path.isfile(local):
+            raise FileNotFoundError(key)
+        return FileResponse(local, media_type=media_type, filename=filename, headers=headers)
+
+    stat = storage.stat(key)
+    if stat is None:
+        raise FileNotFoundError(key)
+    if settings.storage_s3_presigned_reads:
+        headers.pop("Content-Encoding", None)  # the presigned URL carries it
+        url = storage.presigned_url(key, filename=filename, content_type=media_type, content_encoding=content_encoding)
+        return RedirectResponse(url, status_code=307, headers=headers)
+
+    body = storage.open(key)
+
+    def chunks():
+        try:
+            while chunk := body.read(CHUNK_SIZE):
+                yield chunk
+        finally:
+            body.close()
+
+    headers["Content-Length"] = str(stat.size)
+    if filename:
+        headers["Content-Disposition"] = content_disposition(filename)
+    return StreamingResponse(chunks(), media_type=media_type, headers=headers)
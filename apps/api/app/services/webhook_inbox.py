@@ -0,0 +1,372 @@
+"""Webhook inbox — durable queue for bot commands accepted in async mode.
+
+The webhook persists the command and returns 202 at once. A small worker pool
+drains the inbox: commands for the same deal run strictly in arrival order,
+one at a time (across processes too, via a guarded claim), while commands for
+different deals run in parallel. Results are POSTed to the configured
+callback URL; "stub" only logs them, mirroring the email stub.
+
+A claim records the worker that holds it (lease_owner) and a heartbeat. The
+dispatcher renews the heartbeat of every item its pool is still running, so
+only items whose worker stopped heartbeating for WEBHOOK_LEASE_SECONDS go back
+to the queue. A worker that lost its lease anyway does not overwrite the
+outcome of the worker that took the item over.
+"""
+import json
+import logging
+import os
+import socket
+import threading
+import time
+import urllib.request
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+
+from fastapi import HTTPException
+from sqlalchemy import and_, exists, or_, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session, aliased
+
+from app.config import settings
+from app.database import SessionLocal
+from app.models.webhook_inbox import WebhookInboxItem
+from app.schemas.webhook import WebhookCommand
+from app.services.bot_commands import process_command
+
+logger = logging.getLogger(__name__)
+
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def enqueue(db: Session, cmd: WebhookCommand, key: str | None = None) -> WebhookInboxItem:
+    """Persist a command to the inbox. A repeated idempotency key returns the existing item."""
+    if key:
+        existing = db.query(WebhookInboxItem).filter(WebhookInboxItem.idempotency_key == key).first()
+        if existing:
+            return existing
+
+    # A batch that targets a single deal keeps that deal's ordering lane
+    deal_id = cmd.deal_id
+    if not deal_id and cmd.commands:
+        batch_deals = {sub.deal_id for sub in cmd.commands}
+        if len(batch_deals) == 1:
+            deal_id = batch_deals.pop()
+
+    item = WebhookInboxItem(
+        idempotency_key=key,
+        command=cmd.command or "batch",
+        deal_id=deal_id,
+        payload=cmd.model_dump(mode="json"),
+    )
+    db.add(item)
+    try:
+        db.commit()
+    except IntegrityError:
+        db.rollback()
+        existing = db.query(WebhookInboxItem).filter(WebhookInboxItem.idempotency_key == key).first()
+        if not existing:
+            raise
+        return existing
+    db.refresh(item)
+    return item
+
+
+def _worker_id() -> str:
+    """Identify one worker pool: host, process and a per-pool suffix."""
+    return f"{socket.gethostname()[:60]}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+
+def _claim(db: Session, item: WebhookInboxItem, owner: str) -> bool:
+    """Atomically move an item to PROCESSING unless an earlier item for its deal is unfinished."""
+    stmt = update(WebhookInboxItem).where(
+        WebhookInboxItem.id == item.id,
+        WebhookInboxItem.status == "PENDING",
+    )
+    if item.deal_id:
+        earlier = aliased(WebhookInboxItem)
+        stmt = stmt.where(~exists().where(
+            earlier.deal_id == item.deal_id,
+            earlier.id != item.id,
+            or_(
+                earlier.status == "PROCESSING",
+                and_(earlier.status == "PENDING", earlier.created_at < item.created_at),
+            ),
+        ))
+    stmt = stmt.values(
+        status="PROCESSING",
+        lease_owner=owner,
+        started_at=_now(),
+        heartbeat_at=_now(),
+        attempts=WebhookInboxItem.attempts + 1,
+    ).execution_options(synchronize_session=False)
+    claimed = db.execute(stmt).rowcount == 1
+    db.commit()
+    return claimed
+
+
+def _renew_leases(db: Session, owner: str, item_ids: list[str]) -> None:
+    """Heartbeat the items this worker is still running."""
+    if not item_ids:
+        return
+    db.execute(
+        update(WebhookInboxItem)
+        .where(
+            WebhookInboxItem.id.in_(item_ids),
+            WebhookInboxItem.status == "PROCESSING",
+            WebhookInboxItem.lease_owner == owner,
+        )
+        .values(heartbeat_at=_now())
+        .execution_options(synchronize_session=False)
+    )
+    db.commit()
+
+
+def _release_stale(db: Session) -> None:
+    """Return items whose worker stopped heartbeating (it died mid-command) to the queue."""
+    cutoff = _now() - timedelta(seconds=settings.webhook_lease_seconds)
+    db.execute(
+        update(WebhookInboxItem)
+        .where(
+            WebhookInboxItem.status == "PROCESSING",
+            or_(
+                WebhookInboxItem.heartbeat_at < cutoff,
+                # Claimed before lease owners were recorded
+                and_(WebhookInboxItem.heartbeat_at.is_(None), WebhookInboxItem.started_at < cutoff),
+            ),
+        )
+        .values(status="PENDING", lease_owner=None)
+        .execution_options(synchronize_session=False)
+    )
+    db.commit()
+
+
+def deliver_result(db: Session, item: WebhookInboxItem) -> bool:
+    """POST the item's result to the bot callback URL. Returns True when delivered."""
+    payload = {
+        "inbox_id": item.id,
+        "idempotency_key": item.idempotency_key,
+        "command": item.command,
+        "deal_id": item.deal_id,
+        "status": item.status,
+        "result": item.result_json,
+    }
+
+    delivered = True
+    if settings.webhook_callback_url == "stub":
+        logger.info("[CALLBACK STUB] %s %s → %s", item.command, item.id, item.status)
+    else:
+        try:
+            req = urllib.request.Request(
+                settings.webhook_callback_url,
+                data=json.dumps(payload).encode("utf-8"),
+                headers={
+                    "Authorization": f"Bearer {settings.openclaw_service_token}",
+                    "Content-Type": "application/json",
+                    "User-Agent": "NestApp/1.0",
+                },
+                method="POST",
+            )
+            with urllib.request.urlopen(req, timeout=10):
+                pass
+        except Exception as e:
+            logger.error("[CALLBACK] Failed to deliver result for inbox item %s: %s", item.id, e)
+            delivered = False
+
+    item.delivery_attempts += 1
+    if delivered:
+        item.delivered_at = _now()
+    db.commit()
+    return delivered
+
+
+def run_item(item_id: str, owner: str) -> None:
+    """Execute one item claimed by ``owner`` and deliver its result.
+
+    The outcome is written only while ``owner`` still holds the lease.
+    """
+    db = SessionLocal()
+    try:
+        item = db.get(WebhookInboxItem, item_id)
+        command, attempts = item.command, item.attempts
+        cmd = WebhookCommand.model_validate(item.payload)
+        # Items without a bot-supplied key still get one, so a lease takeover
+        # after a crash replays the committed result instead of re-running it.
+        key = item.idempotency_key or f"inbox:{item.id}"
+        try:
+            response = process_command(db, cmd, key)
+            outcome = {"status": "DONE", "result_json": response.model_dump(mode="json"), "error": None}
+        except HTTPException as e:
+            db.rollback()
+            outcome = {
+                "status": "FAILED",
+                "result_json": {"success": False, "message": str(e.detail), "status_code": e.status_code},
+                "error": str(e.detail),
+            }
+        except Exception as e:
+            db.rollback()
+            logger.exception("Inbox item %s (%s) failed", item_id, command)
+            outcome = {"status": "FAILED" if attempts >= settings.webhook_max_attempts else "PENDING", "error": str(e)}
+
+        finished = outcome["status"] in ("DONE", "FAILED")
+        if finished:
+            outcome["finished_at"] = _now()
+        else:
+            outcome["lease_owner"] = None
+        written = db.execute(
+            update(WebhookInboxItem)
+            .where(
+                WebhookInboxItem.id == item_id,
+                WebhookInboxItem.status == "PROCESSING",
+                WebhookInboxItem.lease_owner == owner,
+            )
+            .values(**outcome)
+            .execution_options(synchronize_session=False)
+        ).rowcount == 1
+        db.commit()
+
+        if not written:
+            logger.warning("Inbox item %s (%s): lease lost, leaving the outcome to its new owner", item_id, command)
+            return
+        if finished:
+            deliver_result(db, db.get(WebhookInboxItem, item_id))
+    finally:
+        db.close()
+
+
+class InboxWorkerPool:
+    """Polls the inbox and runs claimed items on a thread pool, one per deal at a time."""
+
+    def __init__(self, workers: int, poll_interval: float):
+        self.workers = workers
+        self.poll_interval = poll_interval
+        self.owner = _worker_id()
+        self.heartbeat_interval = settings.webhook_lease_seconds / 3
+        self._last_heartbeat = 0.0
+        self._executor: ThreadPoolExecutor | None = None
+        self._thread: threading.Thread | None = None
+        self._stop = threading.Event()
+        self._wake = threading.Event()
+        self._lock = threading.Lock()
+        self._in_flight: set[str] = set()
+        self._running: set[str] = set()
+
+    def start(self) -> None:
+        self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="webhook-inbox")
+        self._thread = threading.Thread(target=self._run, name="webhook-inbox-dispatcher", daemon=True)
+        self._thread.start()
+        logger.info("Webhook inbox started with %d workers", self.workers)
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._wake.set()
+        if self._thread:
+            self._thread.join(timeout=10)
+        if self._executor:
+            self._executor.shutdown(wait=True)
+
+    def notify(self) -> None:
+        """Wake the dispatcher early, e.g. right after a command is enqueued."""
+        self._wake.set()
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            try:
+                self.poll_once()
+            except Exception:
+                logger.exception("Webhook inbox poll failed")
+            self._wake.wait(self.poll_interval)
+            self._wake.clear()
+
+    def poll_once(self) -> int:
+        """Claim and dispatch as many runnable items as there are free workers."""
+        db = SessionLocal()
+        try:
+            self.heartbeat(db)
+            _release_stale(db)
+            with self._lock:
+                free = self.workers - len(self._in_flight)
+            dispatched = 0
+            if free > 0:
+                pending = (
+                    db.query(WebhookInboxItem)
+                    .filter(WebhookInboxItem.status == "PENDING")
+                    .order_by(WebhookInboxItem.created_at)
+                    .limit(self.workers * 4)
+                    .all()
+                )
+                seen_lanes: set[str] = set()
+                for item in pending:
+                    if dispatched >= free:
+                        break
+                    # Commands without a deal (create_deal, catalog) are independent lanes
+                    lane = item.deal_id or item.id
+                    if lane in seen_lanes:
+                        continue
+                    seen_lanes.add(lane)
+                    with self._lock:
+                        if lane in self._in_flight:
+                            continue
+                    if not _claim(db, item, self.owner):
+                        continue
+                    with self._lock:
+                        self._in_flight.add(lane)
+                        self._running.add(item.id)
+                    self._executor.submit(self._run_lane, item.id, lane)
+                    dispatched += 1
+
+            undelivered = (
+                db.query(WebhookInboxItem)
+                .filter(
+                    WebhookInboxItem.status.in_(["DONE", "FAILED"]),
+                    WebhookInboxItem.delivered_at.is_(None),
+                    # Leave fresh results to the worker that is delivering them right now
+                    WebhookInboxItem.finished_at < _now() - timedelta(seconds=30),
+                    WebhookInboxItem.delivery_attempts < settings.webhook_max_attempts,
+                )
+                .limit(self.workers * 4)
+                .all()
+            )
+            for item in undelivered:
+                deliver_result(db, item)
+            return dispatched
+        finally:
+            db.close()
+
+    def heartbeat(self, db: Session, force: bool = False) -> None:
+        """Renew the leases of running items, at most every third of the lease."""
+        if not force and time.monotonic() - self._last_heartbeat < self.heartbeat_interval:
+            return
+        with self._lock:
+            running = list(self._running)
+        _renew_leases(db, self.owner, running)
+        self._last_heartbeat = time.monotonic()
+
+    def _run_lane(self, item_id: str, lane: str) -> None:
+        try:
+            run_item(item_id, self.owner)
+        finally:
+            with self._lock:
+                self._in_flight.discard(lane)
+                self._running.discard(item_id)
+            self._wake.set()
+
+
+worker_pool: InboxWorkerPool | None = None
+
+
+def start_workers() -> None:
+    global worker_pool
+    if settings.webhook_worker_count <= 0:
+        return
+    worker_pool = InboxWorkerPool(settings.webhook_worker_count, settings.webhook_poll_interval)
+    worker_pool.start()
+
+
+def stop_workers() -> None:
+    global worker_pool
+    if worker_pool:
+        worker_pool.stop()
+        worker_pool = None
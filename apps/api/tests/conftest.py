@@ -0,0 +1,74 @@
+"""Shared fixtures. The app runs against a throwaway SQLite database and storage directory."""
+import os
+import tempfile
+import uuid
+from decimal import Decimal
+
+_tmp = tempfile.mkdtemp(prefix="nestapp-tests-")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_tmp, 'test.sqlite')}"
+os.environ["STORAGE_ROOT"] = os.path.join(_tmp, "storage")
+os.environ["STORAGE_BACKEND"] = "local"
+os.environ["DATABASE_REPLICA_URL"] = ""
+os.environ["DB_SLOW_QUERY_LOG"] = os.path.join(_tmp, "slow_queries.ndjson")
+os.makedirs(os.environ["STORAGE_ROOT"], exist_ok=True)
+
+import pytest  # noqa: E402
+from fastapi.testclient import TestClient  # noqa: E402
+
+from app.config import settings  # noqa: E402
+from app.database import SessionLocal  # noqa: E402
+from app.main import app  # noqa: E402
+from app.models import Tenant, Unit  # noqa: E402
+from app.services.query_stats import check_query_budget  # noqa: E402
+
+
+@pytest.fixture(scope="session")
+def client():
+    with TestClient(app) as c:
+        yield c
+
+
+@pytest.fixture(scope="session")
+def auth_headers(client):
+    r = client.post("/auth/login", json={"username": settings.admin_user, "password": settings.admin_password})
+    return {"Authorization": f"Bearer {r.json()['access_token']}"}
+
+
+@pytest.fixture
+def db():
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+
+
+@pytest.fixture
+def query_budget():
+    """Fail when a response ran more queries than its endpoint's budget: ``query_budget(response, 5)``."""
+    return check_query_budget
+
+
+@pytest.fixture
+def make_parties(db):
+    """Create a fresh unit and tenant; returns (tenant, unit)."""
+    def make():
+        unit = Unit(unit_code=f"T-{uuid.uuid4().hex[:8]}", monthly_price=Decimal("1000000"), daily_price=Decimal("100000"))
+        tenant = Tenant(full_name="Test Tenant", phone="0800000000", email="tenant@example.com")
+        db.add_all([unit, tenant])
+        db.commit()
+        return tenant, unit
+    return make
+
+
+@pytest.fixture
+def make_deal(client, auth_headers, make_parties):
+    """Create a unit, a tenant and a monthly deal for them; returns the deal JSON."""
+    def make():
+        tenant, unit = make_parties()
+        r = client.post("/deals", headers=auth_headers, json={
+            "tenant_id": tenant.id, "unit_id": unit.id, "term_type": "MONTHLY", "start_date": "2026-01-01",
+        })
+        assert r.status_code == 201, r.text
+        return r.json()
+    return make
@@ -0,0 +1,67 @@
+"""DATABASE_ASYNC=true picks its engine at import time, so the app runs in a subprocess here."""
+import os
+import subprocess
+import sys
+import textwrap
+
+import pytest
+
+from app.database import _async_url
+
+SCRIPT = textwrap.dedent("""
+    from decimal import Decimal
+    from fastapi.testclient import TestClient
+    from app.config import settings
+    from app.database import AsyncSessionLocal, SessionLocal
+    from app.main import app
+    from app.models import Tenant, Unit
+
+    assert AsyncSessionLocal is not None
+    with TestClient(app) as client:
+        r = client.post("/auth/login", json={"username": settings.admin_user, "password": settings.admin_password})
+        headers = {"Authorization": f"Bearer {r.json()['access_token']}"}
+        db = SessionLocal()
+        unit = Unit(unit_code="ASYNC-1", monthly_price=Decimal("1000000"))
+        tenant = Tenant(full_name="Async Tenant", phone="0800000001", email="async@example.com")
+        db.add_all([unit, tenant])
+        db.commit()
+        deal = client.post("/deals", headers=headers, json={
+            "tenant_id": tenant.id, "unit_id": unit.id, "term_type": "MONTHLY", "start_date": "2026-01-01",
+        }).json()
+        for path in ("/deals", f"/deals/{deal['id']}", f"/deals/{deal['id']}/journey", "/dashboard",
+                     "/units", "/tenants", "/audit-logs"):
+            r = client.get(path, headers=headers)
+            assert r.status_code == 200, (path, r.status_code, r.text)
+        assert [d["id"] for d in client.get("/deals", headers=headers).json()] == [deal["id"]]
+        assert client.get("/dashboard", headers=headers).json()["deals_in_progress"] == 1
+    print("ok")
+""")
+
+
+@pytest.mark.parametrize("url, expected", [
+    ("postgresql://u:p@db:5432/nest", "postgresql+asyncpg://u:p@db:5432/nest"),
+    ("postgresql+psycopg2://u:p@db/nest", "postgresql+asyncpg://u:p@db/nest"),
+    ("sqlite:////tmp/nest.sqlite", "sqlite+aiosqlite:////tmp/nest.sqlite"),
+])
+def test_async_url(url, expected):
+    assert _async_url(url) == expected
+
+
+def test_async_url_rejects_unknown_dialects():
+    with pytest.raises(ValueError, match="mysql"):
+        _async_url("mysql://u:p@db/nest")
+
+
+def test_async_routes_serve_from_the_async_engine(tmp_path):
+    pytest.importorskip("aiosqlite")
+    env = {
+        **os.environ,
+        "DATABASE_ASYNC": "true",
+        "DATABASE_URL": f"sqlite:///{tmp_path / 'async.sqlite'}",
+        "STORAGE_ROOT": str(tmp_path / "storage"),
+    }
+    os.makedirs(env["STORAGE_ROOT"])
+    result = subprocess.run([sys.executable, "-c", SCRIPT], env=env, capture_output=True, text=True, timeout=120,
+                            cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    assert result.returncode == 0, result.stderr[-3000:]
+    assert result.stdout.strip().endswith("ok")
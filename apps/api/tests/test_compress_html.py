@@ -0,0 +1,47 @@
+from app.maintenance import compress_html, format_size
+from app.models.document import Document, DocumentVersion
+from app.services import html_store
+from app.services.storage import get_storage
+
+
+def _uncompressed_version(client, auth_headers, db, make_deal, html: str) -> DocumentVersion:
+    """A generated document version whose HTML is stored uncompressed, as before HTML_STORAGE_COMPRESSION."""
+    deal_id = make_deal()["id"]
+    r = client.post(f"/deals/{deal_id}/actions/generate-document", headers=auth_headers)
+    assert r.status_code == 200, r.text
+    version = db.query(DocumentVersion).join(Document).filter(Document.deal_id == deal_id).one()
+    path = version.html_path.removesuffix(html_store.GZIP_SUFFIX)
+    get_storage().delete(version.html_path)
+    get_storage().put(path, html.encode("utf-8"), content_type="text/html")
+    version.html_path = path
+    db.commit()
+    return version
+
+
+def test_format_size():
+    assert format_size(512) == "512.0 B"
+    assert format_size(3 * 1024 * 1024) == "3.0 MiB"
+    assert format_size(-2048, signed=True) == "-2.0 KiB"
+    assert format_size(2048, signed=True) == "+2.0 KiB"
+
+
+def test_only_files_that_shrink_are_rewritten(client, auth_headers, db, make_deal, capsys):
+    large = _uncompressed_version(client, auth_headers, db, make_deal, "<p>lease</p>" * 2000)
+    tiny = _uncompressed_version(client, auth_headers, db, make_deal, "<p>x</p>")
+    tiny_path = tiny.html_path
+
+    compress_html.main(["--batch-size", "2"])
+
+    db.refresh(large)
+    db.refresh(tiny)
+    assert large.html_path.endswith(html_store.GZIP_SUFFIX)
+    assert html_store.read_html(large.html_path) == "<p>lease</p>" * 2000
+    assert tiny.html_path == tiny_path
+    assert get_storage().exists(tiny_path)
+    assert not get_storage().exists(tiny_path + html_store.GZIP_SUFFIX)
+
+    out = capsys.readouterr().out
+    assert "1 left as is" in out
+    assert "--" not in out
+    disk = next(line for line in out.splitlines() if "disk:" in line)
+    assert "(-" in disk and "KiB, -" in disk
@@ -0,0 +1,77 @@
+import pytest
+from sqlalchemy import create_engine, exc, text
+
+from app.config import settings
+from app.services import db_pool
+
+
+@pytest.fixture
+def small_engine(tmp_path, monkeypatch):
+    """A one-connection instrumented engine, registered as the 'test' pool."""
+    monkeypatch.setattr(settings, "db_pool_size", 1)
+    monkeypatch.setattr(settings, "db_max_overflow", 0)
+    monkeypatch.setattr(settings, "db_pool_timeout", 0.1)
+    url = f"sqlite:///{tmp_path / 'pool.sqlite'}"
+    engine = create_engine(url, **db_pool.engine_kwargs(url))
+    db_pool.instrument_engine("test", engine)
+    yield engine
+    db_pool._instrumented.pop("test", None)
+    engine.dispose()
+
+
+def test_wait_histogram_is_cumulative(monkeypatch):
+    monkeypatch.setattr(settings, "db_slow_checkout_ms", 100.0)
+    stats = db_pool.PoolStats("unit")
+    for wait_ms in (0.5, 30, 250, 99_999):
+        stats.observe_checkout(wait_ms)
+
+    snapshot = stats.snapshot()
+
+    assert snapshot["checkouts"] == 4
+    assert snapshot["slow_checkouts"] == 2
+    buckets = {b["le"]: b["count"] for b in snapshot["wait_ms_histogram"]}
+    assert buckets[1] == 1
+    assert buckets[50] == 2
+    assert buckets[250] == 3
+    assert buckets[5000] == 3
+    assert buckets["+Inf"] == 4
+
+
+def test_exhausted_pool_counts_a_timeout(small_engine):
+    with small_engine.connect():
+        with pytest.raises(exc.TimeoutError):
+            small_engine.connect()
+
+    status = next(p for p in db_pool.pool_status() if p["name"] == "test")
+    assert status["timeouts"] == 1
+    assert status["checkouts"] == 1
+    assert status["config"]["pool_size"] == 1
+
+
+def test_idle_pre_ping_only_pings_idle_connections(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "db_pool_pre_ping", "idle")
+    monkeypatch.setattr(settings, "db_pool_pre_ping_idle_seconds", 0)
+    url = f"sqlite:///{tmp_path / 'ping.sqlite'}"
+    engine = create_engine(url, **db_pool.engine_kwargs(url))
+    db_pool.instrument_engine("ping", engine)
+    try:
+        for _ in range(3):
+            with engine.connect() as conn:
+                conn.execute(text("SELECT 1"))
+        # The first checkout opens a new connection; the next two reuse it after it went idle
+        assert engine.pool.stats.pings == 2
+    finally:
+        db_pool._instrumented.pop("ping", None)
+        engine.dispose()
+
+
+def test_db_pool_endpoint_reports_the_primary_pool(client, auth_headers):
+    client.get("/deals", headers=auth_headers)
+
+    pools = client.get("/metrics/db-pool", headers=auth_headers).json()["pools"]
+
+    primary = next(p for p in pools if p["name"] == "primary")
+    assert primary["checkouts"] > 0
+    assert primary["checked_out"] >= 0
+    assert primary["config"]["pre_ping"] == settings.db_pool_pre_ping
+    assert primary["wait_ms_histogram"][-1] == {"le": "+Inf", "count": primary["checkouts"]}
@@ -0,0 +1,12 @@
+from app.models.deal import Deal
+
+
+def test_codes_follow_the_highest_existing_code(make_deal, db):
+    first = make_deal()["deal_code"]
+    second = make_deal()["deal_code"]
+    assert int(second.removeprefix("NEST-")) == int(first.removeprefix("NEST-")) + 1
+
+    # Codes do not come from a row count, so a gap (or a deleted deal) cannot cause a duplicate
+    db.query(Deal).filter(Deal.deal_code == second).update({"deal_code": "NEST-90000"})
+    db.commit()
+    assert make_deal()["deal_code"] == "NEST-90001"
@@ -0,0 +1,84 @@
+import io
+
+import pytest
+from pypdf import PdfReader, PdfWriter
+
+from app.models.deal import Deal
+from app.models.document import Document, DocumentVersion
+from app.services import deal_packet
+from app.services.document_generator import generate_document
+from app.services.storage import get_storage
+
+
+def _blank_pdf(pages: int) -> bytes:
+    writer = PdfWriter()
+    for _ in range(pages):
+        writer.add_blank_page(width=200, height=200)
+    buf = io.BytesIO()
+    writer.write(buf)
+    return buf.getvalue()
+
+
+def _use_real_pdfs(db, deal_id: str, pages: int = 1) -> None:
+    """Swap the stored PDFs for real ones (without WeasyPrint, render_pdf stores the HTML)."""
+    versions = db.query(DocumentVersion).join(Document).filter(Document.deal_id == deal_id).all()
+    for version in versions:
+        get_storage().put(version.pdf_path, _blank_pdf(pages), content_type="application/pdf")
+
+
+@pytest.fixture
+def journey_deal(client, auth_headers, db, make_deal):
+    """A monthly deal with its LOO draft, final LOO and lease agreement generated."""
+    deal = make_deal()
+    for _ in range(3):
+        r = client.post(f"/deals/{deal['id']}/actions/generate-document", headers=auth_headers)
+        assert r.status_code == 200, r.text
+    _use_real_pdfs(db, deal["id"])
+    return deal
+
+
+def test_packet_merges_the_latest_pdfs_and_is_cached(client, auth_headers, db, journey_deal, monkeypatch):
+    url = f"/deals/{journey_deal['id']}/packet.pdf"
+
+    first = client.get(url, headers=auth_headers)
+
+    assert first.status_code == 200
+    versions = deal_packet.packet_versions(db, db.get(Deal, journey_deal["id"]))
+    # The final LOO supersedes the draft
+    assert [v.document.doc_type for v in versions] == ["LOO_FINAL", "LEASE_AGREEMENT"]
+    assert len(PdfReader(io.BytesIO(first.content)).pages) == 2
+    etag = first.headers["etag"]
+
+    def no_merge():
+        raise AssertionError("cached packet was merged again")
+
+    monkeypatch.setattr(deal_packet, "PdfWriter", no_merge)
+    assert client.get(url, headers=auth_headers).content == first.content
+    not_modified = client.get(url, headers={**auth_headers, "If-None-Match": etag})
+    assert not_modified.status_code == 304
+    assert not_modified.headers["etag"] == etag
+
+
+def test_new_version_rebuilds_the_packet_and_drops_the_old_one(client, auth_headers, db, journey_deal):
+    url = f"/deals/{journey_deal['id']}/packet.pdf"
+    old_etag = client.get(url, headers=auth_headers).headers["etag"]
+    old_key = old_etag.strip('"')
+    old_path = f"{deal_packet.PACKET_DIR}/{journey_deal['id']}/{old_key}.pdf"
+    assert get_storage().exists(old_path)
+
+    deal = db.get(Deal, journey_deal["id"])
+    doc_type = deal_packet.packet_versions(db, deal)[0].document.doc_type
+    generate_document(db, deal, doc_type)
+    db.commit()
+    _use_real_pdfs(db, deal.id, pages=2)
+
+    rebuilt = client.get(url, headers={**auth_headers, "If-None-Match": old_etag})
+
+    assert rebuilt.status_code == 200
+    assert rebuilt.headers["etag"] != old_etag
+    assert not get_storage().exists(old_path)
+
+
+def test_deal_without_documents_has_no_packet(client, auth_headers, make_deal):
+    deal = make_deal()
+    assert client.get(f"/deals/{deal['id']}/packet.pdf", headers=auth_headers).status_code == 404
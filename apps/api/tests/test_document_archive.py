@@ -0,0 +1,47 @@
+from app.models.deal import Deal
+from app.models.document import Document, DocumentVersion
+from app.services import document_archive
+from app.services.storage import get_storage
+
+
+def _archived_deal(client, auth_headers, db, make_deal):
+    """A cancelled deal with one generated document, archived; returns the deal and the document version."""
+    deal_id = make_deal()["id"]
+    r = client.post(f"/deals/{deal_id}/actions/generate-document", headers=auth_headers)
+    assert r.status_code == 200, r.text
+    r = client.post(f"/deals/{deal_id}/actions/cancel", headers=auth_headers, json={"reason": "test"})
+    assert r.status_code == 200, r.text
+    version = db.query(DocumentVersion).join(Document).filter(Document.deal_id == deal_id).one()
+    return db.get(Deal, deal_id), version
+
+
+def test_archive_serves_members_by_offset(client, auth_headers, db, make_deal):
+    deal, version = _archived_deal(client, auth_headers, db, make_deal)
+    storage = get_storage()
+    html = storage.read(version.html_path)
+    preview = client.get(f"/documents/{version.document_id}/versions/{version.id}/preview", headers=auth_headers)
+
+    result = document_archive.archive_deal(db, deal)
+
+    assert result is not None and result.files >= 1
+    assert not storage.exists(version.html_path)
+    assert storage.exists(document_archive.archive_path(deal.id))
+    assert document_archive.read(db, version.html_path) == html
+    with document_archive.open_file(db, version.html_path) as f:
+        assert f.read() == html
+    assert document_archive.stat(db, version.html_path).size == len(html)
+    archived = client.get(f"/documents/{version.document_id}/versions/{version.id}/preview", headers=auth_headers)
+    assert archived.status_code == 200
+    assert archived.content == preview.content
+
+
+def test_restore_puts_the_files_back(client, auth_headers, db, make_deal):
+    deal, version = _archived_deal(client, auth_headers, db, make_deal)
+    html = get_storage().read(version.html_path)
+    document_archive.archive_deal(db, deal)
+
+    assert document_archive.restore_deal(db, deal.id) >= 1
+
+    assert get_storage().read(version.html_path) == html
+    assert not get_storage().exists(document_archive.archive_path(deal.id))
+    assert document_archive.member(db, version.html_path) is None
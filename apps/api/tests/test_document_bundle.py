@@ -0,0 +1,85 @@
+import csv
+import io
+import zipfile
+
+from app.config import settings
+from app.models.deal import Deal
+from app.models.document import Document, DocumentVersion
+from app.services import document_bundle, pdf_renderer
+from app.services.document_generator import generate_document
+from app.services.storage import get_storage
+
+
+def _deal_with_versions(client, auth_headers, db, make_deal, count: int) -> tuple[dict, list[DocumentVersion]]:
+    """A deal whose first document has ``count`` versions."""
+    deal = make_deal()
+    r = client.post(f"/deals/{deal['id']}/actions/generate-document", headers=auth_headers)
+    assert r.status_code == 200, r.text
+    doc = db.query(Document).filter(Document.deal_id == deal["id"]).one()
+    for _ in range(count - 1):
+        generate_document(db, db.get(Deal, deal["id"]), doc.doc_type)
+        db.commit()
+    versions = (
+        db.query(DocumentVersion).join(Document).filter(Document.deal_id == deal["id"])
+        .order_by(DocumentVersion.version_no).all()
+    )
+    return deal, versions
+
+
+def _manifest(zf: zipfile.ZipFile) -> list[dict]:
+    return list(csv.DictReader(io.StringIO(zf.read("manifest.csv").decode("utf-8"))))
+
+
+def test_bundle_holds_every_version_and_a_manifest_last(client, auth_headers, db, make_deal):
+    deal, versions = _deal_with_versions(client, auth_headers, db, make_deal, 2)
+
+    r = client.get(f"/deals/{deal['id']}/documents.zip", headers=auth_headers)
+
+    assert r.status_code == 200
+    assert r.headers["content-type"] == "application/zip"
+    zf = zipfile.ZipFile(io.BytesIO(r.content))
+    assert zf.testzip() is None
+    names = zf.namelist()
+    assert names[-1] == "manifest.csv"
+    for version in versions:
+        arcname = f"{deal['deal_code']}/documents/{version.pdf_path.rsplit('/', 1)[-1]}"
+        assert zf.read(arcname) == get_storage().read(version.pdf_path)
+    assert [row["status"] for row in _manifest(zf)] == ["included", "included"]
+
+    latest = zipfile.ZipFile(io.BytesIO(client.get(
+        f"/deals/{deal['id']}/documents.zip", params={"latest_only": True}, headers=auth_headers).content))
+    assert [row["version"] for row in _manifest(latest)] == ["2"]
+
+
+def test_missing_files_are_listed_not_bundled(client, auth_headers, db, make_deal):
+    deal, (version,) = _deal_with_versions(client, auth_headers, db, make_deal, 1)
+    get_storage().delete(version.pdf_path)
+
+    zf = zipfile.ZipFile(io.BytesIO(client.get(f"/deals/{deal['id']}/documents.zip", headers=auth_headers).content))
+
+    assert zf.namelist() == ["manifest.csv"]
+    assert _manifest(zf)[0]["status"] == "missing"
+
+
+def test_archive_is_yielded_in_chunks(client, auth_headers, db, make_deal, monkeypatch):
+    monkeypatch.setattr(document_bundle, "CHUNK_SIZE", 1024)
+    deal, (version,) = _deal_with_versions(client, auth_headers, db, make_deal, 1)
+    size = len(get_storage().read(version.pdf_path))
+
+    chunks = list(document_bundle.stream_zip([deal["id"]]))
+
+    assert len(chunks) > size // 1024
+    assert max(len(c) for c in chunks[:-1]) <= 1024 + 512  # one read chunk plus entry headers
+    assert zipfile.ZipFile(io.BytesIO(b"".join(chunks))).testzip() is None
+
+
+def test_pending_pdfs_are_rendered_on_the_way(client, auth_headers, db, make_deal, monkeypatch):
+    monkeypatch.setattr(settings, "pdf_render_mode", "lazy")
+    deal, (version,) = _deal_with_versions(client, auth_headers, db, make_deal, 1)
+    assert version.pdf_status == pdf_renderer.PDF_PENDING
+
+    zf = zipfile.ZipFile(io.BytesIO(client.get(f"/deals/{deal['id']}/documents.zip", headers=auth_headers).content))
+
+    assert _manifest(zf)[0]["status"] == "included"
+    db.refresh(version)
+    assert version.pdf_status == pdf_renderer.PDF_READY
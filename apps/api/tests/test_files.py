@@ -0,0 +1,26 @@
+from app.services import html_store
+from app.services.storage import get_storage
+
+HTML = "<html>" + "<p>files</p>" * 200 + "</html>"
+
+
+def test_gzip_files_are_negotiated(client):
+    key = html_store.write_html("documents/files-test/page.html", HTML)
+
+    as_stored = client.get(f"/files/{key}", headers={"Accept-Encoding": "gzip"})
+    assert as_stored.status_code == 200
+    assert as_stored.headers["Content-Encoding"] == "gzip"
+    assert as_stored.headers["Content-Type"].startswith("text/html")
+    assert as_stored.text == HTML
+
+    plain = client.get(f"/files/{key}", headers={"Accept-Encoding": "identity"})
+    assert "Content-Encoding" not in plain.headers
+    assert plain.text == HTML
+    assert plain.headers["Vary"] == "Accept-Encoding"
+
+
+def test_other_files_are_served_as_stored(client):
+    get_storage().put("documents/files-test/a.txt", b"plain")
+    r = client.get("/files/documents/files-test/a.txt")
+    assert r.status_code == 200 and r.content == b"plain"
+    assert client.get("/files/documents/files-test/missing.html.gz").status_code == 404
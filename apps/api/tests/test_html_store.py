@@ -0,0 +1,21 @@
+import pytest
+
+from app.services.html_store import accepts_gzip
+
+
+@pytest.mark.parametrize("header, expected", [
+    (None, False),
+    ("", False),
+    ("gzip", True),
+    ("deflate, gzip;q=0.5", True),
+    ("GZIP", True),
+    ("br, deflate", False),
+    ("gzip;q=0", False),
+    ("gzip;q=0.0, *", False),
+    ("*", True),
+    ("*;q=0", False),
+    ("br, *;q=0.1", True),
+    ("gzip;q=abc", False),
+])
+def test_accepts_gzip(header, expected):
+    assert accepts_gzip(header) is expected
@@ -0,0 +1,99 @@
+import base64
+import io
+
+import pytest
+from PIL import Image
+
+from app.models.document import Document, DocumentVersion
+from app.models.settings import AppSettings
+from app.services import html_store, image_assets, settings_cache
+from app.services.storage import get_storage
+
+IMAGE_FIELDS = ("logo_path", "logo_render_path", "signature_image_path", "signature_render_path")
+EXIF_ORIENTATION = 0x0112
+
+
+def _jpeg(size: tuple[int, int], orientation: int | None = None) -> bytes:
+    img = Image.new("RGB", size, "navy")
+    exif = Image.Exif()
+    if orientation:
+        exif[EXIF_ORIENTATION] = orientation
+    buf = io.BytesIO()
+    img.save(buf, "JPEG", quality=95, exif=exif)
+    return buf.getvalue()
+
+
+def _transparent_png(size: tuple[int, int]) -> bytes:
+    buf = io.BytesIO()
+    Image.new("RGBA", size, (0, 0, 0, 0)).save(buf, "PNG")
+    return buf.getvalue()
+
+
+@pytest.fixture
+def app_settings(client, db):
+    """The settings row; its images are restored after the test."""
+    row = db.query(AppSettings).one()
+    saved = {field: getattr(row, field) for field in IMAGE_FIELDS}
+    yield row
+    db.expire_all()
+    row = db.query(AppSettings).one()
+    for field, value in saved.items():
+        setattr(row, field, value)
+    db.commit()
+    settings_cache.refresh(row)
+
+
+def test_large_photo_is_rotated_downsized_and_stripped():
+    data, ext = image_assets.normalize_image(_jpeg((3000, 2000), orientation=6))
+
+    assert ext == "jpg"
+    with Image.open(io.BytesIO(data)) as img:
+        # Orientation 6 is a 90° turn: the landscape pixels print as a portrait
+        assert img.height == 188 and img.width < img.height
+        assert EXIF_ORIENTATION not in img.getexif()
+
+
+def test_transparency_is_kept_as_png_and_small_images_are_not_enlarged():
+    data, ext = image_assets.normalize_image(_transparent_png((120, 40)))
+
+    assert ext == "png"
+    with Image.open(io.BytesIO(data)) as img:
+        assert img.size == (120, 40)
+        assert img.mode == "RGBA"
+
+
+def test_unreadable_images_have_no_variant():
+    assert image_assets.normalize_image(b"<svg xmlns='http://www.w3.org/2000/svg'/>") is None
+
+
+def test_upload_stores_the_variant_and_documents_inline_it(client, auth_headers, db, make_deal, app_settings):
+    original = _jpeg((2400, 1600))
+
+    r = client.post("/settings/logo", headers=auth_headers, files={"file": ("logo.jpg", original, "image/jpeg")})
+
+    assert r.status_code == 200, r.text
+    db.refresh(app_settings)
+    assert get_storage().read(app_settings.logo_path) == original
+    variant = get_storage().read(app_settings.logo_render_path)
+    assert len(variant) < len(original)
+
+    deal_id = make_deal()["id"]
+    client.post(f"/deals/{deal_id}/actions/generate-document", headers=auth_headers)
+    version = db.query(DocumentVersion).join(Document).filter(Document.deal_id == deal_id).one()
+    html = html_store.read_html(version.html_path)
+    assert base64.b64encode(variant).decode() in html
+    assert base64.b64encode(original).decode() not in html
+
+
+def test_backfill_creates_missing_variants(db, app_settings):
+    get_storage().put("settings/signature_old.png", _transparent_png((900, 300)))
+    app_settings.signature_image_path = "settings/signature_old.png"
+    app_settings.signature_render_path = None
+    db.commit()
+    assert image_assets.needs_backfill(app_settings)
+
+    row = image_assets.backfill(db)
+
+    assert row is not None
+    assert row.signature_render_path.endswith("_render.png")
+    assert not image_assets.needs_backfill(row)
@@ -0,0 +1,85 @@
+import threading
+import time
+
+from app.config import settings
+from app.database import SessionLocal
+from app.models.document import Document, DocumentVersion
+from app.services import pdf_renderer
+from app.services.storage import get_storage
+
+
+def _generate(client, auth_headers, db, make_deal) -> DocumentVersion:
+    deal_id = make_deal()["id"]
+    r = client.post(f"/deals/{deal_id}/actions/generate-document", headers=auth_headers)
+    assert r.status_code == 200, r.text
+    return db.query(DocumentVersion).join(Document).filter(Document.deal_id == deal_id).one()
+
+
+def test_eager_mode_renders_on_generation(client, auth_headers, db, make_deal):
+    version = _generate(client, auth_headers, db, make_deal)
+
+    assert version.pdf_status == pdf_renderer.PDF_READY
+    assert get_storage().exists(version.pdf_path)
+
+
+def test_lazy_mode_renders_on_first_download(client, auth_headers, db, make_deal, monkeypatch):
+    monkeypatch.setattr(settings, "pdf_render_mode", "lazy")
+    version = _generate(client, auth_headers, db, make_deal)
+
+    assert version.pdf_status == pdf_renderer.PDF_PENDING
+    assert not get_storage().exists(version.pdf_path)
+
+    r = client.get(f"/documents/{version.document_id}/versions/{version.id}/pdf", headers=auth_headers)
+
+    assert r.status_code == 200
+    assert get_storage().exists(version.pdf_path)
+    db.refresh(version)
+    assert version.pdf_status == pdf_renderer.PDF_READY
+
+
+def test_concurrent_first_downloads_render_once(client, auth_headers, db, make_deal, monkeypatch):
+    monkeypatch.setattr(settings, "pdf_render_mode", "lazy")
+    version = _generate(client, auth_headers, db, make_deal)
+    renders = []
+    render_pdf = pdf_renderer.render_pdf
+
+    def slow_render(html_content, pdf_path, doc_type):
+        renders.append(pdf_path)
+        time.sleep(0.2)
+        render_pdf(html_content, pdf_path, doc_type)
+
+    monkeypatch.setattr(pdf_renderer, "render_pdf", slow_render)
+
+    def download():
+        session = SessionLocal()
+        try:
+            pdf_renderer.ensure_pdf(session, session.get(DocumentVersion, version.id))
+            session.commit()
+        finally:
+            session.close()
+
+    threads = [threading.Thread(target=download) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert renders == [version.pdf_path]
+    db.refresh(version)
+    assert version.pdf_status == pdf_renderer.PDF_READY
+
+
+def test_prerender_doc_types_render_after_commit(client, auth_headers, db, make_deal, monkeypatch):
+    monkeypatch.setattr(settings, "pdf_render_mode", "lazy")
+    monkeypatch.setattr(settings, "pdf_prerender_doc_types", "loo_draft")
+    version = _generate(client, auth_headers, db, make_deal)
+
+    deadline = time.monotonic() + 5
+    while time.monotonic() < deadline:
+        db.refresh(version)
+        if version.pdf_status == pdf_renderer.PDF_READY:
+            break
+        time.sleep(0.05)
+
+    assert version.pdf_status == pdf_renderer.PDF_READY
+    assert get_storage().exists(version.pdf_path)
@@ -0,0 +1,60 @@
+import re
+
+from app.services import metrics
+
+
+def _sample(text: str, series: str) -> float:
+    """Value of one exposition line, e.g. ``nest_audit_writes_total{action="X"}``; 0 when absent."""
+    match = re.search(rf"^{re.escape(series)} (\S+)$", text, re.MULTILINE)
+    return float(match.group(1)) if match else 0.0
+
+
+def test_counter_renders_labels_and_escapes_values():
+    counter = metrics.Counter("test_total", "A test counter.", ("path",))
+    counter.inc(path='a"b')
+    counter.inc(2, path='a"b')
+
+    assert counter.render() == [
+        "# HELP test_total A test counter.",
+        "# TYPE test_total counter",
+        'test_total{path="a\\"b"} 3',
+    ]
+
+
+def test_histogram_buckets_are_cumulative_with_sum_and_count():
+    histogram = metrics.Histogram("test_seconds", "A test histogram.", ("op",), buckets=(0.1, 1.0))
+    for value in (0.05, 0.5, 2.0):
+        histogram.observe(value, op="x")
+
+    assert histogram.render()[2:] == [
+        'test_seconds_bucket{op="x",le="0.1"} 1',
+        'test_seconds_bucket{op="x",le="1"} 2',
+        'test_seconds_bucket{op="x",le="+Inf"} 3',
+        'test_seconds_sum{op="x"} 2.55',
+        'test_seconds_count{op="x"} 3',
+    ]
+
+
+def test_requests_are_labelled_by_route_template(client, auth_headers, make_deal):
+    deal_id = make_deal()["id"]
+    client.get(f"/deals/{deal_id}", headers=auth_headers)
+
+    text = client.get("/metrics").text
+
+    series = 'nest_http_request_duration_seconds_count{method="GET",route="/deals/{deal_id}",status="200"}'
+    assert _sample(text, series) >= 1
+    assert deal_id not in text
+
+
+def test_document_generation_and_audit_are_counted(client, auth_headers, make_deal):
+    deal_id = make_deal()["id"]
+    generations = 'nest_document_generations_total{doc_type="LOO_DRAFT"}'
+    audits = 'nest_audit_writes_total{action="GENERATE_DOCUMENT"}'
+    before = client.get("/metrics").text
+
+    client.post(f"/deals/{deal_id}/actions/generate-document", headers=auth_headers)
+
+    after = client.get("/metrics").text
+    assert _sample(after, generations) == _sample(before, generations) + 1
+    assert _sample(after, audits) == _sample(before, audits) + 1
+    assert _sample(after, 'nest_db_pool_checkouts_total{pool="primary"}') > 0
@@ -0,0 +1,28 @@
+import pytest
+
+from app.config import settings
+
+DIAGNOSTICS = ["/metrics/db-pool", "/metrics/slow-queries"]
+
+
+@pytest.mark.parametrize("path", DIAGNOSTICS)
+def test_diagnostics_reject_anonymous_requests(client, path):
+    assert client.get(path).status_code == 401
+    assert client.get(path, headers={"Authorization": "Bearer not-a-jwt"}).status_code == 401
+
+
+@pytest.mark.parametrize("path", DIAGNOSTICS)
+def test_diagnostics_accept_a_user_token(client, auth_headers, path):
+    assert client.get(path, headers=auth_headers).status_code == 200
+
+
+@pytest.mark.parametrize("path", DIAGNOSTICS)
+def test_diagnostics_accept_the_metrics_token(client, monkeypatch, path):
+    monkeypatch.setattr(settings, "metrics_token", "scrape-token")
+    assert client.get(path, headers={"Authorization": "Bearer scrape-token"}).status_code == 200
+
+
+def test_exposition_requires_the_metrics_token_when_set(client, monkeypatch):
+    monkeypatch.setattr(settings, "metrics_token", "scrape-token")
+    assert client.get("/metrics").status_code == 401
+    assert client.get("/metrics", headers={"Authorization": "Bearer scrape-token"}).status_code == 200
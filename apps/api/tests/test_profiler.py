@@ -0,0 +1,45 @@
+from datetime import datetime, timedelta, timezone
+
+from jose import jwt
+
+from app.config import settings
+from app.dependencies.auth import JWT_ALGORITHM
+from app.routers.files import is_private
+
+
+def _token(**claims) -> dict:
+    payload = {"sub": settings.admin_user, "exp": datetime.now(timezone.utc) + timedelta(hours=1), **claims}
+    return {"Authorization": f"Bearer {jwt.encode(payload, settings.api_secret_key, algorithm=JWT_ALGORITHM)}"}
+
+
+def test_profiling_requires_the_admin_role(client):
+    assert client.get("/dashboard?profile=1", headers=_token()).status_code == 403
+    assert client.get("/health?profile=1").status_code == 403
+
+
+def test_profile_is_served_to_admins_only(client, auth_headers):
+    r = client.get("/dashboard?profile=1", headers=auth_headers)
+    assert r.status_code == 200
+    path = r.headers["X-Profile"]
+    assert path.startswith("/profiles/")
+
+    stored = client.get(path, headers=auth_headers)
+    assert stored.status_code == 200
+    assert client.get(path).status_code in (401, 403)
+    assert client.get(path, headers=_token()).status_code == 403
+    name = path.rsplit("/", 1)[1]
+    assert client.get(f"/files/profiles/{name}").status_code == 404
+    assert client.get(f"/files/documents/../profiles/{name}").status_code == 404
+
+
+def test_collapsed_mode_returns_the_stacks(client, auth_headers):
+    r = client.get("/dashboard?profile=collapsed", headers=auth_headers)
+    assert r.status_code == 200
+    assert r.headers["X-Profile-Status"] == "200"
+    assert "X-Profile" not in r.headers
+
+
+def test_private_keys_are_normalised_before_matching():
+    assert is_private("profiles/x.collapsed")
+    assert is_private("/documents/../profiles/x.collapsed")
+    assert not is_private("documents/profiles/x.collapsed")
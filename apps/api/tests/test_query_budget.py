@@ -0,0 +1,17 @@
+"""Query budgets for list endpoints: the count must not grow with the number of rows."""
+
+
+def test_deal_list_query_budget(client, auth_headers, make_deal, query_budget):
+    for _ in range(5):
+        make_deal()
+    r = client.get("/deals", headers=auth_headers)
+    assert r.status_code == 200
+    assert len(r.json()) >= 5
+    query_budget(r, 2)
+
+
+def test_dashboard_query_budget(client, auth_headers, make_deal, query_budget):
+    make_deal()
+    r = client.get("/dashboard", headers=auth_headers)
+    assert r.status_code == 200
+    query_budget(r, 10)
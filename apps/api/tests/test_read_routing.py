@@ -0,0 +1,58 @@
+import pytest
+from sqlalchemy import create_engine, insert, select
+
+from app.database import RoutingSession
+from app.models.tenant import Tenant
+
+primary = create_engine("sqlite://")
+replica = create_engine("sqlite://")
+
+
+class TwoEngineSession(RoutingSession):
+    primary_bind = primary
+    replica_bind = replica
+
+
+@pytest.fixture
+def read_session():
+    session = TwoEngineSession(info={"primary": False})
+    yield session
+    session.close()
+
+
+def test_sessions_default_to_the_primary():
+    with TwoEngineSession() as session:
+        assert session.get_bind(clause=select(Tenant)) is primary
+
+
+def test_no_replica_means_primary():
+    class PrimaryOnly(RoutingSession):
+        primary_bind = primary
+        replica_bind = None
+
+    with PrimaryOnly(info={"primary": False}) as session:
+        assert session.get_bind(clause=select(Tenant)) is primary
+
+
+def test_reads_go_to_the_replica(read_session):
+    assert read_session.get_bind(clause=select(Tenant)) is replica
+    assert read_session.get_bind(clause=select(Tenant)) is replica
+    assert read_session.info["primary"] is False
+
+
+def test_dml_pins_to_the_primary(read_session):
+    assert read_session.get_bind(clause=insert(Tenant)) is primary
+    assert read_session.info["primary"] is True
+    assert read_session.get_bind(clause=select(Tenant)) is primary
+
+
+def test_select_for_update_pins_to_the_primary(read_session):
+    assert read_session.get_bind(clause=select(Tenant).with_for_update()) is primary
+    assert read_session.get_bind(clause=select(Tenant)) is primary
+
+
+def test_flush_pins_to_the_primary(read_session, monkeypatch):
+    monkeypatch.setattr(read_session, "_flushing", True)
+    assert read_session.get_bind() is primary
+    monkeypatch.setattr(read_session, "_flushing", False)
+    assert read_session.get_bind(clause=select(Tenant)) is primary
@@ -0,0 +1,100 @@
+from datetime import date, datetime, timedelta, timezone
+
+import pytest
+from fastapi import HTTPException
+
+from app.config import settings
+from app.models.audit_log import AuditLog
+from app.models.deal import Deal
+from app.models.document import Document
+from app.models.regeneration_job import DocumentRegenerationJob
+from app.schemas.regeneration import RegenerationJobCreate
+from app.services import regeneration
+
+
+@pytest.fixture(autouse=True)
+def no_throttle(monkeypatch):
+    monkeypatch.setattr(settings, "regen_throttle_ms", 0)
+
+
+def _deals_with_documents(client, auth_headers, db, make_deal, created_on: date, count: int) -> list[str]:
+    """Deals with one generated document each, backdated so a job can select exactly them."""
+    deal_ids = []
+    for _ in range(count):
+        deal_id = make_deal()["id"]
+        r = client.post(f"/deals/{deal_id}/actions/generate-document", headers=auth_headers)
+        assert r.status_code == 200, r.text
+        db.get(Deal, deal_id).created_at = datetime.combine(created_on, datetime.min.time(), timezone.utc)
+        deal_ids.append(deal_id)
+    db.commit()
+    return sorted(deal_ids)
+
+
+def _job(db, created_on: date) -> DocumentRegenerationJob:
+    return regeneration.create_job(db, RegenerationJobCreate(created_from=created_on, created_to=created_on))
+
+
+def _latest_versions(db, deal_ids: list[str]) -> dict[str, int]:
+    docs = db.query(Document).filter(Document.deal_id.in_(deal_ids)).all()
+    return {doc.deal_id: doc.latest_version for doc in docs}
+
+
+def test_job_regenerates_and_audits_every_matching_deal(client, auth_headers, db, make_deal):
+    created_on = date(2001, 1, 2)
+    deal_ids = _deals_with_documents(client, auth_headers, db, make_deal, created_on, 2)
+
+    job = _job(db, created_on)
+    assert job.total_deals == 2
+    regeneration.run_job(job.id)
+
+    db.expire_all()
+    job = db.get(DocumentRegenerationJob, job.id)
+    assert (job.status, job.processed_deals, job.regenerated_documents, job.failed_deals) == ("DONE", 2, 2, 0)
+    assert job.cursor == deal_ids[-1]
+    assert _latest_versions(db, deal_ids) == {deal_id: 2 for deal_id in deal_ids}
+    entries = db.query(AuditLog).filter(AuditLog.action == "REGENERATE_DOCUMENTS", AuditLog.deal_id.in_(deal_ids)).all()
+    assert sorted(e.deal_id for e in entries) == deal_ids
+    assert all(e.metadata_json == {"job_id": job.id} for e in entries)
+    start = db.query(AuditLog).filter(AuditLog.action == "START_REGENERATION").all()
+    assert any(e.metadata_json["job_id"] == job.id for e in start)
+
+
+def test_interrupted_job_resumes_after_its_cursor(client, auth_headers, db, make_deal, monkeypatch):
+    monkeypatch.setattr(settings, "regen_batch_size", 1)
+    created_on = date(2001, 1, 3)
+    first, second = _deals_with_documents(client, auth_headers, db, make_deal, created_on, 2)
+    job = _job(db, created_on)
+    # A runner that finished the first batch and then died
+    job.status = "RUNNING"
+    job.cursor = first
+    job.processed_deals = 1
+    job.heartbeat_at = datetime.now(timezone.utc) - timedelta(seconds=settings.regen_lease_seconds + 60)
+    db.commit()
+
+    regeneration.run_job(job.id)
+
+    db.expire_all()
+    job = db.get(DocumentRegenerationJob, job.id)
+    assert (job.status, job.processed_deals, job.cursor) == ("DONE", 2, second)
+    assert _latest_versions(db, [first, second]) == {first: 1, second: 2}
+
+
+def test_running_job_with_fresh_heartbeat_is_not_taken_over(client, auth_headers, db, make_deal):
+    created_on = date(2001, 1, 4)
+    (deal_id,) = _deals_with_documents(client, auth_headers, db, make_deal, created_on, 1)
+    job = _job(db, created_on)
+    job.status = "RUNNING"
+    job.heartbeat_at = datetime.now(timezone.utc)
+    db.commit()
+
+    with pytest.raises(HTTPException) as err:
+        regeneration.resume_job(db, job)
+    assert err.value.status_code == 409
+    regeneration.run_job(job.id)
+
+    assert _latest_versions(db, [deal_id]) == {deal_id: 1}
+
+
+def test_unknown_doc_type_is_rejected(client, auth_headers):
+    r = client.post("/document-jobs/regenerate", headers=auth_headers, json={"doc_types": ["NOPE"]})
+    assert r.status_code == 400
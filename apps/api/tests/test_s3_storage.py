@@ -0,0 +1,128 @@
+"""The S3 backend against an in-process moto server."""
+import gzip
+import socket
+
+import boto3
+import httpx
+import pytest
+
+from app.config import settings
+from app.services import html_store, storage
+
+moto_server = pytest.importorskip("moto.server")
+
+BUCKET = "nestapp-test"
+S3_SETTINGS = {
+    "storage_backend": "s3",
+    "storage_s3_bucket": BUCKET,
+    "storage_s3_prefix": "tenant-a",
+    "storage_s3_region": "us-east-1",
+    "storage_s3_access_key": "test",
+    "storage_s3_secret_key": "test",
+    "storage_s3_multipart_threshold_mb": 5,
+    "storage_s3_multipart_chunk_mb": 5,
+    "storage_s3_presigned_reads": False,
+}
+
+
+@pytest.fixture(scope="module")
+def s3_endpoint():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        port = s.getsockname()[1]
+    server = moto_server.ThreadedMotoServer(ip_address="127.0.0.1", port=port)
+    server.start()
+    endpoint = f"http://127.0.0.1:{port}"
+    boto3.client("s3", endpoint_url=endpoint, region_name="us-east-1",
+                 aws_access_key_id="test", aws_secret_access_key="test").create_bucket(Bucket=BUCKET)
+    yield endpoint
+    server.stop()
+
+
+@pytest.fixture
+def s3(s3_endpoint, monkeypatch):
+    for name, value in {**S3_SETTINGS, "storage_s3_endpoint_url": s3_endpoint}.items():
+        monkeypatch.setattr(settings, name, value)
+    monkeypatch.setattr(storage, "_storage", None)
+    yield storage.get_storage()
+    storage._storage = None
+
+
+def _head(s3, key: str) -> dict:
+    return s3.client.head_object(Bucket=BUCKET, Key=s3._object_key(key))
+
+
+def test_roundtrip_under_the_prefix(s3):
+    s3.put("documents/d1/a.txt", b"hello")
+    assert s3.read("documents/d1/a.txt") == b"hello"
+    assert s3.stat("documents/d1/a.txt").size == 5
+    assert [o.key for o in s3.iter_objects("documents/d1/")] == ["documents/d1/a.txt"]
+    assert _head(s3, "documents/d1/a.txt")["ContentType"] == "text/plain"
+    s3.delete("documents/d1/a.txt")
+    assert s3.stat("documents/d1/a.txt") is None
+    with pytest.raises(FileNotFoundError):
+        s3.read("documents/d1/a.txt")
+
+
+def test_range_reads(s3):
+    s3.put("archives/r.bin", bytes(range(256)))
+    assert s3.read_range("archives/r.bin", 10, 5) == bytes([10, 11, 12, 13, 14])
+    assert s3.read_range("archives/r.bin", 250, 6) == bytes(range(250, 256))
+
+
+def test_large_uploads_are_multipart(s3, tmp_path):
+    data = bytes(range(256)) * (11 * 4096)  # 11 MiB: three 5 MiB parts
+    s3.put("big/put.bin", data)
+    src = tmp_path / "src.bin"
+    src.write_bytes(data)
+    s3.put_file("big/file.bin", str(src), move=True)
+
+    for key in ("big/put.bin", "big/file.bin"):
+        assert _head(s3, key)["ETag"].strip('"').endswith("-3")
+        assert s3.read(key) == data
+    assert not src.exists()
+
+
+def test_gzip_objects_are_stored_without_content_encoding(s3):
+    html = "<html><body>" + "row " * 1000 + "</body></html>"
+    key = html_store.write_html("documents/d2/contract.html", html)
+
+    head = _head(s3, key)
+    assert head["ContentType"] == "application/gzip"
+    assert "ContentEncoding" not in head
+    assert gzip.decompress(s3.read(key)).decode() == html
+    # A plain GET of the object hands over the compressed bytes
+    with httpx.Client() as http:
+        assert http.get(s3.presigned_url(key)).content == s3.read(key)
+
+
+def test_gzip_negotiation(s3):
+    html = "<p>" + "x" * 500 + "</p>"
+    key = html_store.write_html("documents/d3/contract.html", html)
+
+    as_stored = html_store.gzip_response(key, "gzip, deflate")
+    assert as_stored.headers["Content-Encoding"] == "gzip"
+    assert as_stored.headers["Vary"] == "Accept-Encoding"
+    decoded = html_store.gzip_response(key, "identity")
+    assert "Content-Encoding" not in decoded.headers
+    assert decoded.body == html.encode()
+
+
+def test_presigned_reads(s3, monkeypatch):
+    monkeypatch.setattr(settings, "storage_s3_presigned_reads", True)
+    html = "<p>presigned</p>"
+    key = html_store.write_html("documents/d4/contract.html", html)
+
+    gz = html_store.gzip_response(key, "gzip")
+    assert gz.status_code == 307
+    with httpx.Client() as http:
+        r = http.get(gz.headers["Location"])
+        assert r.headers["Content-Encoding"] == "gzip"
+        assert r.text == html  # httpx decodes it, like a browser
+
+        s3.put("documents/d4/a.pdf", b"%PDF-1.7")
+        pdf = storage.file_response("documents/d4/a.pdf", "application/pdf", filename="Contract 1.pdf")
+        r = http.get(pdf.headers["Location"])
+        assert r.content == b"%PDF-1.7"
+        assert r.headers["Content-Type"] == "application/pdf"
+        assert r.headers["Content-Disposition"] == 'attachment; filename*=utf-8\'\'Contract%201.pdf'
@@ -0,0 +1,39 @@
+import pytest
+from sqlalchemy import text
+
+from app.config import settings
+from app.services import slow_queries
+
+
+@pytest.fixture
+def record_everything(monkeypatch):
+    monkeypatch.setattr(settings, "db_slow_query_ms", 0.0)
+
+
+def _latest(db, email: str) -> dict:
+    db.execute(text("SELECT id FROM tenants WHERE email = :email"), {"email": email}).all()
+    return next(r for r in slow_queries.recent_slow_queries(50) if "FROM tenants WHERE email" in r["statement"])
+
+
+def test_values_are_not_recorded_by_default(db, record_everything):
+    record = _latest(db, "private@example.com")
+    assert "private@example.com" not in str(record)
+    assert record["parameters"] == ["str"]
+
+
+def test_values_are_recorded_when_opted_in(db, record_everything, monkeypatch):
+    monkeypatch.setattr(settings, "db_slow_query_log_parameters", True)
+    assert "private@example.com" in _latest(db, "private@example.com")["parameters"]
+
+
+def test_executemany_parameters_are_summarised():
+    assert slow_queries._parameters([{"a": 1, "b": None}, {"a": 2, "b": "x"}], True) == {
+        "rows": 2, "first": {"a": "int", "b": "NULL"},
+    }
+
+
+def test_plan_literals_are_masked():
+    plan = [{"Plan": {"Filter": "((email)::text = 'private@example.com'::text)", "Plans": [{"Rows": 1}]}}]
+    assert slow_queries._mask_plan(plan) == [
+        {"Plan": {"Filter": "((email)::text = '?'::text)", "Plans": [{"Rows": 1}]}},
+    ]
@@ -0,0 +1,20 @@
+from app.config import settings
+
+BOT = {"Authorization": f"Bearer {settings.openclaw_service_token}"}
+
+
+def _queries(response) -> int:
+    return int(response.headers["X-DB-Queries"])
+
+
+def test_read_only_batch_queries_count_toward_the_request(client, make_deal):
+    deal_id = make_deal()["id"]
+    single = client.post("/integrations/openclaw/webhook", headers=BOT,
+                         json={"command": "get_deal_status", "deal_id": deal_id})
+    batch = client.post("/integrations/openclaw/webhook", headers=BOT, json={
+        "deal_id": deal_id,
+        "commands": [{"command": "get_deal_status"}, {"command": "get_deal_status"}, {"command": "get_deal_status"}],
+    })
+    assert batch.status_code == 200 and batch.json()["success"]
+    # Three status reads on worker threads must outweigh one on the request thread
+    assert _queries(batch) > _queries(single)
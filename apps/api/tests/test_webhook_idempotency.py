@@ -0,0 +1,55 @@
+import uuid
+
+import pytest
+
+from app.config import settings
+from app.models.deal import Deal
+
+
+@pytest.fixture
+def bot_headers():
+    return {"Authorization": f"Bearer {settings.openclaw_service_token}", "Idempotency-Key": f"test-{uuid.uuid4().hex}"}
+
+
+def _create_deal(tenant, unit, **params):
+    return {"command": "create_deal", "tenant_id": tenant.id, "unit_id": unit.id, "params": params}
+
+
+def test_retry_replays_the_stored_response(client, db, make_parties, bot_headers):
+    tenant, unit = make_parties()
+    cmd = _create_deal(tenant, unit, term_type="MONTHLY", start_date="2026-01-01")
+
+    first = client.post("/integrations/openclaw/webhook", headers=bot_headers, json=cmd)
+    retry = client.post("/integrations/openclaw/webhook", headers=bot_headers, json=cmd)
+
+    assert first.status_code == retry.status_code == 200
+    assert first.json()["replayed"] is False
+    assert retry.json()["replayed"] is True
+    assert retry.json()["data"] == first.json()["data"]
+    assert db.query(Deal).filter(Deal.unit_id == unit.id).count() == 1
+
+
+def test_key_in_body_is_honoured(client, db, make_parties, bot_headers):
+    tenant, unit = make_parties()
+    headers = {"Authorization": bot_headers["Authorization"]}
+    cmd = {**_create_deal(tenant, unit, term_type="MONTHLY", start_date="2026-01-01"),
+           "idempotency_key": bot_headers["Idempotency-Key"]}
+
+    client.post("/integrations/openclaw/webhook", headers=headers, json=cmd)
+    retry = client.post("/integrations/openclaw/webhook", headers=headers, json=cmd)
+
+    assert retry.json()["replayed"] is True
+    assert db.query(Deal).filter(Deal.unit_id == unit.id).count() == 1
+
+
+def test_failed_command_does_not_claim_the_key(client, db, make_parties, bot_headers):
+    tenant, unit = make_parties()
+
+    failed = client.post("/integrations/openclaw/webhook", headers=bot_headers, json=_create_deal(tenant, unit))
+    assert failed.status_code == 422
+
+    fixed = client.post("/integrations/openclaw/webhook", headers=bot_headers,
+                        json=_create_deal(tenant, unit, term_type="MONTHLY", start_date="2026-01-01"))
+    assert fixed.status_code == 200
+    assert fixed.json()["replayed"] is False
+    assert db.query(Deal).filter(Deal.unit_id == unit.id).count() == 1
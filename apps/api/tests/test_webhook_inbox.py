@@ -0,0 +1,88 @@
+from datetime import timedelta, timezone
+
+import pytest
+
+from app.models.webhook_inbox import WebhookInboxItem
+from app.services import webhook_inbox
+
+
+@pytest.fixture
+def inbox(client):
+    """Stop the app's worker pool so the test drives the inbox by hand."""
+    webhook_inbox.stop_workers()
+    yield
+    webhook_inbox.start_workers()
+
+
+def _processing(db, owner, started_ago, heartbeat_ago):
+    now = webhook_inbox._now()
+    item = WebhookInboxItem(
+        command="get_deal_status",
+        payload={"command": "get_deal_status", "deal_id": "missing"},
+        status="PROCESSING",
+        attempts=1,
+        lease_owner=owner,
+        started_at=now - timedelta(seconds=started_ago),
+        heartbeat_at=None if heartbeat_ago is None else now - timedelta(seconds=heartbeat_ago),
+    )
+    db.add(item)
+    db.commit()
+    return item
+
+
+def test_long_running_item_with_fresh_heartbeat_keeps_its_lease(inbox, db):
+    item = _processing(db, "worker-a", started_ago=3600, heartbeat_ago=5)
+
+    webhook_inbox._release_stale(db)
+
+    db.refresh(item)
+    assert item.status == "PROCESSING"
+    assert item.lease_owner == "worker-a"
+
+
+def test_expired_lease_is_released(inbox, db):
+    expired = _processing(db, "worker-a", started_ago=3600, heartbeat_ago=3600)
+    legacy = _processing(db, None, started_ago=3600, heartbeat_ago=None)
+
+    webhook_inbox._release_stale(db)
+
+    for item in (expired, legacy):
+        db.refresh(item)
+        assert item.status == "PENDING"
+        assert item.lease_owner is None
+
+
+def test_pool_heartbeats_only_its_running_items(inbox, db):
+    pool = webhook_inbox.InboxWorkerPool(workers=1, poll_interval=1)
+    mine = _processing(db, pool.owner, started_ago=600, heartbeat_ago=200)
+    other = _processing(db, "worker-b", started_ago=600, heartbeat_ago=200)
+    pool._running.update({mine.id, other.id})
+
+    pool.heartbeat(db, force=True)
+
+    db.refresh(mine)
+    db.refresh(other)
+    assert webhook_inbox._now() - mine.heartbeat_at.replace(tzinfo=timezone.utc) < timedelta(seconds=5)
+    assert webhook_inbox._now() - other.heartbeat_at.replace(tzinfo=timezone.utc) > timedelta(seconds=100)
+
+
+def test_worker_that_lost_its_lease_does_not_write_the_outcome(inbox, db):
+    item = _processing(db, "worker-b", started_ago=10, heartbeat_ago=1)
+
+    webhook_inbox.run_item(item.id, "worker-a")
+
+    db.refresh(item)
+    assert item.status == "PROCESSING"
+    assert item.lease_owner == "worker-b"
+    assert item.finished_at is None
+
+
+def test_lease_holder_writes_the_outcome(inbox, db):
+    item = _processing(db, "worker-a", started_ago=10, heartbeat_ago=1)
+
+    webhook_inbox.run_item(item.id, "worker-a")
+
+    db.refresh(item)
+    assert item.status == "FAILED"
+    assert item.finished_at is not None
+    assert item.delivered_at is not None
@@ -135,6 +135,7 @@ export interface DocumentVersion {
   version_no: number;
   html_path: string;
   pdf_path: string;
+  pdf_status: "READY" | "PENDING";
   channel: Channel;
   generated_at: string;
   is_latest: boolean;
@@ -176,9 +177,11 @@ export interface Settings {
   company_legal_name: string;
   company_address: string;
   logo_path: string | null;
+  logo_render_path: string | null;
   signatory_name: string;
   signatory_title: string;
   signature_image_path: string | null;
+  signature_render_path: string | null;
   finance_email: string;
   bot_whatsapp_number: string;
   updated_at: string;